@@ -5,15 +5,24 @@ Uso:
     python chat_realtime.py
 """
 
-import json
+import os
 import sys
 from pathlib import Path
 
+try:
+    import orjson as _json  # Parser em C, bem mais rápido
+except ImportError:
+    import json as _json
+
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
 from src.llm_integration import QASystem, interactive_qa_session
 
+# Mesmo modelo de main.py (VRP_LLM_MODEL): o chat reaproveita o modelo já
+# carregado no Ollama em vez de carregar um segundo
+LLM_MODEL = os.environ.get("VRP_LLM_MODEL", "llama2:7b-chat-q4_K_M")
+
 
 def load_latest_context() -> dict:
     context_file = project_root / "outputs" / "session" / "latest_context.json"
@@ -21,8 +30,7 @@ def load_latest_context() -> dict:
         raise FileNotFoundError(
             "Contexto nao encontrado. Execute primeiro: python main.py"
         )
-    with open(context_file, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return _json.loads(context_file.read_bytes())
 
 
 def main():
@@ -37,13 +45,13 @@ def main():
         return
 
     try:
-        qa = QASystem(provider="ollama", model="llama2")
+        qa = QASystem(provider="ollama", model=LLM_MODEL)
     except Exception as e:
         print(f"\nErro ao inicializar Q&A: {e}")
         print("\nVerifique:")
         print("  - Ollama instalado")
         print("  - Servidor ativo: ollama serve")
-        print("  - Modelo baixado: ollama pull llama2")
+        print(f"  - Modelo baixado: ollama pull {LLM_MODEL}")
         return
 
     qa.load_context(
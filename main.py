@@ -8,9 +8,37 @@ Este script mostra uma tela de configuração NO PYGAME onde você escolhe:
 Depois inicia a simulação com visualização completa.
 """
 
+import asyncio
+import os
 import sys
 import json
+import time
+import threading
+import traceback
+import numpy as np
 import pygame
+
+try:
+    import orjson  # Serialização JSON em C (opcional)
+except ImportError:
+    orjson = None
+
+try:
+    import ijson  # Leitura incremental de JSON (opcional)
+except ImportError:
+    ijson = None
+
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        """Fallback: sem numba, as funções rodam em Python puro."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import attrgetter
 from pathlib import Path
 from typing import Dict, Optional, Tuple
 
@@ -23,7 +51,20 @@ from src.models import DeliveryPoint, Vehicle
 from src.visualization.pygame_visualizer import PygameVisualizer
 from src.visualization.folium_visualizer import FoliumVisualizer
 from src.genetic_algorithm import GeneticAlgorithm
-from src.llm_integration import InstructionGenerator, ReportGenerator
+from src.llm_integration import InstructionGenerator, ReportGenerator, RoutePoints
+
+# Campos copiados dos modelos para o mapa Folium / contexto do chat
+_point_fields = attrgetter('name', 'latitude', 'longitude', 'priority', 'weight_kg',
+                           'volume_m3', 'service_time_minutes', 'item_description')
+_VEHICLE_FIELDS = ('name', 'capacity_kg', 'capacity_volume_m3', 'autonomy_km')
+_vehicle_fields = attrgetter(*_VEHICLE_FIELDS)
+
+# Modelo do Ollama para instruções e relatório: variante quantizada Q4_K_M
+# por padrão (menos memória por token, mais tokens/s); troque com VRP_LLM_MODEL
+LLM_MODEL = os.environ.get("VRP_LLM_MODEL", "llama2:7b-chat-q4_K_M")
+
+# Janela da tela de configuração: redimensionável e com double buffering
+CONFIG_DISPLAY_FLAGS = pygame.RESIZABLE | pygame.DOUBLEBUF
 
 # Cores
 WHITE = (255, 255, 255)
@@ -46,6 +87,67 @@ VEHICLE_COLORS = [
 ]
 
 
+@njit("int64(int64, int64, int64, float64)", cache=True)
+def _map_points(mouse_x, x0, x1, inv_w):
+    """Posição do mouse no slider -> número de pontos (1 a 100)."""
+    x = max(x0, min(mouse_x, x1))
+    v = 1 + int((x - x0) * inv_w * 99)
+    return max(1, min(100, v))
+
+
+@njit("int64(int64, int64, int64, float64)", cache=True)
+def _map_gens(mouse_x, x0, x1, inv_w):
+    """Posição do mouse no slider -> número de gerações (50 a 2000, passo 50)."""
+    x = max(x0, min(mouse_x, x1))
+    v = int(50 + (x - x0) * inv_w * 1950)
+    v = (v // 50) * 50  # Arredondar para múltiplo de 50
+    return max(50, min(2000, v))
+
+
+@lru_cache(maxsize=4)
+def _load_json_cached(path_str: str):
+    """
+    Lê um arquivo JSON uma única vez por caminho (cache em memória).
+    
+    O resultado é compartilhado entre as chamadas: deve ser tratado como
+    somente leitura (copiar os dicts antes de modificá-los).
+    
+    Args:
+        path_str: Caminho do arquivo JSON
+        
+    Returns:
+        Conteúdo do arquivo
+    """
+    with open(path_str, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_json_prefix(path: Path, limit: int) -> list:
+    """
+    Lê apenas os primeiros registros de um arquivo JSON contendo uma lista.
+    
+    Args:
+        path: Caminho do arquivo JSON
+        limit: Número máximo de registros a retornar
+        
+    Returns:
+        Lista com até `limit` registros
+    """
+    if ijson is not None:
+        items = []
+        if limit <= 0:
+            return items
+        with open(path, 'rb') as f:
+            # use_float: números como float em vez de Decimal
+            for item in ijson.items(f, 'item', use_float=True):
+                items.append(item)
+                if len(items) >= limit:
+                    break
+        return items
+    
+    return _load_json_cached(str(path))[:limit]
+
+
 def detect_display_size() -> Tuple[int, int]:
     """
     Detecta resolução atual do monitor para adaptar a interface.
@@ -74,7 +176,7 @@ class ConfigScreen:
         self.height = height or auto_height
         
         # Janela adaptativa para qualquer resolução
-        self.screen = pygame.display.set_mode((self.width, self.height), pygame.RESIZABLE)
+        self.screen = pygame.display.set_mode((self.width, self.height), CONFIG_DISPLAY_FLAGS)
         pygame.display.set_caption("Configuracao do AG - VRP")
         self.clock = pygame.time.Clock()
         
@@ -86,6 +188,17 @@ class ConfigScreen:
         # Estado
         self.running = True
         self.confirmed = False
+        self._dirty = True        # Redesenhar só quando algo mudou
+        self._mouse_pos = pygame.mouse.get_pos()  # Atualizada pelos eventos
+        self._start_hover = None  # Hover do botão iniciar no último frame
+        self._preview_mode = False  # Arrastando slider: resumo só é refeito ao soltar
+        self._details_surf = None
+        
+        # Dados dos veículos (lidos uma vez, não a cada frame)
+        self._vehicles_file = project_root / 'data' / 'sample_vehicles.json'
+        self._vehicles_data = []
+        if self._vehicles_file.exists():
+            self._vehicles_data = _load_json_cached(str(self._vehicles_file))
         
         # Botões de veículos - MINI
         self.vehicle_buttons = []
@@ -117,6 +230,143 @@ class ConfigScreen:
         # Botão de iniciar - MENOR (mais acima)
         start_y = min(720, self.height - 120)
         self.start_button = pygame.Rect(self.width // 2 - 150, start_y, 300, 55)
+        
+        # Limites (x0, x1, y0, y1) dos elementos fixos para hit test inline
+        self._vehicle_bounds = [(b.x, b.right, b.y, b.bottom) for b in self.vehicle_buttons]
+        r = self.points_slider_rect
+        self._points_slider_bounds = (r.x, r.right, r.y, r.bottom)
+        r = self.generations_slider_rect
+        self._gens_slider_bounds = (r.x, r.right, r.y, r.bottom)
+        r = self.start_button
+        self._start_bounds = (r.x, r.right, r.y, r.bottom)
+        
+        # Geometria dos sliders usada a cada movimento do mouse
+        self._points_x0 = self.points_slider_rect.x
+        self._points_x1 = self.points_slider_rect.right
+        self._points_inv_w = 1.0 / self.points_slider_rect.width
+        self._gens_x0 = self.generations_slider_rect.x
+        self._gens_x1 = self.generations_slider_rect.right
+        self._gens_inv_w = 1.0 / self.generations_slider_rect.width
+        
+        # Fontes (tamanhos fixos: criadas uma vez, não a cada frame)
+        self.font_title = pygame.font.Font(None, 52)
+        self.font_subtitle = pygame.font.Font(None, 26)
+        self.font_section = pygame.font.Font(None, 32)
+        self.font_button = pygame.font.Font(None, 32)
+        self.font_text = pygame.font.Font(None, 22)
+        self.font_label = pygame.font.Font(None, 26)
+        self.font_value = pygame.font.Font(None, 48)
+        self.font_vehicle_info = pygame.font.Font(None, 20)
+        self.font_vehicles_title = pygame.font.Font(None, 28)
+        self.font_summary_title = pygame.font.Font(None, 28)
+        self.font_details = pygame.font.Font(None, 26)
+        self.font_start = pygame.font.Font(None, 38)
+        self.font_instr = pygame.font.Font(None, 22)
+        
+        # Textos fixos renderizados uma vez; draw() só faz o blit
+        self.surf_title = self._prerender(self.font_title, "CONFIGURACAO DO ALGORITMO GENETICO", BLACK)
+        self.surf_subtitle = self._prerender(self.font_subtitle, "Escolha os parametros para otimizacao de rotas", DARK_GRAY)
+        self.surf_vehicles_title = self._prerender(self.font_section, "NUMERO DE VEICULOS:", BLACK)
+        self.surf_points_title = self._prerender(self.font_section, "PONTOS DE ENTREGA:", BLACK)
+        self.surf_gens_title = self._prerender(self.font_section, "GERACOES:", BLACK)
+        self.surf_label_min = self._prerender(self.font_label, "1", DARK_GRAY)
+        self.surf_label_max = self._prerender(self.font_label, "100", DARK_GRAY)
+        self.surf_label_min_gens = self._prerender(self.font_label, "50", DARK_GRAY)
+        self.surf_label_max_gens = self._prerender(self.font_label, "2000", DARK_GRAY)
+        self.surf_summary_title = self._prerender(self.font_summary_title, "RESUMO DA CONFIGURACAO:", BLACK)
+        self.surf_start = self._prerender(self.font_start, "INICIAR SIMULACAO", WHITE)
+        self.surf_instr1 = self._prerender(self.font_instr, "Clique nos botoes para selecionar | Arraste o slider", GRAY)
+        self.surf_instr2 = self._prerender(self.font_instr, "Pressione ENTER ou clique em INICIAR | ESC ou Q para sair", GRAY)
+        
+        # Números dos botões de veículos: (selecionado, normal)
+        self.surf_vehicle_buttons = [
+            (self._prerender(self.font_button, str(i + 1), WHITE),
+             self._prerender(self.font_button, str(i + 1), DARK_GRAY))
+            for i in range(5)
+        ]
+        
+        # Nome e especificações de cada veículo: (nome, specs)
+        self._vehicle_surfaces = []
+        for i, vehicle in enumerate(self._vehicles_data):
+            vehicle_color = VEHICLE_COLORS[i % len(VEHICLE_COLORS)]
+            specs = f"Cap: {vehicle['capacity_kg']}kg | Auto: {vehicle['autonomy_km']}km"
+            self._vehicle_surfaces.append((
+                self._prerender(self.font_vehicle_info, f"● {vehicle['name']}", vehicle_color),
+                self._prerender(self.font_vehicle_info, specs, DARK_GRAY),
+            ))
+        
+        # Cache de textos dinâmicos (valores dos sliders, resumo, veículos)
+        self._num_cache = {}
+        
+        self._layout_static_text()
+    
+    def _prerender(self, font, text, color):
+        """Renderiza um texto fixo já no formato do display (blit sem conversão)."""
+        return font.render(text, True, color).convert_alpha()
+    
+    def _render_text(self, font, value, color):
+        """
+        Renderiza um texto dinâmico reaproveitando a Surface se o valor não mudou.
+        
+        Args:
+            font: Fonte pygame usada na renderização
+            value: Valor a exibir (convertido com str)
+            color: Cor do texto
+            
+        Returns:
+            Surface renderizada (cacheada por fonte, valor e cor)
+        """
+        key = (id(font), value, color)
+        surf = self._num_cache.get(key)
+        if surf is None:
+            if len(self._num_cache) >= 512:
+                # Descarta a entrada mais antiga (FIFO)
+                del self._num_cache[next(iter(self._num_cache))]
+            surf = font.render(str(value), True, color).convert_alpha()
+            self._num_cache[key] = surf
+        return surf
+    
+    def _layout_static_text(self):
+        """Calcula as posições dos textos fixos (refeito ao redimensionar a janela)."""
+        cx = self.width // 2
+        self.rect_title = self.surf_title.get_rect(center=(cx, 45))
+        self.rect_subtitle = self.surf_subtitle.get_rect(center=(cx, 85))
+        self.rect_vehicles_title = self.surf_vehicles_title.get_rect(center=(cx, 135))
+        self.rect_points_title = self.surf_points_title.get_rect(center=(cx, 270))
+        self.rect_gens_title = self.surf_gens_title.get_rect(center=(cx, 375))
+        self.rect_summary_title = self.surf_summary_title.get_rect(center=(cx, 628 + 18))
+        self.rect_start = self.surf_start.get_rect(center=self.start_button.center)
+        self.rect_instr1 = self.surf_instr1.get_rect(center=(cx, self.height - 60))
+        self.rect_instr2 = self.surf_instr2.get_rect(center=(cx, self.height - 30))
+        self._build_vehicle_panels()
+    
+    def _build_vehicle_panels(self):
+        """Monta um painel pronto (título + veículos) para cada número de veículos."""
+        self._vehicle_panels = {}
+        if not self._vehicles_data:
+            return
+        
+        vehicles_info_y = 505
+        y_offset = vehicles_info_y + 30
+        x_start = 200
+        col_width = 480
+        
+        for n in range(1, 6):
+            title = self._prerender(self.font_vehicles_title, f"VEICULOS SELECIONADOS ({n}):", BLACK)
+            pieces = [(title, title.get_rect(center=(self.width // 2, vehicles_info_y)))]
+            for i, (vehicle_name, specs_text) in enumerate(self._vehicle_surfaces[:n]):
+                # Máximo 3 veículos por linha
+                x = x_start + (i % 3) * col_width
+                y = y_offset + (i // 3) * 45
+                pieces.append((vehicle_name, vehicle_name.get_rect(topleft=(x, y))))
+                pieces.append((specs_text, specs_text.get_rect(topleft=(x + 18, y + 20))))
+            
+            # Painel opaco com fundo branco: o blit vira uma cópia simples
+            bounds = pieces[0][1].unionall([rect for _, rect in pieces[1:]])
+            panel = pygame.Surface(bounds.size).convert()
+            panel.fill(WHITE)
+            panel.blits([(surf, rect.move(-bounds.x, -bounds.y)) for surf, rect in pieces], False)
+            self._vehicle_panels[n] = (panel, bounds.topleft)
     
     def update_points_slider_handle_position(self):
         """Atualiza posição do handle do slider de pontos."""
@@ -135,50 +385,79 @@ class ConfigScreen:
         self.generations_slider_handle.x = x - self.generations_slider_handle.width // 2
         self.generations_slider_handle.y = y
     
-    def handle_events(self):
-        """Processa eventos da interface."""
-        for event in pygame.event.get():
+    def handle_events(self, first_event: Optional[pygame.event.Event] = None):
+        """
+        Processa eventos da interface.
+        
+        Args:
+            first_event: Evento já retirado da fila (por event.wait), processado antes dos demais
+        """
+        events = pygame.event.get()
+        if first_event is not None:
+            events.insert(0, first_event)
+        
+        # MOUSEMOTION é agrupado: só a última posição do frame é aplicada
+        last_motion = None
+        for event in events:
+            if event.type == pygame.MOUSEMOTION:
+                last_motion = event.pos
+                continue
+            if last_motion is not None and event.type == pygame.MOUSEBUTTONUP:
+                # Aplicar o movimento pendente antes de soltar o slider
+                self._apply_mouse_motion(last_motion)
+                last_motion = None
+            
             if event.type == pygame.QUIT:
                 self.running = False
                 return
             elif event.type == pygame.VIDEORESIZE:
                 self.width, self.height = event.w, event.h
-                self.screen = pygame.display.set_mode((self.width, self.height), pygame.RESIZABLE)
+                self.screen = pygame.display.set_mode((self.width, self.height), CONFIG_DISPLAY_FLAGS)
+                self._layout_static_text()
+                self._dirty = True
+            
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                self._dirty = True
             
             elif event.type == pygame.MOUSEBUTTONDOWN:
-                mouse_pos = pygame.mouse.get_pos()
+                mouse_pos = self._mouse_pos = event.pos
+                x, y = mouse_pos
                 
                 # Verificar clique nos botões de veículos
-                for i, button in enumerate(self.vehicle_buttons):
-                    if button.collidepoint(mouse_pos):
+                for i, (x0, x1, y0, y1) in enumerate(self._vehicle_bounds):
+                    if x0 <= x < x1 and y0 <= y < y1:
                         self.num_vehicles = i + 1
+                        self._dirty = True
                 
-                # Verificar clique no slider de pontos
+                # Verificar clique no slider de pontos (o handle se move: usa o Rect)
+                x0, x1, y0, y1 = self._points_slider_bounds
                 if self.points_slider_handle.collidepoint(mouse_pos):
                     self.dragging_points_slider = True
-                elif self.points_slider_rect.collidepoint(mouse_pos):
-                    self.update_points_from_mouse(mouse_pos[0])
+                    self._preview_mode = True
+                elif x0 <= x < x1 and y0 <= y < y1:
+                    self.update_points_from_mouse(x)
                 
                 # Verificar clique no slider de gerações
+                x0, x1, y0, y1 = self._gens_slider_bounds
                 if self.generations_slider_handle.collidepoint(mouse_pos):
                     self.dragging_gens_slider = True
-                elif self.generations_slider_rect.collidepoint(mouse_pos):
-                    self.update_gens_from_mouse(mouse_pos[0])
+                    self._preview_mode = True
+                elif x0 <= x < x1 and y0 <= y < y1:
+                    self.update_gens_from_mouse(x)
                 
                 # Verificar clique no botão de iniciar
-                if self.start_button.collidepoint(mouse_pos):
+                x0, x1, y0, y1 = self._start_bounds
+                if x0 <= x < x1 and y0 <= y < y1:
                     self.confirmed = True
                     self.running = False
             
             elif event.type == pygame.MOUSEBUTTONUP:
                 self.dragging_points_slider = False
                 self.dragging_gens_slider = False
-            
-            elif event.type == pygame.MOUSEMOTION:
-                if self.dragging_points_slider:
-                    self.update_points_from_mouse(event.pos[0])
-                if self.dragging_gens_slider:
-                    self.update_gens_from_mouse(event.pos[0])
+                if self._preview_mode:
+                    # Render final com o resumo atualizado
+                    self._preview_mode = False
+                    self._dirty = True
             
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE or event.key == pygame.K_q:
@@ -186,24 +465,38 @@ class ConfigScreen:
                 elif event.key == pygame.K_RETURN or event.key == pygame.K_SPACE:
                     self.confirmed = True
                     self.running = False
+        
+        if last_motion is not None:
+            self._apply_mouse_motion(last_motion)
+    
+    def _apply_mouse_motion(self, pos: Tuple[int, int]):
+        """Aplica um movimento do mouse (hover do botão e arraste dos sliders)."""
+        # Mudança de hover no botão iniciar troca a cor
+        x, y = pos
+        x0, x1, y0, y1 = self._start_bounds
+        hover = x0 <= x < x1 and y0 <= y < y1
+        self._mouse_pos = pos
+        if hover != self._start_hover:
+            self._start_hover = hover
+            self._dirty = True
+        if self.dragging_points_slider:
+            self.update_points_from_mouse(pos[0])
+        if self.dragging_gens_slider:
+            self.update_gens_from_mouse(pos[0])
     
     def update_points_from_mouse(self, mouse_x: int):
         """Atualiza num_points baseado na posição do mouse no slider."""
-        x = max(self.points_slider_rect.x, 
-                min(mouse_x, self.points_slider_rect.x + self.points_slider_rect.width))
-        ratio = (x - self.points_slider_rect.x) / self.points_slider_rect.width
-        self.num_points = int(1 + ratio * (100 - 1))
-        self.num_points = max(1, min(100, self.num_points))
+        num_points = _map_points(mouse_x, self._points_x0, self._points_x1, self._points_inv_w)
+        if num_points != self.num_points:
+            self.num_points = num_points
+            self._dirty = True
     
     def update_gens_from_mouse(self, mouse_x: int):
         """Atualiza num_generations baseado na posição do mouse no slider."""
-        x = max(self.generations_slider_rect.x, 
-                min(mouse_x, self.generations_slider_rect.x + self.generations_slider_rect.width))
-        ratio = (x - self.generations_slider_rect.x) / self.generations_slider_rect.width
-        # Mapear para num_generations (50-2000) em incrementos de 50
-        self.num_generations = int(50 + ratio * (2000 - 50))
-        self.num_generations = (self.num_generations // 50) * 50  # Arredondar para múltiplo de 50
-        self.num_generations = max(50, min(2000, self.num_generations))
+        num_generations = _map_gens(mouse_x, self._gens_x0, self._gens_x1, self._gens_inv_w)
+        if num_generations != self.num_generations:
+            self.num_generations = num_generations
+            self._dirty = True
     
     def draw_rounded_rect(self, surface, color, rect, radius, border_color=None, border_width=0):
         """Desenha retângulo com cantos arredondados."""
@@ -215,55 +508,35 @@ class ConfigScreen:
         """Desenha a interface em TELA CHEIA COMPACTA."""
         self.screen.fill(WHITE)
         
-        # Título - MINI
-        font_title = pygame.font.Font(None, 52)  # Reduzido de 70
-        title = font_title.render("CONFIGURACAO DO ALGORITMO GENETICO", True, BLACK)
-        title_rect = title.get_rect(center=(self.width // 2, 45))  # Mais próximo do topo
-        self.screen.blit(title, title_rect)
-        
-        # Subtítulo - MINI
-        font_subtitle = pygame.font.Font(None, 26)  # Reduzido de 32
-        subtitle = font_subtitle.render("Escolha os parametros para otimizacao de rotas", True, DARK_GRAY)
-        subtitle_rect = subtitle.get_rect(center=(self.width // 2, 85))  # Mais próximo
-        self.screen.blit(subtitle, subtitle_rect)
+        # Título e subtítulo - MINI
+        self.screen.blit(self.surf_title, self.rect_title)
+        self.screen.blit(self.surf_subtitle, self.rect_subtitle)
         
         # === SEÇÃO: VEÍCULOS ===
-        font_section = pygame.font.Font(None, 32)  # Reduzido de 40
-        font_text = pygame.font.Font(None, 22)  # Reduzido de 28
-        
         # Título da seção VEÍCULOS - CENTRALIZADO E MINI
-        vehicles_title = font_section.render("NUMERO DE VEICULOS:", True, BLACK)
-        vehicles_title_rect = vehicles_title.get_rect(center=(self.width // 2, 135))  # Mais próximo
-        self.screen.blit(vehicles_title, vehicles_title_rect)
+        self.screen.blit(self.surf_vehicles_title, self.rect_vehicles_title)
         
         # Botões de veículos (1 a 5) - TEXTO MINI
-        font_button = pygame.font.Font(None, 32)  # Reduzido de 38
         for i, button in enumerate(self.vehicle_buttons):
             # Cor do botão
-            if self.num_vehicles == i + 1:
-                color = BLUE
-                text_color = WHITE
-            else:
-                color = LIGHT_GRAY
-                text_color = DARK_GRAY
+            selected = self.num_vehicles == i + 1
+            color = BLUE if selected else LIGHT_GRAY
             
             # Desenhar botão com bordas arredondadas
             self.draw_rounded_rect(self.screen, color, button, 15, BLACK, 3)
             
             # Texto do botão (número grande)
-            text = font_button.render(str(i + 1), True, text_color)
+            text = self.surf_vehicle_buttons[i][0 if selected else 1]
             text_rect = text.get_rect(center=button.center)
             self.screen.blit(text, text_rect)
         
         # Descrição - ABAIXO DOS BOTÕES MINI
-        desc = font_text.render(f"Selecionado: {self.num_vehicles} veiculo(s)", True, DARK_GRAY)
+        desc = self._render_text(self.font_text, f"Selecionado: {self.num_vehicles} veiculo(s)", DARK_GRAY)
         desc_rect = desc.get_rect(center=(self.width // 2, 238))  # Mais próximo
         self.screen.blit(desc, desc_rect)
         
         # === SEÇÃO: PONTOS DE ENTREGA === MINI
-        points_title = font_section.render("PONTOS DE ENTREGA:", True, BLACK)  # Texto mais curto
-        points_title_rect = points_title.get_rect(center=(self.width // 2, 270))  # Mais próximo
-        self.screen.blit(points_title, points_title_rect)
+        self.screen.blit(self.surf_points_title, self.rect_points_title)
         
         # Desenhar trilho do slider de pontos
         pygame.draw.rect(self.screen, GRAY, self.points_slider_rect, border_radius=15)
@@ -276,23 +549,17 @@ class ConfigScreen:
         pygame.draw.rect(self.screen, BLACK, self.points_slider_handle, 3, border_radius=10)
         
         # Labels do slider - MINI
-        font_label = pygame.font.Font(None, 26)  # Reduzido de 32
-        label_min = font_label.render("1", True, DARK_GRAY)
-        label_max = font_label.render("100", True, DARK_GRAY)
-        self.screen.blit(label_min, (self.points_slider_rect.x - 35, self.points_slider_rect.centery - 10))
-        self.screen.blit(label_max, (self.points_slider_rect.x + self.points_slider_rect.width + 12, 
+        self.screen.blit(self.surf_label_min, (self.points_slider_rect.x - 35, self.points_slider_rect.centery - 10))
+        self.screen.blit(self.surf_label_max, (self.points_slider_rect.x + self.points_slider_rect.width + 12, 
                                      self.points_slider_rect.centery - 10))
         
         # Valor atual - MINI
-        font_value = pygame.font.Font(None, 48)  # Reduzido de 60
-        value_text = font_value.render(str(self.num_points), True, BLUE)
+        value_text = self._render_text(self.font_value, self.num_points, BLUE)
         value_rect = value_text.get_rect(center=(self.width // 2, 350))  # Mais próximo
         self.screen.blit(value_text, value_rect)
         
         # === SEÇÃO: NÚMERO DE GERAÇÕES === MINI
-        gens_title = font_section.render("GERACOES:", True, BLACK)  # Texto mais curto
-        gens_title_rect = gens_title.get_rect(center=(self.width // 2, 375))  # Mais próximo
-        self.screen.blit(gens_title, gens_title_rect)
+        self.screen.blit(self.surf_gens_title, self.rect_gens_title)
         
         # Desenhar trilho do slider de gerações
         pygame.draw.rect(self.screen, GRAY, self.generations_slider_rect, border_radius=15)
@@ -305,61 +572,20 @@ class ConfigScreen:
         pygame.draw.rect(self.screen, BLACK, self.generations_slider_handle, 3, border_radius=10)
         
         # Labels do slider de gerações
-        label_min_gens = font_label.render("50", True, DARK_GRAY)
-        label_max_gens = font_label.render("2000", True, DARK_GRAY)
-        self.screen.blit(label_min_gens, (self.generations_slider_rect.x - 40, self.generations_slider_rect.centery - 12))
-        self.screen.blit(label_max_gens, (self.generations_slider_rect.x + self.generations_slider_rect.width + 15, 
+        self.screen.blit(self.surf_label_min_gens, (self.generations_slider_rect.x - 40, self.generations_slider_rect.centery - 12))
+        self.screen.blit(self.surf_label_max_gens, (self.generations_slider_rect.x + self.generations_slider_rect.width + 15, 
                                           self.generations_slider_rect.centery - 12))
         
         # Valor atual de gerações
-        value_gens_text = font_value.render(str(self.num_generations), True, ORANGE)
+        value_gens_text = self._render_text(self.font_value, self.num_generations, ORANGE)
         value_gens_rect = value_gens_text.get_rect(center=(self.width // 2, 460))  # Mais próximo
         self.screen.blit(value_gens_text, value_gens_rect)
         
         # === INFORMAÇÕES DOS VEÍCULOS SELECIONADOS === MINI
-        vehicles_info_y = 505  # Mais próximo
-        font_vehicle_info = pygame.font.Font(None, 20)  # Reduzido de 24
-        
-        # Ler dados dos veículos
-        import json
-        from pathlib import Path
-        project_root = Path(__file__).parent
-        vehicles_file = project_root / 'data' / 'sample_vehicles.json'
-        
-        if vehicles_file.exists():
-            with open(vehicles_file, 'r', encoding='utf-8') as f:
-                vehicles_data = json.load(f)
-            
-            # Mostrar veículos selecionados
-            vehicles_to_show = vehicles_data[:self.num_vehicles]
-            
-            # Título - MINI
-            font_vehicles_title = pygame.font.Font(None, 28)  # Reduzido de 36
-            vehicles_info_title = font_vehicles_title.render(f"VEICULOS SELECIONADOS ({self.num_vehicles}):", True, BLACK)
-            vehicles_info_title_rect = vehicles_info_title.get_rect(center=(self.width // 2, vehicles_info_y))
-            self.screen.blit(vehicles_info_title, vehicles_info_title_rect)
-            
-            # Mostrar cada veículo - MINI
-            y_offset = vehicles_info_y + 30  # Reduzido de 35
-            x_start = 200
-            col_width = 480  # Reduzido de 520
-            
-            for i, vehicle in enumerate(vehicles_to_show):
-                # Posição da coluna (máximo 3 por linha)
-                col = i % 3
-                row = i // 3
-                x = x_start + col * col_width
-                y = y_offset + row * 45  # Mais compacto (era 55)
-                
-                # Nome do veículo com cor
-                vehicle_color = VEHICLE_COLORS[i % len(VEHICLE_COLORS)]
-                vehicle_name = font_vehicle_info.render(f"● {vehicle['name']}", True, vehicle_color)
-                self.screen.blit(vehicle_name, (x, y))
-                
-                # Especificações - MINI
-                specs = f"Cap: {vehicle['capacity_kg']}kg | Auto: {vehicle['autonomy_km']}km"
-                specs_text = font_vehicle_info.render(specs, True, DARK_GRAY)
-                self.screen.blit(specs_text, (x + 18, y + 20))  # Reduzido de 25
+        # Painel pré-renderizado por número de veículos (um único blit)
+        panel = self._vehicle_panels.get(self.num_vehicles)
+        if panel is not None:
+            self.screen.blit(*panel)
         
         # === RESUMO === MINI
         summary_y = 628  # Mais próximo (era 640)
@@ -370,23 +596,22 @@ class ConfigScreen:
         self.draw_rounded_rect(self.screen, LIGHT_GRAY, summary_box, 15, DARK_GRAY, 2)
         
         # Título do resumo - MINI
-        font_summary_title = pygame.font.Font(None, 28)  # Reduzido de 36
-        summary_title = font_summary_title.render("RESUMO DA CONFIGURACAO:", True, BLACK)
-        summary_title_rect = summary_title.get_rect(center=(self.width // 2, summary_y + 18))
-        self.screen.blit(summary_title, summary_title_rect)
-        
-        # Detalhes - MINI
-        pop_size = max(50, self.num_points * 5)
+        self.screen.blit(self.surf_summary_title, self.rect_summary_title)
         
-        font_details = pygame.font.Font(None, 26)  # Reduzido de 32
-        details_text = f"Veiculos: {self.num_vehicles}  |  Pontos: {self.num_points}  |  Populacao: {pop_size}  |  Geracoes: {self.num_generations}"
-        details = font_details.render(details_text, True, DARK_GRAY)
+        # Detalhes - MINI (durante o arraste reaproveita o último resumo)
+        if not self._preview_mode or self._details_surf is None:
+            pop_size = max(50, self.num_points * 5)
+            
+            details_text = f"Veiculos: {self.num_vehicles}  |  Pontos: {self.num_points}  |  Populacao: {pop_size}  |  Geracoes: {self.num_generations}"
+            self._details_surf = self._render_text(self.font_details, details_text, DARK_GRAY)
+        details = self._details_surf
         details_rect = details.get_rect(center=(self.width // 2, summary_y + 42))
         self.screen.blit(details, details_rect)
         
         # === BOTÃO INICIAR === COMPACTO
-        mouse_pos = pygame.mouse.get_pos()
-        if self.start_button.collidepoint(mouse_pos):
+        x, y = self._mouse_pos
+        x0, x1, y0, y1 = self._start_bounds
+        if x0 <= x < x1 and y0 <= y < y1:
             button_color = GREEN
         else:
             button_color = (80, 180, 80)
@@ -395,21 +620,11 @@ class ConfigScreen:
         self.draw_rounded_rect(self.screen, button_color, self.start_button, 15, BLACK, 3)
         
         # Texto do botão - MINI
-        font_start = pygame.font.Font(None, 38)  # Reduzido de 48
-        start_text = font_start.render("INICIAR SIMULACAO", True, WHITE)
-        start_rect = start_text.get_rect(center=self.start_button.center)
-        self.screen.blit(start_text, start_rect)
+        self.screen.blit(self.surf_start, self.rect_start)
         
         # Instruções - MINI
-        font_instr = pygame.font.Font(None, 22)  # Reduzido de 26
-        instr1 = font_instr.render("Clique nos botoes para selecionar | Arraste o slider", True, GRAY)
-        instr2 = font_instr.render("Pressione ENTER ou clique em INICIAR | ESC ou Q para sair", True, GRAY)
-        
-        instr1_rect = instr1.get_rect(center=(self.width // 2, self.height - 60))
-        instr2_rect = instr2.get_rect(center=(self.width // 2, self.height - 30))
-        
-        self.screen.blit(instr1, instr1_rect)
-        self.screen.blit(instr2, instr2_rect)
+        self.screen.blit(self.surf_instr1, self.rect_instr1)
+        self.screen.blit(self.surf_instr2, self.rect_instr2)
         
         pygame.display.flip()
     
@@ -420,10 +635,22 @@ class ConfigScreen:
         Returns:
             Tupla (num_vehicles, num_points, num_generations) ou None se cancelado
         """
+        event = None
         while self.running:
-            self.handle_events()
-            self.draw()
-            self.clock.tick(60)
+            self.handle_events(event)
+            if self._dirty:
+                self.draw()
+                self._dirty = False
+            
+            if self.dragging_points_slider or self.dragging_gens_slider:
+                # Arrastando: polling a 60 FPS para o slider ficar fluido
+                event = None
+                self.clock.tick(60)
+            else:
+                # Parado: bloqueia até chegar um evento (no máximo 100 ms)
+                event = pygame.event.wait(100)
+                if event.type == pygame.NOEVENT:
+                    event = None
         
         pygame.quit()
         
@@ -432,7 +659,190 @@ class ConfigScreen:
         return None
 
 
-def run_simulation(num_vehicles: int, num_points: int, num_generations: int):
+def _llm_point_columns(points: list) -> Tuple[np.ndarray, ...]:
+    """
+    Colunas dos pontos (SoA) na ordem de RoutePoints.
+    
+    Args:
+        points: Pontos de entrega
+        
+    Returns:
+        Tupla (nomes, endereços, prioridades, pesos, volumes)
+    """
+    num_points = len(points)
+    return (
+        np.array([p.name for p in points], dtype=object),
+        np.array([getattr(p, 'address', 'N/A') for p in points], dtype=object),
+        np.array([p.priority.name for p in points], dtype=object),
+        np.fromiter((p.weight_kg for p in points), dtype=np.float64, count=num_points),
+        np.fromiter((p.volume_m3 for p in points), dtype=np.float64, count=num_points),
+    )
+
+
+def _run_llm_phase(details: Dict, vehicles: list, points: list, best_solution,
+                   stats: Dict, num_vehicles: int, num_points: int, num_generations: int,
+                   instruction_gen: Optional[InstructionGenerator] = None,
+                   report_gen: Optional[ReportGenerator] = None) -> bool:
+    """
+    Gera as instruções dos motoristas e o relatório de eficiência (LLM).
+    
+    Todas as chamadas saem numa única rodada assíncrona: o modelo é
+    carregado uma vez e as requisições são atendidas juntas. Roda numa
+    thread à parte enquanto a janela final do Pygame segue interativa.
+    
+    Args:
+        details: Detalhes da melhor solução (get_solution_details)
+        vehicles: Veículos da simulação
+        points: Pontos de entrega
+        best_solution: Melhor cromossomo do AG
+        stats: Estatísticas do AG
+        num_vehicles: Número de veículos
+        num_points: Número de pontos de entrega
+        num_generations: Número de gerações
+        instruction_gen: Gerador de instruções já criado (opcional)
+        report_gen: Gerador de relatórios já criado (opcional)
+        
+    Returns:
+        True se instruções e relatório foram salvos sem erros
+    """
+    print("\n" + "="*60)
+    print("GERANDO INSTRUÇÕES PARA MOTORISTAS E RELATÓRIO DE EFICIÊNCIA (LLM)...")
+    print("="*60)
+    
+    llm_ok = False
+    try:
+        # Inicializar geradores (Ollama local), se não vieram prontos
+        if instruction_gen is None:
+            instruction_gen = InstructionGenerator(provider="ollama", model=LLM_MODEL)
+        if report_gen is None:
+            report_gen = ReportGenerator(provider="ollama", model=LLM_MODEL)
+        
+        # Montar os dados de cada veículo antes de chamar a LLM
+        # (rotas da melhor solução lidas uma vez, não a cada veículo)
+        routes = best_solution.get_routes()
+        
+        # Colunas dos pontos (SoA), montadas uma vez: cada rota só indexa
+        num_all_points = len(points)
+        point_columns = _llm_point_columns(points)
+        
+        instruction_jobs = []
+        for i, route_info in enumerate(details['routes']):
+            print(f"\n📝 Gerando instruções para: {route_info['vehicle_name']}")
+            
+            # Preparar dados do veículo
+            vehicle_data = {
+                'name': route_info['vehicle_name'],
+                'capacity_kg': route_info['capacity_kg'],
+                'autonomy_km': route_info.get('autonomy_km', 'N/A'),
+                'vehicle_type': vehicles[i].vehicle_type if i < len(vehicles) else 'Van',
+                'is_refrigerated': vehicles[i].is_refrigerated if i < len(vehicles) else False
+            }
+            
+            # Preparar dados dos pontos da rota (na ordem de visita)
+            route_idx = np.asarray(routes[i], dtype=np.intp)
+            route_idx = route_idx[route_idx < num_all_points]
+            route_points_data = RoutePoints(*(column[route_idx].tolist() for column in point_columns))
+            
+            # Arquivo de saída: a resposta é gravada em stream, direto no disco
+            filename = f"instrucoes_{route_info['slug']}_{num_vehicles}v_{num_points}p.txt"
+            out_path = instruction_gen.instructions_path(filename)
+            
+            instruction_jobs.append((route_info, vehicle_data, route_points_data, out_path))
+        
+        # Preparar métricas do relatório (totais já agregados com numpy em
+        # get_detailed_metrics, sem somar de novo rota a rota)
+        metrics_data = {
+            'total_distance': round(float(details['total_distance_km']), 2),
+            'total_vehicles': len(vehicles),
+            'total_deliveries': details['total_deliveries'],
+            'violations': 0  # Podemos melhorar isso depois
+        }
+        
+        # Uma única janela de contexto para a fase inteira: o Ollama recarrega
+        # o modelo quando num_ctx muda. Vale a maior entre os prompts, nunca
+        # menor que a do aquecimento (modelo já carregado com ela)
+        num_ctx = max(
+            instruction_gen.num_ctx or 0,
+            report_gen.context_size(metrics_data, stats, details['routes']),
+            *(
+                instruction_gen.context_size(vehicle_data, route_points_data,
+                                             route_info['distance_km'],
+                                             route_info['distance_km'] / 40.0)
+                for route_info, vehicle_data, route_points_data, _ in instruction_jobs
+            )
+        )
+        instruction_gen.num_ctx = report_gen.num_ctx = num_ctx
+        
+        # Instruções de todos os veículos + relatório em paralelo (as
+        # chamadas à LLM são independentes; o servidor Ollama atende até
+        # OLLAMA_NUM_PARALLEL ao mesmo tempo)
+        async def run_llm_phase():
+            instruction_tasks = [
+                instruction_gen.agenerate_instructions(
+                    vehicle=vehicle_data,
+                    route_points=route_points_data,
+                    total_distance=route_info['distance_km'],
+                    estimated_time=route_info['distance_km'] / 40.0,  # ~40 km/h
+                    out_path=out_path
+                )
+                for route_info, vehicle_data, route_points_data, out_path in instruction_jobs
+            ]
+            report_task = report_gen.agenerate_report(
+                metrics=metrics_data,
+                ga_stats=stats,
+                route_details=details['routes'],
+                out_path=report_file
+            )
+            return await asyncio.gather(*instruction_tasks, report_task,
+                                        return_exceptions=True)
+        
+        report_file = report_gen.report_path(
+            f"relatorio_{num_vehicles}v_{num_points}p_{num_generations}g"
+        )
+        *instruction_paths, report_path = asyncio.run(run_llm_phase())
+        
+        # Detalhes da solução em JSON, ao lado do relatório em Markdown
+        report_gen.save_report_json(details, report_file=report_file)
+        
+        all_ok = True
+        for (route_info, _, _, _), instruction_path in zip(instruction_jobs, instruction_paths):
+            if isinstance(instruction_path, Exception):
+                print(f"\n❌ ERRO ao gerar instruções para {route_info['vehicle_name']}: {instruction_path}")
+                all_ok = False
+                continue
+            
+            instruction_gen.print_saved(instruction_path)
+        
+        if all_ok:
+            print(f"\n✅ Instruções geradas com sucesso para todos os veículos!")
+        
+        if isinstance(report_path, Exception):
+            print(f"\n❌ ERRO ao gerar relatório: {report_path}")
+        else:
+            report_gen.print_saved(report_path)
+            
+            print(f"\n✅ Relatório gerado com sucesso!")
+        
+        llm_ok = all_ok and not isinstance(report_path, Exception)
+        
+    except ImportError as e:
+        print(f"\n⚠️ LLM não disponível: {e}")
+        print("   Para usar LLM, instale o Ollama: https://ollama.ai/download/windows")
+        print("   E execute: pip install ollama")
+        print("   Consulte: COMECE_AQUI_LLM.txt")
+    
+    except Exception as e:
+        print(f"\n❌ ERRO ao gerar instruções/relatório: {e}")
+        print("   A simulacao continuara normalmente.")
+        print("   Verifique se o Ollama está rodando: ollama serve")
+    
+    print("="*60)
+    return llm_ok
+
+
+def run_simulation(num_vehicles: int, num_points: int, num_generations: int,
+                   instruction_gen: Optional[InstructionGenerator] = None,
+                   report_gen: Optional[ReportGenerator] = None):
     """
     Executa a simulação com os parâmetros escolhidos.
     
@@ -440,6 +850,9 @@ def run_simulation(num_vehicles: int, num_points: int, num_generations: int):
         num_vehicles: Número de veículos
         num_points: Número de pontos de entrega
         num_generations: Número de gerações
+        instruction_gen: Gerador de instruções já criado (opcional; reaproveita
+                        o cliente e pré-carrega o modelo durante o AG)
+        report_gen: Gerador de relatórios já criado (opcional)
     """
     print("\n" + "="*60)
     print("INICIANDO SIMULACAO...")
@@ -462,26 +875,33 @@ def run_simulation(num_vehicles: int, num_points: int, num_generations: int):
         sys.exit(1)
     
     # Carregar pontos de entrega (limitado ao número escolhido)
-    with open(delivery_points_file, 'r', encoding='utf-8') as f:
-        points_data = json.load(f)
-    
-    points_data = points_data[:num_points]
-    points = [DeliveryPoint.from_dict(p) for p in points_data]
+    points_data = load_json_prefix(delivery_points_file, num_points)
+    # from_dict altera o dict recebido; copiar para não sujar o cache de JSON
+    points = [DeliveryPoint.from_dict(dict(p)) for p in points_data]
     print(f"Carregados {len(points)} pontos de entrega")
     
-    # Carregar veículos (limitado ao número escolhido)
-    with open(vehicles_file, 'r', encoding='utf-8') as f:
-        vehicles_data = json.load(f)
+    # Coordenadas e prioridades extraídas uma vez (SoA), não a cada geração
+    point_coords = np.array([(p.latitude, p.longitude) for p in points], dtype=np.float64).reshape(-1, 2)
+    priorities = tuple(p.priority.value for p in points)
     
-    vehicles_data = vehicles_data[:num_vehicles]
+    # Carregar veículos (limitado ao número escolhido)
+    vehicles_data = load_json_prefix(vehicles_file, num_vehicles)
     vehicles = [Vehicle.from_dict(v) for v in vehicles_data]
-    print(f"Carregados {len(vehicles)} veiculos:")
-    print()
+    # Resumo montado em memória e escrito de uma vez
+    lines = [f"Carregados {len(vehicles)} veiculos:", ""]
     for i, vehicle in enumerate(vehicles):
-        print(f"  Veiculo {i+1}: {vehicle.name}")
-        print(f"    Capacidade: {vehicle.capacity_kg} kg | {vehicle.capacity_volume_m3} m³")
-        print(f"    Autonomia: {vehicle.autonomy_km} km")
-        print()
+        lines.append(f"  Veiculo {i+1}: {vehicle.name}")
+        lines.append(f"    Capacidade: {vehicle.capacity_kg} kg | {vehicle.capacity_volume_m3} m³")
+        lines.append(f"    Autonomia: {vehicle.autonomy_km} km")
+        lines.append("")
+    sys.stdout.write("\n".join(lines) + "\n")
+    
+    # Pré-carregar o modelo no Ollama enquanto o AG roda, já com a janela de
+    # contexto da fase de LLM. Limite usado: todos os pontos numa única rota
+    if instruction_gen is not None and vehicles:
+        all_points = RoutePoints(*(column.tolist() for column in _llm_point_columns(points)))
+        warm_ctx = instruction_gen.context_size(vehicles[0].to_dict(), all_points, 0.0, 0.0)
+        threading.Thread(target=instruction_gen.warm_up, args=(warm_ctx,), daemon=True).start()
     
     # Depósito
     depot = (-23.5505, -46.6333)
@@ -540,39 +960,51 @@ def run_simulation(num_vehicles: int, num_points: int, num_generations: int):
     # Variáveis para armazenar estatísticas e detalhes
     current_stats = {}
     current_details = {}
+    # Rotas/detalhes só mudam quando o AG troca o melhor cromossomo;
+    # enquanto ele for o mesmo objeto, o payload anterior é reaproveitado
+    current_routes = []
+    last_best = None
+    # Snapshot completo limitado ao fps do visualizador; o AG segue a toda velocidade
+    redraw_interval = 1.0 / viz.fps
+    next_redraw = 0.0
     
-    # Callback para atualizar visualização
+    # Callback para atualizar visualização (roda na thread do AG: só publica
+    # o snapshot com set_state; quem desenha é a thread principal)
     def update_visualization(ga_instance, generation, best_chromosome, avg_fitness):
         """Callback chamado a cada geração."""
-        nonlocal current_stats, current_details
+        nonlocal current_stats, current_details, current_routes, last_best, next_redraw
+        
+        now = time.monotonic()
+        is_last = generation >= ga_instance.config['num_generations']
+        if now < next_redraw and generation != 0 and not is_last:
+            # Frame pulado: só registra a geração no histórico de convergência
+            viz.set_state(point_coords, priorities, current_routes, depot, generation,
+                          best_chromosome.fitness, current_stats, current_details)
+            return True
+        next_redraw = now + redraw_interval
         
         # Obter estatísticas do AG
         current_stats = ga_instance.get_statistics()
         
-        # Obter detalhes da melhor solução
-        current_details = ga_instance.get_best_solution_details()
-        
-        # Extrair coordenadas dos pontos
-        point_coords = [p.get_coordinates() for p in points]
-        priorities = [p.priority.value for p in points]
-        
-        # Extrair rotas do melhor cromossomo
-        routes = best_chromosome.get_routes()
+        if best_chromosome is not last_best:
+            # Obter detalhes da melhor solução
+            current_details = ga_instance.get_best_solution_details()
+            
+            # Extrair rotas do melhor cromossomo
+            current_routes = best_chromosome.get_routes()
+            last_best = best_chromosome
         
-        # Atualizar visualização com estatísticas e detalhes
-        if not viz.update(
+        # Publicar snapshot com estatísticas e detalhes
+        return viz.set_state(
             delivery_points_coords=point_coords,
             delivery_points_priorities=priorities,
-            routes=routes,
+            routes=current_routes,
             depot_coord=depot,
             generation=generation,
             best_fitness=best_chromosome.fitness,
             ag_stats=current_stats,
             route_details=current_details
-        ):
-            return False
-        
-        return True
+        )
     
     print("\nControles:")
     print("  ESPACO - Pausar/Continuar")
@@ -584,10 +1016,30 @@ def run_simulation(num_vehicles: int, num_points: int, num_generations: int):
     print("INICIANDO EVOLUCAO...")
     print("="*60 + "\n")
     
-    # Executar AG com visualização
+    # Executar AG com visualização: o AG evolui numa thread própria enquanto a
+    # thread principal trata eventos e redesenha o último snapshot a fps fixo
     simulation_context = None
     try:
-        best_solution = ga.run(generation_callback=update_visualization)
+        ga_outcome = {}
+        ga_done = threading.Event()
+        
+        def evolve():
+            try:
+                ga_outcome['best'] = ga.run(generation_callback=update_visualization)
+            except Exception as e:
+                ga_outcome['error'] = e  # Repassado para a thread principal
+            finally:
+                ga_done.set()
+        
+        ga_thread = threading.Thread(target=evolve, name='ga-evolution', daemon=True)
+        ga_thread.start()
+        viz.run_event_loop(stop_event=ga_done)
+        
+        # Janela fechada antes do fim: o AG termina sem visualização
+        ga_thread.join()
+        if 'error' in ga_outcome:
+            raise ga_outcome['error']
+        best_solution = ga_outcome['best']
         
         # Mostrar solução final
         print("\n" + "="*60)
@@ -597,24 +1049,26 @@ def run_simulation(num_vehicles: int, num_points: int, num_generations: int):
         details = ga.get_best_solution_details()
         stats = ga.get_statistics()
         
-        print(f"\nFitness: {details['fitness']:.2f}")
-        print(f"Distancia Total: {details['total_distance_km']:.2f} km")
-        print(f"Veiculos Usados: {len(details['routes'])}")  # Corrigido: calcular a partir das rotas
-        print(f"Total de Entregas: {details['total_deliveries']}")
-        
-        print(f"\nEstatisticas do AG:")
-        print(f"  Crossovers: {stats['total_crossovers']}")
-        print(f"  Mutacoes: {stats['total_mutations']}")
-        print(f"  Tipo de Selecao: {stats['selection_type']}")
-        print(f"  Tipo de Crossover: {stats['crossover_type']}")
+        lines = [
+            f"\nFitness: {details['fitness']:.2f}",
+            f"Distancia Total: {details['total_distance_km']:.2f} km",
+            f"Veiculos Usados: {len(details['routes'])}",  # Corrigido: calcular a partir das rotas
+            f"Total de Entregas: {details['total_deliveries']}",
+            f"\nEstatisticas do AG:",
+            f"  Crossovers: {stats['total_crossovers']}",
+            f"  Mutacoes: {stats['total_mutations']}",
+            f"  Tipo de Selecao: {stats['selection_type']}",
+            f"  Tipo de Crossover: {stats['crossover_type']}",
+        ]
         
         if stats['mutation_types']:
-            print(f"\n  Tipos de Mutacao:")
+            lines.append(f"\n  Tipos de Mutacao:")
             for mut_type, count in stats['mutation_types'].items():
-                print(f"    - {mut_type}: {count}")
+                lines.append(f"    - {mut_type}: {count}")
         
-        print(f"\nRotas:")
-        print(f"  {best_solution.to_string()}")
+        lines.append(f"\nRotas:")
+        lines.append(f"  {best_solution.to_string()}")
+        sys.stdout.write("\n".join(lines) + "\n")
 
         # Salvar contexto para chat conversacional em tempo real
         try:
@@ -624,15 +1078,8 @@ def run_simulation(num_vehicles: int, num_points: int, num_generations: int):
 
             simulation_context = {
                 "routes": details["routes"],
-                "vehicles": [
-                    {
-                        "name": v.name,
-                        "capacity_kg": v.capacity_kg,
-                        "capacity_volume_m3": v.capacity_volume_m3,
-                        "autonomy_km": v.autonomy_km,
-                    }
-                    for v in vehicles
-                ],
+                "vehicles": [dict(zip(_VEHICLE_FIELDS, values))
+                             for values in map(_vehicle_fields, vehicles)],
                 "delivery_points": [
                     {
                         "name": p.name,
@@ -659,37 +1106,44 @@ def run_simulation(num_vehicles: int, num_points: int, num_generations: int):
                 },
             }
 
-            with open(session_file, "w", encoding="utf-8") as f:
-                json.dump(simulation_context, f, ensure_ascii=False, indent=2)
+            if orjson is not None:
+                session_file.write_bytes(orjson.dumps(
+                    simulation_context,
+                    option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+                ))
+            else:
+                with open(session_file, "w", encoding="utf-8") as f:
+                    json.dump(simulation_context, f, ensure_ascii=False, indent=2)
             print(f"\nContexto do chat salvo em: {session_file}")
         except Exception as context_error:
             print(f"\nAviso: nao foi possivel salvar contexto do chat: {context_error}")
         
-        print(f"\nDetalhes por Veiculo:")
+        lines = [f"\nDetalhes por Veiculo:"]
         violations_found = False
         for route_info in details['routes']:
-            print(f"\n  {route_info['vehicle_name']}:")
-            print(f"    Entregas: {route_info['num_deliveries']}")
-            print(f"    Distancia: {route_info['distance_km']:.2f} km (Autonomia: {route_info.get('autonomy_km', 'N/A')} km)")
+            lines.append(f"\n  {route_info['vehicle_name']}:")
+            lines.append(f"    Entregas: {route_info['num_deliveries']}")
+            lines.append(f"    Distancia: {route_info['distance_km']:.2f} km (Autonomia: {route_info.get('autonomy_km', 'N/A')} km)")
             
             # VERIFICAR VIOLAÇÃO DE AUTONOMIA
             autonomy_km = route_info.get('autonomy_km', float('inf'))
             if route_info['distance_km'] > autonomy_km:
-                print(f"    ⚠️  VIOLACAO DE AUTONOMIA! Excesso: {route_info['distance_km'] - autonomy_km:.2f} km")
+                lines.append(f"    ⚠️  VIOLACAO DE AUTONOMIA! Excesso: {route_info['distance_km'] - autonomy_km:.2f} km")
                 violations_found = True
             
-            print(f"    Carga: {route_info['load_kg']:.1f} / {route_info['capacity_kg']:.1f} kg "
-                  f"({route_info['capacity_usage_%']:.1f}%)")
+            lines.append(f"    Carga: {route_info['load_kg']:.1f} / {route_info['capacity_kg']:.1f} kg "
+                         f"({route_info['capacity_usage_%']:.1f}%)")
             
             # VERIFICAR VIOLAÇÃO DE CAPACIDADE
             if route_info['capacity_usage_%'] > 100:
-                print(f"    ⚠️  VIOLACAO DE CAPACIDADE! Excesso: {route_info['capacity_usage_%'] - 100:.1f}%")
+                lines.append(f"    ⚠️  VIOLACAO DE CAPACIDADE! Excesso: {route_info['capacity_usage_%'] - 100:.1f}%")
                 violations_found = True
             
-            print(f"    Rota: {' → '.join(route_info['points'])}")
+            lines.append(f"    Rota: {' → '.join(route_info['points'])}")
         
         if violations_found:
-            print(f"\n⚠️⚠️⚠️  ATENCAO: Solucao contém VIOLACOES de restricoes! ⚠️⚠️⚠️")
+            lines.append(f"\n⚠️⚠️⚠️  ATENCAO: Solucao contém VIOLACOES de restricoes! ⚠️⚠️⚠️")
+        sys.stdout.write("\n".join(lines) + "\n")
         
         print("\n" + "="*60)
         print(f"LOGS SALVOS EM: logs/genetic/")
@@ -701,29 +1155,18 @@ def run_simulation(num_vehicles: int, num_points: int, num_generations: int):
         print("="*60)
         
         try:
-            # Preparar dados para o Folium
-            folium_points = []
-            for point in points:
-                folium_points.append({
-                    'name': point.name,
-                    'latitude': point.latitude,
-                    'longitude': point.longitude,
-                    'priority': point.priority.name,  # CRITICO, ALTO, MEDIO, BAIXO
-                    'weight': point.weight_kg,
-                    'volume': point.volume_m3,
-                    'service_time_min': point.service_time_minutes,  # Corrigido: service_time_minutes
-                    'description': getattr(point, 'description', point.item_description)  # Fallback para item_description
-                })
+            # Preparar dados para o Folium (prioridade: CRITICO, ALTO, MEDIO, BAIXO)
+            folium_points = [
+                {'name': name, 'latitude': lat, 'longitude': lon, 'priority': priority.name,
+                 'weight': weight, 'volume': volume, 'service_time_min': service_time,
+                 'description': description}
+                for (name, lat, lon, priority, weight, volume, service_time, description)
+                in map(_point_fields, points)
+            ]
             
             # Preparar dados dos veículos
-            folium_vehicles = []
-            for vehicle in vehicles:
-                folium_vehicles.append({
-                    'name': vehicle.name,
-                    'capacity_kg': vehicle.capacity_kg,
-                    'capacity_volume_m3': vehicle.capacity_volume_m3,
-                    'autonomy_km': vehicle.autonomy_km
-                })
+            folium_vehicles = [dict(zip(_VEHICLE_FIELDS, values))
+                               for values in map(_vehicle_fields, vehicles)]
             
             # Obter rotas do melhor cromossomo
             folium_routes = best_solution.get_routes()
@@ -751,111 +1194,16 @@ def run_simulation(num_vehicles: int, num_points: int, num_generations: int):
         
         print("="*60)
         
-        # GERAR INSTRUÇÕES PARA MOTORISTAS (LLM)
-        print("\n" + "="*60)
-        print("GERANDO INSTRUÇÕES PARA MOTORISTAS (LLM)...")
-        print("="*60)
-        
-        try:
-            # Inicializar gerador de instruções (Ollama local)
-            instruction_gen = InstructionGenerator(provider="ollama", model="llama2")
-            
-            # Gerar instruções para cada veículo
-            for i, route_info in enumerate(details['routes']):
-                print(f"\n📝 Gerando instruções para: {route_info['vehicle_name']}")
-                
-                # Preparar dados do veículo
-                vehicle_data = {
-                    'name': route_info['vehicle_name'],
-                    'capacity_kg': route_info['capacity_kg'],
-                    'autonomy_km': route_info.get('autonomy_km', 'N/A'),
-                    'vehicle_type': vehicles[i].vehicle_type if i < len(vehicles) else 'Van',
-                    'is_refrigerated': vehicles[i].is_refrigerated if i < len(vehicles) else False
-                }
-                
-                # Preparar dados dos pontos da rota
-                route_points_data = []
-                route = best_solution.get_routes()[i]
-                for point_idx in route:
-                    if point_idx < len(points):
-                        p = points[point_idx]
-                        route_points_data.append({
-                            'name': p.name,
-                            'address': getattr(p, 'address', 'N/A'),
-                            'priority': p.priority.name,
-                            'weight': p.weight_kg,
-                            'volume': p.volume_m3
-                        })
-                
-                # Gerar instruções
-                instructions = instruction_gen.generate_instructions(
-                    vehicle=vehicle_data,
-                    route_points=route_points_data,
-                    total_distance=route_info['distance_km'],
-                    estimated_time=route_info['distance_km'] / 40.0  # ~40 km/h
-                )
-                
-                # Salvar instruções
-                filename = f"instrucoes_{route_info['vehicle_name'].replace(' ', '_')}_{num_vehicles}v_{num_points}p.txt"
-                instruction_gen.save_instructions(instructions, filename)
-            
-            print(f"\n✅ Instruções geradas com sucesso para todos os veículos!")
-            
-        except ImportError as e:
-            print(f"\n⚠️ LLM não disponível: {e}")
-            print("   Para usar LLM, instale o Ollama: https://ollama.ai/download/windows")
-            print("   E execute: pip install ollama")
-            print("   Consulte: COMECE_AQUI_LLM.txt")
-        
-        except Exception as e:
-            print(f"\n❌ ERRO ao gerar instruções: {e}")
-            print("   A simulacao continuara normalmente.")
-            print("   Verifique se o Ollama está rodando: ollama serve")
-        
-        print("="*60)
-        
-        # GERAR RELATÓRIO DE EFICIÊNCIA (LLM)
-        print("\n" + "="*60)
-        print("GERANDO RELATÓRIO DE EFICIÊNCIA (LLM)...")
-        print("="*60)
-        
-        try:
-            # Inicializar gerador de relatórios (Ollama local)
-            report_gen = ReportGenerator(provider="ollama", model="llama2")
-            
-            # Preparar métricas
-            metrics_data = {
-                'total_distance': details.get('total_distance', 0),
-                'total_vehicles': len(vehicles),
-                'total_deliveries': sum(r['num_deliveries'] for r in details['routes']),
-                'violations': 0  # Podemos melhorar isso depois
-            }
-            
-            # Gerar relatório
-            report = report_gen.generate_report(
-                metrics=metrics_data,
-                ga_stats=stats,
-                route_details=details['routes']
-            )
-            
-            # Salvar relatório
-            filename = f"relatorio_{num_vehicles}v_{num_points}p_{num_generations}g"
-            report_gen.save_report(report, prefix=filename)
-            
-            print(f"\n✅ Relatório gerado com sucesso!")
-            
-        except ImportError as e:
-            print(f"\n⚠️ LLM não disponível: {e}")
-            print("   Para usar LLM, instale o Ollama: https://ollama.ai/download/windows")
-            print("   E execute: pip install ollama")
-            print("   Consulte: COMECE_AQUI_LLM.txt")
-        
-        except Exception as e:
-            print(f"\n❌ ERRO ao gerar relatório: {e}")
-            print("   A simulacao continuara normalmente.")
-            print("   Verifique se o Ollama está rodando: ollama serve")
-        
-        print("="*60)
+        # GERAR INSTRUÇÕES PARA MOTORISTAS + RELATÓRIO DE EFICIÊNCIA (LLM)
+        # numa thread à parte: a janela final já fica interativa enquanto a
+        # LLM responde (a chamada é de I/O, quase não disputa o GIL)
+        llm_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm")
+        llm_future = llm_executor.submit(
+            _run_llm_phase, details, vehicles, points, best_solution, stats,
+            num_vehicles, num_points, num_generations, instruction_gen, report_gen
+        )
+        llm_executor.shutdown(wait=False)
+        viz.set_llm_status("running")
         
         # Manter visualização aberta INDEFINIDAMENTE
         print("\n" + "="*60)
@@ -870,28 +1218,40 @@ def run_simulation(num_vehicles: int, num_points: int, num_generations: int):
         print("\nPressione Q na janela Pygame para encerrar.")
         print("="*60)
         
+        # A melhor solução não muda mais após o AG: rotas, geração e fitness
+        # são lidas uma vez (point_coords/priorities já vêm pré-calculados)
+        final_routes = best_solution.get_routes()
+        final_generation = ga.current_generation
+        final_fitness = best_solution.fitness
+        
+        # Primeiro frame com a melhor solução; daqui em diante a cena é
+        # estática e só é redesenhada quando chega um evento ou a LLM muda
+        # de estado
+        viz.set_state(point_coords, priorities, final_routes, depot,
+                      final_generation, final_fitness, stats, details)
+        viz.refresh_convergence_plot()
+        viz.redraw_from_state()
+        
         # Loop INFINITO para manter janela aberta
         # A janela só fecha quando o usuário pressionar Q
         while viz.running:
-            viz.handle_events()
+            # Bloqueia até chegar um evento (no máximo 100 ms, para acompanhar a LLM)
+            event = pygame.event.wait(100)
+            viz.handle_events(event if event.type != pygame.NOEVENT else None)
             
-            # Continuar exibindo a melhor solução
-            point_coords = [p.get_coordinates() for p in points]
-            priorities = [p.priority.value for p in points]
-            routes = best_solution.get_routes()
+            # LLM terminou: troca o indicador da janela
+            if llm_future is not None and llm_future.done():
+                viz.set_llm_status("done" if llm_future.result() else "error")
+                llm_future = None
             
-            viz.update(
-                delivery_points_coords=point_coords,
-                delivery_points_priorities=priorities,
-                routes=routes,
-                depot_coord=depot,
-                generation=ga.current_generation,
-                best_fitness=best_solution.fitness,
-                ag_stats=stats,
-                route_details=details
-            )
-            
-            viz.clock.tick(10)  # 10 FPS para economizar recursos
+            # Só desenha se algo mudou (hover, filtro, resize, LLM, gráfico)
+            if viz.running:
+                viz.redraw_from_state()
+        
+        # Janela fechada antes da LLM terminar: espera os arquivos serem salvos
+        if llm_future is not None:
+            print("\nAguardando a LLM concluir instruções e relatório...")
+            llm_future.result()
         return simulation_context
     
     except KeyboardInterrupt:
@@ -901,7 +1261,6 @@ def run_simulation(num_vehicles: int, num_points: int, num_generations: int):
     
     except Exception as e:
         print(f"\n\nERRO: {e}")
-        import traceback
         traceback.print_exc()
         viz.close()
         return simulation_context
@@ -916,8 +1275,19 @@ if __name__ == '__main__':
     
     if result:
         num_vehicles, num_points, num_generations = result
+        
+        # Geradores únicos para toda a execução; run_simulation carrega o
+        # modelo no Ollama em segundo plano enquanto o AG roda
+        try:
+            instruction_gen = InstructionGenerator(provider="ollama", model=LLM_MODEL)
+            report_gen = ReportGenerator(provider="ollama", model=LLM_MODEL)
+        except ImportError:
+            # run_simulation tenta de novo e mostra como instalar o Ollama
+            instruction_gen = report_gen = None
+        
         # Executar simulação com os parâmetros escolhidos
-        simulation_context = run_simulation(num_vehicles, num_points, num_generations)
+        simulation_context = run_simulation(num_vehicles, num_points, num_generations,
+                                            instruction_gen, report_gen)
         
         # Após fechar Pygame, oferecer sessão de Q&A
         print("\n" + "="*60)
@@ -937,7 +1307,7 @@ if __name__ == '__main__':
                     from src.llm_integration import QASystem, interactive_qa_session
                     
                     # Configurar sistema Q&A
-                    qa = QASystem(provider="ollama", model="llama2")
+                    qa = QASystem(provider="ollama", model=LLM_MODEL)
                     if simulation_context:
                         qa.load_context(
                             routes=simulation_context["routes"],
@@ -4,17 +4,24 @@ Função Fitness Multi-Critério para VRP.
 Calcula o fitness considerando múltiplos objetivos e restrições.
 """
 
+from functools import lru_cache
 from typing import List, Dict, Tuple
-import math
+import numpy as np
 from ..models.delivery_point import DeliveryPoint
 from ..models.vehicle import Vehicle
-from ..utils.distance_calculator import haversine_distance
+from ..utils.distance_calculator import (
+    IndexedDistanceMatrix,
+    calculate_route_distance_idx,
+    pack_routes,
+    route_metrics
+)
 from .chromosome import Chromosome
 
 
+@lru_cache(maxsize=None)
 def get_point_label(index: int) -> str:
     """
-    Gera label para ponto de entrega baseado no índice.
+    Gera label para ponto de entrega baseado no índice (memoizado).
     
     0-25: A-Z
     26-51: A1-Z1
@@ -57,6 +64,12 @@ class FitnessCalculator:
         self.vehicles = vehicles
         self.depot_coord = depot_coord
         
+        # Nome de cada veículo e seu slug (para nomes de arquivo), calculados
+        # uma vez em vez de a cada get_detailed_metrics
+        self._vehicle_names = [v.name if hasattr(v, 'name') else f"Veículo {i+1}"
+                               for i, v in enumerate(vehicles)]
+        self._vehicle_slugs = [name.replace(' ', '_') for name in self._vehicle_names]
+        
         # Pesos padrão
         self.weights = weights or {
             'distance': 1.0,          # Minimizar distância total
@@ -67,28 +80,21 @@ class FitnessCalculator:
             'num_vehicles': 3.0       # Penalidade por usar mais veículos
         }
         
-        # Cache de distâncias
-        self._distance_cache = {}
+        # Matriz de distâncias (índice 0 = depósito, ponto i = índice i+1)
+        self.distance_matrix: IndexedDistanceMatrix = None
         self._precompute_distances()
     
     def _precompute_distances(self):
         """Pré-calcula matriz de distâncias."""
-        n = len(self.delivery_points)
-        
-        # Distância do depósito para cada ponto
-        for i in range(n):
-            point_coord = self.delivery_points[i].get_coordinates()
-            key = ('depot', i)
-            self._distance_cache[key] = haversine_distance(self.depot_coord, point_coord)
+        coords = [p.get_coordinates() for p in self.delivery_points]
+        self.distance_matrix = IndexedDistanceMatrix.from_coordinates(
+            coords, self.depot_coord, use_haversine=True
+        )
         
-        # Distância entre todos os pares de pontos
-        for i in range(n):
-            for j in range(i+1, n):
-                coord_i = self.delivery_points[i].get_coordinates()
-                coord_j = self.delivery_points[j].get_coordinates()
-                dist = haversine_distance(coord_i, coord_j)
-                self._distance_cache[(i, j)] = dist
-                self._distance_cache[(j, i)] = dist
+        # Arrays usados por route_metrics nas métricas detalhadas
+        self._coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        self._weights = np.array([p.weight_kg for p in self.delivery_points], dtype=np.float64)
+        self._depot = np.asarray(self.depot_coord, dtype=np.float64)
     
     def get_distance(self, from_idx: int, to_idx: int) -> float:
         """
@@ -101,14 +107,8 @@ class FitnessCalculator:
         Returns:
             Distância em km
         """
-        if from_idx == -1:
-            key = ('depot', to_idx)
-        elif to_idx == -1:
-            key = ('depot', from_idx)
-        else:
-            key = (from_idx, to_idx) if from_idx < to_idx else (to_idx, from_idx)
-        
-        return self._distance_cache.get(key, 0)
+        # -1 (depósito) vira 0; ponto i vira i+1
+        return float(self.distance_matrix.get(from_idx + 1, to_idx + 1))
     
     def calculate_fitness(self, chromosome: Chromosome) -> float:
         """
@@ -142,11 +142,9 @@ class FitnessCalculator:
             vehicle_idx = route_idx % len(self.vehicles)
             vehicle = self.vehicles[vehicle_idx]
             
-            # Calcular distância da rota
-            route_distance = self.get_distance(-1, route[0])  # Depósito -> primeiro ponto
-            for i in range(len(route) - 1):
-                route_distance += self.get_distance(route[i], route[i+1])
-            route_distance += self.get_distance(route[-1], -1)  # Último ponto -> depósito
+            # Calcular distância da rota (depósito -> pontos -> depósito)
+            idx_arr = np.asarray(route, dtype=np.int32) + 1
+            route_distance = calculate_route_distance_idx(idx_arr, self.distance_matrix.m)
             
             route_distances.append(route_distance)
             total_distance += route_distance
@@ -231,6 +229,10 @@ class FitnessCalculator:
         comp = chromosome.fitness_components
         routes = chromosome.get_routes()
         
+        # Rotas empacotadas uma vez: os tamanhos servem às contagens abaixo
+        # e os índices ao cálculo de distância/carga
+        route_idx, route_lens = pack_routes(routes)
+        
         metrics = {
             'fitness': chromosome.fitness,
             'total_distance_km': comp['total_distance'],
@@ -242,13 +244,17 @@ class FitnessCalculator:
             'max_route_distance': max(comp['route_distances']) if comp['route_distances'] else 0,
             'min_route_distance': min(comp['route_distances']) if comp['route_distances'] else 0,
             'avg_vehicle_load': sum(comp['route_loads']) / len(comp['route_loads']) if comp['route_loads'] else 0,
-            'total_deliveries': sum(len(r) for r in routes),
+            'total_deliveries': int(route_lens.sum()),
             'routes': []
         }
         
+        # Distância e carga de todas as rotas em uma única chamada compilada
+        distances, loads = route_metrics(self._coords, self._weights,
+                                         route_idx, route_lens, self._depot)
+        
         # Detalhes de cada rota
         for i, route in enumerate(routes):
-            if not route:
+            if not route_lens[i]:
                 continue
             
             vehicle_idx = i % len(self.vehicles)
@@ -256,13 +262,14 @@ class FitnessCalculator:
             
             route_info = {
                 'vehicle_id': vehicle_idx + 1,
-                'vehicle_name': vehicle.name if hasattr(vehicle, 'name') else f"Veículo {vehicle_idx+1}",
-                'num_deliveries': len(route),
-                'distance_km': comp['route_distances'][i] if i < len(comp['route_distances']) else 0,
+                'vehicle_name': self._vehicle_names[vehicle_idx],
+                'slug': self._vehicle_slugs[vehicle_idx],
+                'num_deliveries': int(route_lens[i]),
+                'distance_km': float(distances[i]),
                 'autonomy_km': vehicle.autonomy_km,  # ADICIONADO: autonomia do veículo
-                'load_kg': comp['route_loads'][i] if i < len(comp['route_loads']) else 0,
+                'load_kg': float(loads[i]),
                 'capacity_kg': vehicle.capacity_kg,
-                'capacity_usage_%': (comp['route_loads'][i] / vehicle.capacity_kg * 100) if i < len(comp['route_loads']) else 0,
+                'capacity_usage_%': float(loads[i]) / vehicle.capacity_kg * 100,
                 'points': [get_point_label(p) for p in route]
             }
             metrics['routes'].append(route_info)
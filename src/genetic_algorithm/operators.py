@@ -4,15 +4,17 @@ Operadores Genéticos: Crossover, Mutação e Seleção.
 Implementa operadores especializados para VRP com múltiplos veículos.
 """
 
+from functools import lru_cache
 from typing import List, Tuple
 import random
 import copy
 from .chromosome import Chromosome
 
 
+@lru_cache(maxsize=None)
 def get_point_label(index: int) -> str:
     """
-    Gera label para ponto de entrega baseado no índice.
+    Gera label para ponto de entrega baseado no índice (memoizado).
     
     0-25: A-Z
     26-51: A1-Z1
@@ -0,0 +1,145 @@
+"""
+Recursos comuns aos geradores que chamam o Ollama (instruções e relatório).
+
+Clientes HTTP com pool de conexões, cache de respostas em disco e gravação
+das respostas em arquivo.
+"""
+import asyncio
+import hashlib
+import shutil
+from pathlib import Path
+from typing import Dict, Optional
+
+
+# Mantém o modelo carregado no Ollama entre as chamadas da execução
+OLLAMA_KEEP_ALIVE = "30m"
+
+# Buffer de escrita ao gravar a resposta em streaming (evita um write por token)
+STREAM_BUFFER = 1 << 16
+
+# Limite apenas para abrir a conexão; a leitura não tem limite, pois uma
+# resposta completa do llama2 em CPU pode levar vários minutos
+OLLAMA_CONNECT_TIMEOUT = 10.0
+
+
+def context_size(system_prompt: str, prompt: str, num_predict: int) -> int:
+    """
+    Janela de contexto (num_ctx) que comporta o prompt e a resposta.
+
+    O cache KV é alocado por slot paralelo (OLLAMA_NUM_PARALLEL): uma janela
+    justa permite mais slots na mesma memória. Como o Ollama recarrega o
+    modelo quando num_ctx muda, os geradores usam um único valor por fase
+    (o maior entre os prompts), e não um por chamada.
+
+    Args:
+        system_prompt: Prompt de sistema
+        prompt: Prompt do usuário
+        num_predict: Limite de tokens da resposta
+
+    Returns:
+        Tamanho em tokens, potência de 2 entre 1K e 8K
+    """
+    # ~3 caracteres por token
+    needed = (len(system_prompt) + len(prompt)) // 3 + num_predict
+    return min(8192, max(1024, 1 << (needed - 1).bit_length()))
+
+
+def ollama_client_kwargs() -> Dict:
+    """
+    Argumentos comuns de ollama.Client / ollama.AsyncClient.
+
+    Pool de conexões keep-alive, reaproveitado por todas as chamadas
+    (inclusive as paralelas). O host vem de OLLAMA_HOST, como na CLI
+    (padrão localhost:11434).
+    """
+    import httpx  # dependência do próprio pacote ollama
+    return {
+        'timeout': httpx.Timeout(None, connect=OLLAMA_CONNECT_TIMEOUT),
+        'limits': httpx.Limits(max_keepalive_connections=16, max_connections=32),
+    }
+
+
+class AsyncClientCache:
+    """ollama.AsyncClient reaproveitado (keep-alive) dentro do mesmo event loop."""
+
+    def __init__(self):
+        self._client = None
+        self._loop = None
+
+    def get(self):
+        """Retorna o AsyncClient do event loop atual (criado sob demanda)."""
+        import ollama
+
+        # O cliente httpx fica preso ao event loop em que foi criado
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = ollama.AsyncClient(**ollama_client_kwargs())
+            self._loop = loop
+        return self._client
+
+
+def cache_path(cache_dir: Optional[Path], provider: str, model: str, system_prompt: str,
+               prompt: str, filename: str) -> Optional[Path]:
+    """
+    Caminho da resposta em cache para o prompt (None se o cache está desativado).
+
+    A chave (blake2b) cobre provedor, modelo, prompt de sistema e prompt,
+    que juntos determinam a resposta da LLM.
+
+    Args:
+        cache_dir: Pasta do cache (None = desativado)
+        provider: Provedor da LLM
+        model: Nome do modelo
+        system_prompt: Prompt de sistema
+        prompt: Prompt do usuário
+        filename: Nome do arquivo, com {key} no lugar da chave
+
+    Returns:
+        Path do arquivo em cache, ou None
+    """
+    if cache_dir is None:
+        return None
+    key = hashlib.blake2b(
+        f"{provider}:{model}\0{system_prompt}\0{prompt}".encode('utf-8'),
+        digest_size=16
+    ).hexdigest()
+    return cache_dir / filename.format(key=key)
+
+
+def cache_store(cached: Optional[Path], out_path: Optional[Path] = None,
+                response: Optional[str] = None):
+    """Grava no cache a resposta da LLM (já salva em out_path ou em memória)."""
+    if cached is None or (out_path is None and not response):
+        return
+    cached.parent.mkdir(parents=True, exist_ok=True)
+    if out_path is not None:
+        shutil.copyfile(out_path, cached)
+    else:
+        cached.write_text(response, encoding='utf-8')
+
+
+def write_chunks(out_path: Path, chunks) -> None:
+    """
+    Grava os trechos em out_path (um único flush ao final).
+
+    Nas versões assíncronas roda via asyncio.to_thread, então as gravações
+    dos vários veículos/relatório acontecem em paralelo no pool de threads.
+    """
+    with open(out_path, 'w', encoding='utf-8', buffering=STREAM_BUFFER) as f:
+        for chunk in chunks:
+            f.write(chunk)
+        f.flush()
+
+
+async def awrite_stream(stream, out_path: Path) -> None:
+    """
+    Grava em out_path a resposta em stream do Ollama conforme os tokens chegam.
+
+    Args:
+        stream: Iterador assíncrono devolvido por AsyncClient.chat(stream=True)
+        out_path: Arquivo de saída
+    """
+    with open(out_path, 'w', encoding='utf-8', buffering=STREAM_BUFFER) as f:
+        async for chunk in stream:
+            f.write(chunk['message']['content'])
+        f.flush()
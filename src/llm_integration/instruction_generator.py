@@ -3,16 +3,73 @@ Gerador de Instruções para Motoristas usando LLM.
 
 Suporta Ollama (local, grátis) e OpenAI (nuvem, pago).
 """
+import asyncio
 import os
-from typing import List, Dict, Optional
+import shutil
+from collections import namedtuple
+from typing import List, Dict, Optional, Sequence, Union
 from pathlib import Path
 from datetime import datetime
 
+from ._ollama_common import (
+    OLLAMA_KEEP_ALIVE, AsyncClientCache, awrite_stream, cache_path, cache_store,
+    context_size, ollama_client_kwargs, write_chunks
+)
+
+
+_SYSTEM_PROMPT = (
+    'Você é um especialista em logística hospitalar. '
+    'Gere instruções DETALHADAS e PRÁTICAS para motoristas '
+    'de entregas médicas. Use linguagem clara, profissional '
+    'e inclua todos os detalhes importantes.'
+)
+
+# Limite de tokens gerados por resposta (o mesmo max_tokens usado na OpenAI)
+_NUM_PREDICT = 2000
+
+_PRIORITY_EMOJI = {
+    'CRITICO': '🔴',
+    'ALTO': '🟠',
+    'MEDIO': '🟡',
+    'BAIXO': '🟢'
+}
+
+# Pontos de uma rota em colunas paralelas (SoA), na ordem de visita;
+# prioridade None = não informada
+RoutePoints = namedtuple('RoutePoints', ['names', 'addresses', 'priorities', 'weights', 'volumes'])
+
+
+def route_points_from_dicts(route_points: Sequence[Dict]) -> RoutePoints:
+    """
+    Converte a lista de dicionários (formato antigo) em RoutePoints.
+    
+    Args:
+        route_points: Dicionários com name, address, priority, weight e volume
+        
+    Returns:
+        RoutePoints com uma tupla por campo
+    """
+    return RoutePoints(
+        names=tuple(p.get('name', 'N/A') for p in route_points),
+        addresses=tuple(p.get('address', 'N/A') for p in route_points),
+        priorities=tuple(p.get('priority') for p in route_points),
+        weights=tuple(p.get('weight', 'N/A') for p in route_points),
+        volumes=tuple(p.get('volume', 'N/A') for p in route_points),
+    )
+
+
+def _as_route_points(route_points: Union[RoutePoints, Sequence[Dict]]) -> RoutePoints:
+    """Aceita RoutePoints ou a lista de dicionários e devolve RoutePoints."""
+    if isinstance(route_points, RoutePoints):
+        return route_points
+    return route_points_from_dicts(route_points)
+
 
 class InstructionGenerator:
     """Gera instruções detalhadas para motoristas usando LLM."""
     
-    def __init__(self, provider: str = "ollama", model: str = None, api_key: str = None):
+    def __init__(self, provider: str = "ollama", model: str = None, api_key: str = None,
+                 cache_dir: Optional[str] = "outputs/llm_cache"):
         """
         Inicializa o gerador de instruções.
         
@@ -22,13 +79,22 @@ class InstructionGenerator:
                   - Ollama: "llama2"
                   - OpenAI: "gpt-3.5-turbo"
             api_key: API key (apenas para OpenAI)
+            cache_dir: Pasta do cache de respostas em disco (None desativa)
         """
         self.provider = provider.lower()
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        
+        # Janela de contexto do Ollama, a mesma em todas as chamadas da fase
+        # (ver context_size); None = padrão do servidor
+        self.num_ctx: Optional[int] = None
+        
+        # AsyncClient reaproveitado (keep-alive) dentro do mesmo event loop
+        self._async_clients = AsyncClientCache()
         
         if self.provider == "ollama":
             try:
                 import ollama
-                self.client = ollama
+                self.client = ollama.Client(**ollama_client_kwargs())
                 self.model = model or "llama2"
                 print(f"✅ Ollama configurado com modelo: {self.model}")
             except ImportError:
@@ -49,67 +115,267 @@ class InstructionGenerator:
         else:
             raise ValueError(f"Provider '{provider}' não suportado. Use 'ollama' ou 'openai'")
     
+    def warm_up(self, num_ctx: Optional[int] = None) -> None:
+        """
+        Carrega o modelo no servidor Ollama antes do primeiro pedido real.
+        
+        Um generate com prompt vazio só carrega o modelo (que fica residente
+        por OLLAMA_KEEP_ALIVE). Feito para rodar numa thread daemon enquanto
+        o AG executa; falhas são apenas avisadas, pois a geração já tem fallback.
+        
+        Args:
+            num_ctx: Janela de contexto da fase de LLM. O modelo é carregado
+                    com ela, pois o Ollama o recarrega quando num_ctx muda
+        """
+        if self.provider != "ollama":
+            return
+        
+        if num_ctx is not None:
+            self.num_ctx = num_ctx
+        
+        try:
+            self.client.generate(model=self.model, prompt="", options=self._ollama_options(),
+                                 keep_alive=OLLAMA_KEEP_ALIVE)
+        except Exception as e:
+            print(f"\n⚠️ Não foi possível pré-carregar o modelo no Ollama: {e}")
+    
     def generate_instructions(
         self,
         vehicle: Dict,
-        route_points: List[Dict],
+        route_points: Union[RoutePoints, List[Dict]],
         total_distance: float,
-        estimated_time: float
-    ) -> str:
+        estimated_time: float,
+        out_path: Optional[Path] = None
+    ) -> Union[str, Path]:
         """
         Gera instruções detalhadas para uma rota.
         
         Args:
             vehicle: Dados do veículo (nome, capacidade, etc.)
-            route_points: Lista de pontos na ordem de visita
+            route_points: Pontos na ordem de visita (RoutePoints ou lista de dicts)
             total_distance: Distância total em km
             estimated_time: Tempo estimado em horas
+            out_path: Se informado, a resposta é gravada nesse arquivo à
+                     medida que os tokens chegam (stream), sem montar a
+                     string completa em memória
             
         Returns:
-            String com instruções formatadas
+            String com instruções formatadas, ou o Path do arquivo
+            quando out_path é informado
         """
         
+        route_points = _as_route_points(route_points)
+        
         print(f"\n🤖 Gerando instruções com {self.provider.upper()}...")
         print(f"   Veículo: {vehicle.get('name', 'N/A')}")
-        print(f"   Pontos: {len(route_points)}")
+        print(f"   Pontos: {len(route_points.names)}")
         
         # Construir prompt
         prompt = self._build_prompt(vehicle, route_points, total_distance, estimated_time)
         
+        # Mesmo prompt já respondido antes: reaproveita sem chamar a LLM
+        cached = self._cache_path(prompt)
+        if cached is not None and cached.exists():
+            print(f"   ♻️ Instruções reaproveitadas do cache")
+            if out_path is None:
+                return cached.read_text(encoding='utf-8')
+            shutil.copyfile(cached, out_path)
+            return out_path
+        
         # Chamar LLM
         try:
+            if out_path is not None:
+                if self.provider == "ollama":
+                    write_chunks(out_path, self._stream_ollama(prompt))
+                else:  # openai
+                    write_chunks(out_path, (self._call_openai(prompt),))
+                cache_store(cached, out_path=out_path)
+                print(f"   ✅ Instruções geradas com sucesso!")
+                return out_path
+            
             if self.provider == "ollama":
                 response = self._call_ollama(prompt)
             else:  # openai
                 response = self._call_openai(prompt)
             
+            cache_store(cached, response=response)
             print(f"   ✅ Instruções geradas com sucesso!")
             return response
         
         except Exception as e:
             print(f"   ❌ Erro ao gerar instruções: {e}")
-            return self._generate_fallback_instructions(vehicle, route_points, total_distance, estimated_time)
+            fallback = self._generate_fallback_instructions(vehicle, route_points, total_distance, estimated_time)
+            if out_path is not None:
+                write_chunks(out_path, (fallback,))
+                return out_path
+            return fallback
+    
+    async def agenerate_instructions(
+        self,
+        vehicle: Dict,
+        route_points: Union[RoutePoints, List[Dict]],
+        total_distance: float,
+        estimated_time: float,
+        out_path: Optional[Path] = None
+    ) -> Union[str, Path]:
+        """
+        Versão assíncrona de generate_instructions().
+        
+        Permite gerar as instruções de todos os veículos ao mesmo tempo com
+        asyncio.gather. Para o Ollama atender em paralelo, inicie o servidor
+        com OLLAMA_NUM_PARALLEL >= número de veículos (e OLLAMA_MAX_LOADED_MODELS=1).
+        
+        Args:
+            vehicle: Dados do veículo (nome, capacidade, etc.)
+            route_points: Pontos na ordem de visita (RoutePoints ou lista de dicts)
+            total_distance: Distância total em km
+            estimated_time: Tempo estimado em horas
+            out_path: Se informado, a resposta é gravada em stream nesse arquivo
+            
+        Returns:
+            String com instruções formatadas, ou o Path do arquivo
+            quando out_path é informado
+        """
+        route_points = _as_route_points(route_points)
+        name = vehicle.get('name', 'N/A')
+        print(f"\n🤖 Gerando instruções com {self.provider.upper()}...")
+        print(f"   Veículo: {name}")
+        print(f"   Pontos: {len(route_points.names)}")
+        
+        prompt = self._build_prompt(vehicle, route_points, total_distance, estimated_time)
+        
+        # Mesmo prompt já respondido antes: reaproveita sem chamar a LLM
+        cached = self._cache_path(prompt)
+        if cached is not None and cached.exists():
+            print(f"   ♻️ Instruções reaproveitadas do cache ({name})")
+            if out_path is None:
+                return cached.read_text(encoding='utf-8')
+            await asyncio.to_thread(shutil.copyfile, cached, out_path)
+            return out_path
+        
+        try:
+            if out_path is not None:
+                if self.provider == "ollama":
+                    await self._awrite_stream_ollama(prompt, out_path)
+                else:  # openai: cliente síncrono em uma thread
+                    response = await asyncio.to_thread(self._call_openai, prompt)
+                    await asyncio.to_thread(write_chunks, out_path, (response,))
+                await asyncio.to_thread(cache_store, cached, out_path=out_path)
+                print(f"   ✅ Instruções geradas com sucesso! ({name})")
+                return out_path
+            
+            if self.provider == "ollama":
+                response = await self._acall_ollama(prompt)
+            else:  # openai: cliente síncrono em uma thread
+                response = await asyncio.to_thread(self._call_openai, prompt)
+            
+            cache_store(cached, response=response)
+            print(f"   ✅ Instruções geradas com sucesso! ({name})")
+            return response
+        
+        except Exception as e:
+            print(f"   ❌ Erro ao gerar instruções ({name}): {e}")
+            fallback = self._generate_fallback_instructions(vehicle, route_points, total_distance, estimated_time)
+            if out_path is not None:
+                await asyncio.to_thread(write_chunks, out_path, (fallback,))
+                return out_path
+            return fallback
+    
+    def context_size(
+        self,
+        vehicle: Dict,
+        route_points: Union[RoutePoints, List[Dict]],
+        total_distance: float,
+        estimated_time: float
+    ) -> int:
+        """
+        Janela de contexto (num_ctx) necessária para as instruções de uma rota.
+        
+        Usada para escolher um único num_ctx para toda a fase de LLM.
+        
+        Args:
+            vehicle: Dados do veículo (nome, capacidade, etc.)
+            route_points: Pontos na ordem de visita (RoutePoints ou lista de dicts)
+            total_distance: Distância total em km
+            estimated_time: Tempo estimado em horas
+            
+        Returns:
+            Tamanho em tokens
+        """
+        prompt = self._build_prompt(vehicle, _as_route_points(route_points), total_distance, estimated_time)
+        return context_size(_SYSTEM_PROMPT, prompt, _NUM_PREDICT)
+    
+    def _ollama_options(self) -> Dict:
+        """Opções do Ollama (num_ctx da fase e limite de tokens da resposta)."""
+        options = {'num_predict': _NUM_PREDICT}
+        if self.num_ctx is not None:
+            options['num_ctx'] = self.num_ctx
+        return options
+    
+    def _cache_path(self, prompt: str) -> Optional[Path]:
+        """Caminho das instruções em cache para o prompt (None se o cache está desativado)."""
+        return cache_path(self.cache_dir, self.provider, self.model, _SYSTEM_PROMPT,
+                          prompt, "instrucoes_{key}.txt")
     
     def _call_ollama(self, prompt: str) -> str:
         """Chama Ollama local."""
         response = self.client.chat(model=self.model, messages=[
             {
                 'role': 'system',
-                'content': (
-                    'Você é um especialista em logística hospitalar. '
-                    'Gere instruções DETALHADAS e PRÁTICAS para motoristas '
-                    'de entregas médicas. Use linguagem clara, profissional '
-                    'e inclua todos os detalhes importantes.'
-                )
+                'content': _SYSTEM_PROMPT
             },
             {
                 'role': 'user',
                 'content': prompt
             }
-        ])
+        ], options=self._ollama_options(), keep_alive=OLLAMA_KEEP_ALIVE)
         
         return response['message']['content']
     
+    def _stream_ollama(self, prompt: str):
+        """Chama Ollama local em modo stream, gerando os trechos da resposta."""
+        for chunk in self.client.chat(model=self.model, messages=[
+            {
+                'role': 'system',
+                'content': _SYSTEM_PROMPT
+            },
+            {
+                'role': 'user',
+                'content': prompt
+            }
+        ], options=self._ollama_options(), stream=True, keep_alive=OLLAMA_KEEP_ALIVE):
+            yield chunk['message']['content']
+    
+    async def _acall_ollama(self, prompt: str) -> str:
+        """Chama Ollama local sem bloquear (ollama.AsyncClient, sobre httpx)."""
+        response = await self._async_clients.get().chat(model=self.model, messages=[
+            {
+                'role': 'system',
+                'content': _SYSTEM_PROMPT
+            },
+            {
+                'role': 'user',
+                'content': prompt
+            }
+        ], options=self._ollama_options(), keep_alive=OLLAMA_KEEP_ALIVE)
+        
+        return response['message']['content']
+    
+    async def _awrite_stream_ollama(self, prompt: str, out_path: Path) -> None:
+        """Grava a resposta do Ollama em out_path conforme os tokens chegam."""
+        stream = await self._async_clients.get().chat(model=self.model, messages=[
+            {
+                'role': 'system',
+                'content': _SYSTEM_PROMPT
+            },
+            {
+                'role': 'user',
+                'content': prompt
+            }
+        ], options=self._ollama_options(), stream=True, keep_alive=OLLAMA_KEEP_ALIVE)
+        
+        await awrite_stream(stream, out_path)
+    
     def _call_openai(self, prompt: str) -> str:
         """Chama OpenAI API."""
         response = self.client.chat.completions.create(
@@ -117,12 +383,7 @@ class InstructionGenerator:
             messages=[
                 {
                     "role": "system",
-                    "content": (
-                        "Você é um especialista em logística hospitalar. "
-                        "Gere instruções DETALHADAS e PRÁTICAS para motoristas "
-                        "de entregas médicas. Use linguagem clara, profissional "
-                        "e inclua todos os detalhes importantes."
-                    )
+                    "content": _SYSTEM_PROMPT
                 },
                 {
                     "role": "user",
@@ -130,12 +391,12 @@ class InstructionGenerator:
                 }
             ],
             temperature=0.7,
-            max_tokens=2000
+            max_tokens=_NUM_PREDICT
         )
         
         return response.choices[0].message.content
     
-    def _build_prompt(self, vehicle, route_points, total_distance, estimated_time):
+    def _build_prompt(self, vehicle, route_points: RoutePoints, total_distance, estimated_time):
         """Constrói o prompt para o LLM."""
         
         prompt = f"""
@@ -149,27 +410,23 @@ VEÍCULO:
 - Refrigerado: {'Sim' if vehicle.get('is_refrigerated', False) else 'Não'}
 
 RESUMO DA ROTA:
-- Total de entregas: {len(route_points)}
+- Total de entregas: {len(route_points.names)}
 - Distância total: {total_distance:.1f} km
 - Tempo estimado: {estimated_time:.1f} horas
 
 PONTOS DE ENTREGA (NA ORDEM):
 """
         
-        for i, point in enumerate(route_points, 1):
-            emoji_priority = {
-                'CRITICO': '🔴',
-                'ALTO': '🟠',
-                'MEDIO': '🟡',
-                'BAIXO': '🟢'
-            }.get(point.get('priority', 'MEDIO'), '⚪')
-            
-            prompt += f"""
-{i}. {emoji_priority} {point.get('priority', 'N/A')} - {point.get('name', 'N/A')}
-   - Endereço: {point.get('address', 'N/A')}
-   - Carga: {point.get('weight', 'N/A')} kg
-   - Volume: {point.get('volume', 'N/A')} m³
+        # Um bloco por ponto, montado direto das colunas e unido num só join
+        prompt += "".join(
+            f"""
+{i}. {_PRIORITY_EMOJI.get(priority or 'MEDIO', '⚪')} {priority or 'N/A'} - {name}
+   - Endereço: {address}
+   - Carga: {weight} kg
+   - Volume: {volume} m³
 """
+            for i, (name, address, priority, weight, volume) in enumerate(zip(*route_points), 1)
+        )
         
         prompt += """
 
@@ -190,7 +447,7 @@ Use formatação clara com linhas, espaços e seções bem definidas.
         
         return prompt
     
-    def _generate_fallback_instructions(self, vehicle, route_points, total_distance, estimated_time):
+    def _generate_fallback_instructions(self, vehicle, route_points: RoutePoints, total_distance, estimated_time):
         """Gera instruções básicas caso o LLM falhe."""
         
         now = datetime.now()
@@ -203,7 +460,7 @@ Data: {now.strftime('%d/%m/%Y')}
 Horário: {now.strftime('%H:%M')}
 
 RESUMO DA ROTA:
-- {len(route_points)} entregas programadas
+- {len(route_points.names)} entregas programadas
 - Distância total: {total_distance:.1f} km
 - Tempo estimado: {estimated_time:.1f} horas
 
@@ -213,20 +470,15 @@ SEQUÊNCIA DE ENTREGAS:
 
 """
         
-        for i, point in enumerate(route_points, 1):
-            emoji_priority = {
-                'CRITICO': '🔴',
-                'ALTO': '🟠',
-                'MEDIO': '🟡',
-                'BAIXO': '🟢'
-            }.get(point.get('priority', 'MEDIO'), '⚪')
-            
-            instructions += f"""
-{i}. {emoji_priority} {point.get('priority', 'N/A')} - {point.get('name', 'N/A')}
-   Endereço: {point.get('address', 'N/A')}
-   Carga: {point.get('weight', 'N/A')} kg | Volume: {point.get('volume', 'N/A')} m³
+        instructions += "".join(
+            f"""
+{i}. {_PRIORITY_EMOJI.get(priority or 'MEDIO', '⚪')} {priority or 'N/A'} - {name}
+   Endereço: {address}
+   Carga: {weight} kg | Volume: {volume} m³
    
 """
+            for i, (name, address, priority, weight, volume) in enumerate(zip(*route_points), 1)
+        )
         
         instructions += f"""
 {'='*70}
@@ -250,16 +502,16 @@ BOA VIAGEM E ENTREGAS SEGURAS!
         
         return instructions
     
-    def save_instructions(self, instructions: str, filename: str = None) -> Path:
+    @staticmethod
+    def instructions_path(filename: str = None) -> Path:
         """
-        Salva as instruções em arquivo.
+        Monta o caminho de saída das instruções (cria o diretório se preciso).
         
         Args:
-            instructions: String com instruções
             filename: Nome do arquivo (opcional, gera automaticamente se None)
             
         Returns:
-            Path do arquivo salvo
+            Path em outputs/instructions
         """
         output_dir = Path("outputs/instructions")
         output_dir.mkdir(parents=True, exist_ok=True)
@@ -271,17 +523,35 @@ BOA VIAGEM E ENTREGAS SEGURAS!
         if not filename.endswith('.txt'):
             filename += '.txt'
         
-        filepath = output_dir / filename
+        return output_dir / filename
+    
+    def save_instructions(self, instructions: str, filename: str = None) -> Path:
+        """
+        Salva as instruções em arquivo.
+        
+        Args:
+            instructions: String com instruções
+            filename: Nome do arquivo (opcional, gera automaticamente se None)
+            
+        Returns:
+            Path do arquivo salvo
+        """
+        filepath = self.instructions_path(filename)
         
         with open(filepath, 'w', encoding='utf-8') as f:
             f.write(instructions)
         
+        self.print_saved(filepath)
+        
+        return filepath
+    
+    @staticmethod
+    def print_saved(filepath: Path) -> None:
+        """Exibe o aviso de instruções salvas."""
         print(f"\n{'='*70}")
         print(f"✅ INSTRUÇÕES SALVAS!")
         print(f"{'='*70}")
         print(f"📁 Local: {filepath.absolute()}")
         print(f"💡 Abra o arquivo para visualizar as instruções completas!")
         print(f"{'='*70}\n")
-        
-        return filepath
 
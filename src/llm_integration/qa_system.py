@@ -8,15 +8,96 @@ Permite que usuários façam perguntas em linguagem natural sobre:
 - Métricas
 - Sugestões de melhorias
 """
+import asyncio
+import hashlib
+import json
 import os
+import re
+from pathlib import Path
 from typing import List, Dict, Optional
 from datetime import datetime
 
+import numpy as np
+
+from ._ollama_common import AsyncClientCache
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+# Perguntas com resposta determinística, calculada direto do contexto. Os
+# padrões cobrem a pergunta inteira: qualquer outra variação (com nome de
+# veículo, "por que", "como reduzir"...) vai para a LLM
+_MAX_DISTANCE_RE = re.compile(
+    r"^\s*qual\s+(?:[eé]\s+)?(?:o\s+)?ve[ií]culo\s+(?:que\s+)?(?:tem|percorre|faz|possui)\s+"
+    r"(?:a\s+)?maior\s+dist[aâ]ncia(?:\s+(?:total|percorrida|a\s+percorrer))?\s*\??\s*$",
+    re.IGNORECASE
+)
+_CRITICAL_COUNT_RE = re.compile(
+    r"^\s*quantas\s+entregas\s+cr[ií]ticas(?:\s+(?:h[aá]|existem|temos|s[aã]o))?"
+    r"(?:\s+no\s+total)?\s*\??\s*$",
+    re.IGNORECASE
+)
+
+_SYSTEM_PROMPT = (
+    'Você é um assistente especializado em logística e otimização de rotas. '
+    'Responda perguntas sobre rotas, entregas, veículos e métricas de forma '
+    'CLARA, CONCISA e PRECISA. Use dados do contexto fornecido. '
+    'Se a pergunta não puder ser respondida com os dados disponíveis, '
+    'seja honesto e sugira alternativas. Seja profissional mas amigável.'
+)
+
+# Instruções que seguem a pergunta em todo prompt de Q&A
+_QA_INSTRUCTIONS = """
+
+INSTRUÇÕES:
+- Responda de forma direta e baseada nos dados acima
+- Use números e porcentagens quando relevante
+- Se precisar de mais informações, seja específico sobre o que falta
+- Sugira melhorias quando apropriado
+- Mantenha a resposta concisa (máximo 200 palavras)
+"""
+
+# Perguntas fixas usadas por suggest_improvements e find_bottlenecks
+_IMPROVEMENTS_QUESTION = """
+        Com base nos dados de otimização fornecidos, analise os padrões e identifique:
+        
+        1. PROBLEMAS DETECTADOS:
+           - Rotas desbalanceadas?
+           - Veículos subutilizados ou sobrecarregados?
+           - Entregas críticas em risco?
+           - Distâncias muito longas?
+        
+        2. SUGESTÕES DE MELHORIA:
+           - Ajustes na frota (mais/menos veículos)?
+           - Mudanças de capacidade?
+           - Alteração de prioridades?
+           - Redistribuição de entregas?
+        
+        3. OPORTUNIDADES:
+           - Redução de custos?
+           - Otimização de tempo?
+           - Melhoria no atendimento?
+        
+        Seja específico e prático. Priorize as 3 melhorias mais impactantes.
+        """
+
+_BOTTLENECKS_QUESTION = """
+        Analise as rotas e identifique possíveis gargalos:
+        - Quais veículos estão próximos do limite de capacidade ou autonomia?
+        - Quais entregas críticas estão em rotas longas?
+        - Há algum desbalanceamento significativo entre veículos?
+        """
+
 
 class QASystem:
     """Sistema de Q&A para consultas sobre rotas em linguagem natural."""
     
-    def __init__(self, provider: str = "ollama", model: str = None, api_key: str = None):
+    def __init__(self, provider: str = "ollama", model: str = None, api_key: str = None,
+                 cache_dir: Optional[str] = "outputs/qa_cache"):
         """
         Inicializa o sistema de Q&A.
         
@@ -24,9 +105,22 @@ class QASystem:
             provider: "ollama" (local, grátis) ou "openai" (nuvem, pago)
             model: Nome do modelo
             api_key: API key (apenas para OpenAI)
+            cache_dir: Pasta do cache de respostas em disco (None desativa)
         """
         self.provider = provider.lower()
         self.context = {}  # Contexto das rotas para consultas
+        self._context_json = b""  # Contexto serializado (base da chave do cache)
+        self._rendered_context = ""  # Contexto já formatado como texto do prompt
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        
+        # AsyncClient reaproveitado (keep-alive) dentro do mesmo event loop
+        self._async_clients = AsyncClientCache()
+        
+        # Ordem das perguntas assíncronas: com asyncio.gather as respostas
+        # chegam fora de ordem, mas entram no histórico na ordem das perguntas
+        self._next_seq = 0
+        self._next_record = 0
+        self._pending_records: Dict[int, Optional[Dict]] = {}
         
         if self.provider == "ollama":
             try:
@@ -82,17 +176,36 @@ class QASystem:
             'loaded_at': datetime.now().isoformat()
         }
         
+        # Serializado uma única vez; loaded_at fica de fora para que o mesmo
+        # contexto gere sempre a mesma chave de cache
+        cache_ctx = {k: v for k, v in self.context.items() if k != 'loaded_at'}
+        if ORJSON_AVAILABLE:
+            self._context_json = orjson.dumps(
+                cache_ctx, default=str,
+                option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            )
+        else:
+            self._context_json = json.dumps(cache_ctx, sort_keys=True, default=str).encode('utf-8')
+        
+        # Arrays para as perguntas respondidas sem a LLM (e para o contexto)
+        self._route_dist = np.array([r.get('distance_km', 0) for r in routes], dtype=np.float64)
+        self._priorities = np.array([str(p.get('priority', '')).lower() for p in delivery_points])
+        
+        self._rendered_context = self._render_context()
+        
         print(f"✅ Contexto carregado:")
         print(f"   • {len(routes)} rotas")
         print(f"   • {len(vehicles)} veículos")
         print(f"   • {len(delivery_points)} pontos de entrega")
     
-    def ask(self, question: str) -> str:
+    def ask(self, question: str, stream: bool = False) -> str:
         """
         Faz uma pergunta em linguagem natural sobre as rotas.
         
         Args:
             question: Pergunta do usuário
+            stream: Se True (Ollama), exibe os tokens à medida que chegam
+                    em vez de esperar a resposta completa
             
         Returns:
             Resposta da LLM
@@ -100,17 +213,24 @@ class QASystem:
         if not self.context:
             return "❌ Erro: Nenhum contexto carregado. Execute load_context() primeiro."
         
+        if stream and self.provider == "ollama":
+            return self.ask_stream(question)
+        
         print(f"\n💬 Pergunta: {question}")
         
         # Construir prompt com contexto
         prompt = self._build_qa_prompt(question)
         
-        # Chamar LLM
+        # Chamar LLM (ou reaproveitar a resposta já gravada em disco)
         try:
-            if self.provider == "ollama":
-                response = self._call_ollama(prompt, question)
-            else:  # openai
-                response = self._call_openai(prompt, question)
+            cache_key = self._cache_key(question)
+            response = self._answer_locally(question) or self._cache_get(cache_key)
+            if response is None:
+                if self.provider == "ollama":
+                    response = self._call_ollama(prompt, question)
+                else:  # openai
+                    response = self._call_openai(prompt, question)
+                self._cache_put(cache_key, response)
             
             # Adicionar ao histórico
             self.conversation_history.append({
@@ -140,10 +260,16 @@ class QASystem:
         prompt = self._build_qa_prompt(question)
 
         try:
-            if self.provider == "ollama":
-                response = self._call_ollama_stream(prompt)
+            if self.provider != "ollama":
+                return self.ask(question)
+            
+            cache_key = self._cache_key(question)
+            response = self._answer_locally(question) or self._cache_get(cache_key)
+            if response is not None:
+                print(response)
             else:
-                response = self.ask(question)
+                response = self._call_ollama_stream(prompt)
+                self._cache_put(cache_key, response)
 
             self.conversation_history.append({
                 'question': question,
@@ -156,20 +282,142 @@ class QASystem:
             print(error_msg)
             return error_msg
     
-    def _call_ollama(self, prompt: str, question: str) -> str:
-        """Chama Ollama local."""
-        messages = [
-            {
-                'role': 'system',
-                'content': (
-                    'Você é um assistente especializado em logística e otimização de rotas. '
-                    'Responda perguntas sobre rotas, entregas, veículos e métricas de forma '
-                    'CLARA, CONCISA e PRECISA. Use dados do contexto fornecido. '
-                    'Se a pergunta não puder ser respondida com os dados disponíveis, '
-                    'seja honesto e sugira alternativas. Seja profissional mas amigável.'
-                )
+    async def aask(self, question: str) -> str:
+        """
+        Versão assíncrona de ask().
+        
+        Permite disparar várias perguntas independentes ao mesmo tempo com
+        asyncio.gather, sobrepondo as esperas pela LLM em vez de somá-las.
+        
+        Args:
+            question: Pergunta do usuário
+            
+        Returns:
+            Resposta da LLM
+        """
+        if not self.context:
+            return "❌ Erro: Nenhum contexto carregado. Execute load_context() primeiro."
+        
+        print(f"\n💬 Pergunta: {question}")
+        prompt = self._build_qa_prompt(question)
+        
+        # Número de ordem da pergunta (o histórico segue essa ordem)
+        seq = self._next_seq
+        self._next_seq += 1
+        entry = None
+        
+        try:
+            cache_key = self._cache_key(question)
+            response = self._answer_locally(question) or self._cache_get(cache_key)
+            if response is None:
+                if self.provider == "ollama":
+                    response = await self._acall_ollama(prompt)
+                else:  # openai: cliente síncrono em uma thread
+                    response = await asyncio.to_thread(self._call_openai, prompt, question)
+                self._cache_put(cache_key, response)
+            
+            entry = {
+                'question': question,
+                'answer': response,
+                'timestamp': datetime.now().isoformat()
             }
-        ]
+            
+            return response
+        
+        except Exception as e:
+            error_msg = f"❌ Erro ao processar pergunta: {e}"
+            print(error_msg)
+            return error_msg
+        
+        finally:
+            self._record_in_order(seq, entry)
+    
+    def _record_in_order(self, seq: int, entry: Optional[Dict]):
+        """
+        Registra no histórico a resposta da pergunta assíncrona de número seq.
+        
+        A entrada só é adicionada depois das perguntas anteriores, para que o
+        histórico (e export_qa_log) siga a ordem das perguntas.
+        
+        Args:
+            seq: Número de ordem da pergunta (atribuído em aask)
+            entry: Entrada do histórico, ou None se a pergunta falhou
+        """
+        self._pending_records[seq] = entry
+        while self._next_record in self._pending_records:
+            ready = self._pending_records.pop(self._next_record)
+            if ready is not None:
+                self.conversation_history.append(ready)
+            self._next_record += 1
+    
+    def _answer_locally(self, question: str) -> Optional[str]:
+        """
+        Responde sem a LLM as perguntas que são só agregações do contexto.
+        
+        Args:
+            question: Pergunta do usuário
+        
+        Returns:
+            Resposta pronta, ou None se a pergunta precisar da LLM
+        """
+        if _MAX_DISTANCE_RE.match(question) and self._route_dist.size:
+            i = int(self._route_dist.argmax())
+            name = self.context['routes'][i].get('vehicle_name', f'Veículo {i + 1}')
+            return f"{name} tem a maior distância: {self._route_dist[i]:.1f} km."
+        
+        if _CRITICAL_COUNT_RE.match(question):
+            total = int((self._priorities == 'critico').sum())
+            return f"Temos {total} entregas críticas no total."
+        
+        return None
+    
+    def _cache_key(self, question: str) -> str:
+        """
+        Calcula a chave (blake2b) da resposta em cache.
+        
+        Considera o contexto, o modelo e o histórico recente enviado junto
+        com a pergunta, já que todos influenciam a resposta da LLM.
+        
+        Args:
+            question: Pergunta do usuário
+        
+        Returns:
+            Hash hexadecimal de 32 caracteres
+        """
+        h = hashlib.blake2b(self._context_json, digest_size=16)
+        h.update(f"\0{self.provider}:{self.model}".encode('utf-8'))
+        for conv in self.conversation_history[-3:]:
+            h.update(f"\0{conv['question']}\0{conv['answer']}".encode('utf-8'))
+        h.update(b"\0" + question.encode('utf-8'))
+        return h.hexdigest()
+    
+    def _cache_get(self, key: str) -> Optional[str]:
+        """Retorna a resposta gravada para a chave, ou None se não houver."""
+        if self.cache_dir is None:
+            return None
+        cached = self.cache_dir / f"{key}.txt"
+        if cached.exists():
+            return cached.read_text(encoding='utf-8')
+        return None
+    
+    def _cache_put(self, key: str, response: str):
+        """Grava a resposta no cache em disco."""
+        if self.cache_dir is None or not response:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        (self.cache_dir / f"{key}.txt").write_text(response, encoding='utf-8')
+    
+    def _build_messages(self, prompt: str) -> List[Dict]:
+        """
+        Monta as mensagens do chat: sistema, histórico recente e pergunta.
+        
+        Args:
+            prompt: Prompt da pergunta atual (com o contexto)
+        
+        Returns:
+            Lista de mensagens no formato role/content
+        """
+        messages = [{'role': 'system', 'content': _SYSTEM_PROMPT}]
         
         # Adicionar histórico recente (últimas 3 perguntas)
         for conv in self.conversation_history[-3:]:
@@ -178,63 +426,38 @@ class QASystem:
         
         # Adicionar pergunta atual
         messages.append({'role': 'user', 'content': prompt})
-        
-        response = self.client.chat(model=self.model, messages=messages)
+        return messages
+    
+    def _call_ollama(self, prompt: str, question: str) -> str:
+        """Chama Ollama local."""
+        response = self.client.chat(model=self.model, messages=self._build_messages(prompt))
+        return response['message']['content']
+
+    async def _acall_ollama(self, prompt: str) -> str:
+        """Chama Ollama local sem bloquear (AsyncClient compartilhado, sobre httpx)."""
+        response = await self._async_clients.get().chat(
+            model=self.model, messages=self._build_messages(prompt)
+        )
         return response['message']['content']
 
     def _call_ollama_stream(self, prompt: str) -> str:
         """Chama Ollama local com streaming token-a-token."""
-        messages = [
-            {
-                'role': 'system',
-                'content': (
-                    'Você é um assistente especializado em logística e otimização de rotas. '
-                    'Responda perguntas sobre rotas, entregas, veículos e métricas de forma '
-                    'CLARA, CONCISA e PRECISA. Use dados do contexto fornecido. '
-                    'Se a pergunta não puder ser respondida com os dados disponíveis, '
-                    'seja honesto e sugira alternativas. Seja profissional mas amigável.'
-                )
-            }
-        ]
-
-        for conv in self.conversation_history[-3:]:
-            messages.append({'role': 'user', 'content': conv['question']})
-            messages.append({'role': 'assistant', 'content': conv['answer']})
+        messages = self._build_messages(prompt)
 
-        messages.append({'role': 'user', 'content': prompt})
-
-        full_text = ""
+        # Tokens acumulados em lista (concatenar str a cada token é quadrático)
+        tokens = []
         stream = self.client.chat(model=self.model, messages=messages, stream=True)
         for chunk in stream:
             token = chunk.get('message', {}).get('content', '')
             if token:
                 print(token, end='', flush=True)
-                full_text += token
+                tokens.append(token)
         print()
-        return full_text
+        return ''.join(tokens)
     
     def _call_openai(self, prompt: str, question: str) -> str:
         """Chama OpenAI API."""
-        messages = [
-            {
-                "role": "system",
-                "content": (
-                    "Você é um assistente especializado em logística e otimização de rotas. "
-                    "Responda perguntas sobre rotas, entregas, veículos e métricas de forma "
-                    "CLARA, CONCISA e PRECISA. Use dados do contexto fornecido. "
-                    "Se a pergunta não puder ser respondida com os dados disponíveis, "
-                    "seja honesto e sugira alternativas. Seja profissional mas amigável."
-                )
-            }
-        ]
-        
-        # Adicionar histórico recente
-        for conv in self.conversation_history[-3:]:
-            messages.append({"role": "user", "content": conv['question']})
-            messages.append({"role": "assistant", "content": conv['answer']})
-        
-        # Adicionar pergunta atual
-        messages.append({"role": "user", "content": prompt})
+        messages = self._build_messages(prompt)
         
         response = self.client.chat.completions.create(
             model=self.model,
@@ -247,7 +470,18 @@ class QASystem:
     
     def _build_qa_prompt(self, question: str) -> str:
         """Constrói prompt com contexto para Q&A."""
+        return self._rendered_context + question + _QA_INSTRUCTIONS
+    
+    def _render_context(self) -> str:
+        """
+        Formata o contexto das rotas como texto do prompt.
+        
+        Chamado uma única vez em load_context(); cada pergunta só concatena
+        o texto pronto com a pergunta e as instruções.
         
+        Returns:
+            Texto do contexto, terminando no cabeçalho da pergunta
+        """
         # Resumo das rotas
         routes_summary = []
         for i, route in enumerate(self.context['routes'], 1):
@@ -261,14 +495,11 @@ class QASystem:
                 f"{distance:.2f} km, {capacity_usage:.1f}% capacidade"
             )
         
-        # Pontos de entrega críticos
-        critical_points = [
-            p for p in self.context['delivery_points']
-            if p.get('priority', '').lower() == 'critico'
-        ]
+        # Pontos de entrega críticos (contagem sobre o array de prioridades)
+        num_critical = int((self._priorities == 'critico').sum())
         
-        # Construir prompt
-        prompt = f"""
+        # Construir texto do contexto
+        return f"""
 CONTEXTO SOBRE AS ROTAS OTIMIZADAS:
 
 RESUMO GERAL:
@@ -276,7 +507,7 @@ RESUMO GERAL:
 - Total de rotas: {len(self.context['routes'])}
 - Total de pontos de entrega: {len(self.context['delivery_points'])}
 - Distância total: {self.context['metrics'].get('total_distance', 'N/A')} km
-- Entregas críticas: {len(critical_points)}
+- Entregas críticas: {num_critical}
 
 DETALHES DAS ROTAS:
 {chr(10).join(routes_summary)}
@@ -292,56 +523,36 @@ ALGORITMO GENÉTICO:
 - Mutações: {self.context['ga_stats'].get('total_mutations', 'N/A')}
 
 PERGUNTA DO USUÁRIO:
-{question}
-
-INSTRUÇÕES:
-- Responda de forma direta e baseada nos dados acima
-- Use números e porcentagens quando relevante
-- Se precisar de mais informações, seja específico sobre o que falta
-- Sugira melhorias quando apropriado
-- Mantenha a resposta concisa (máximo 200 palavras)
 """
-        
-        return prompt
     
-    def suggest_improvements(self) -> str:
+    def suggest_improvements(self, stream: bool = False) -> str:
         """
         Gera sugestões de melhorias baseadas nos padrões identificados.
         
+        Args:
+            stream: Se True (Ollama), exibe a resposta à medida que é gerada
+        
         Returns:
             String com sugestões de melhorias
         """
         if not self.context:
             return "❌ Erro: Nenhum contexto carregado."
         
-        question = """
-        Com base nos dados de otimização fornecidos, analise os padrões e identifique:
-        
-        1. PROBLEMAS DETECTADOS:
-           - Rotas desbalanceadas?
-           - Veículos subutilizados ou sobrecarregados?
-           - Entregas críticas em risco?
-           - Distâncias muito longas?
-        
-        2. SUGESTÕES DE MELHORIA:
-           - Ajustes na frota (mais/menos veículos)?
-           - Mudanças de capacidade?
-           - Alteração de prioridades?
-           - Redistribuição de entregas?
-        
-        3. OPORTUNIDADES:
-           - Redução de custos?
-           - Otimização de tempo?
-           - Melhoria no atendimento?
-        
-        Seja específico e prático. Priorize as 3 melhorias mais impactantes.
-        """
+        question = _IMPROVEMENTS_QUESTION
         
         print("\n💡 Gerando sugestões de melhoria...")
-        response = self.ask(question)
+        response = self.ask(question, stream=stream)
         
         return response
     
+    async def asuggest_improvements(self) -> str:
+        """Versão assíncrona de suggest_improvements()."""
+        if not self.context:
+            return "❌ Erro: Nenhum contexto carregado."
+        
+        print("\n💡 Gerando sugestões de melhoria...")
+        return await self.aask(_IMPROVEMENTS_QUESTION)
+    
     def get_route_summary(self, vehicle_name: Optional[str] = None) -> str:
         """
         Retorna resumo de uma rota específica ou todas.
@@ -367,15 +578,14 @@ INSTRUÇÕES:
         question = f"Compare as rotas dos veículos '{vehicle1}' e '{vehicle2}'. Quais são as principais diferenças?"
         return self.ask(question)
     
-    def find_bottlenecks(self) -> str:
+    def find_bottlenecks(self, stream: bool = False) -> str:
         """Identifica gargalos e pontos de atenção."""
-        question = """
-        Analise as rotas e identifique possíveis gargalos:
-        - Quais veículos estão próximos do limite de capacidade ou autonomia?
-        - Quais entregas críticas estão em rotas longas?
-        - Há algum desbalanceamento significativo entre veículos?
-        """
-        return self.ask(question)
+        question = _BOTTLENECKS_QUESTION
+        return self.ask(question, stream=stream)
+    
+    async def afind_bottlenecks(self) -> str:
+        """Versão assíncrona de find_bottlenecks()."""
+        return await self.aask(_BOTTLENECKS_QUESTION)
     
     def get_conversation_history(self) -> List[Dict]:
         """Retorna histórico de perguntas e respostas."""
@@ -444,14 +654,21 @@ def interactive_qa_session(qa_system: QASystem, stream: bool = True):
                 print("\nEncerrando sessao. Ate logo!")
                 break
             
+            # Com streaming a resposta já sai no console enquanto é gerada
+            streaming = stream and qa_system.provider == "ollama"
+            
             if question.lower() == 'melhorias':
                 print("\nAssistente:")
-                print(qa_system.suggest_improvements())
+                response = qa_system.suggest_improvements(stream=streaming)
+                if not streaming:
+                    print(response)
                 continue
             
             if question.lower() == 'gargalos':
                 print("\nAssistente:")
-                print(qa_system.find_bottlenecks())
+                response = qa_system.find_bottlenecks(stream=streaming)
+                if not streaming:
+                    print(response)
                 continue
             
             if question.lower() == 'historico':
@@ -467,7 +684,7 @@ def interactive_qa_session(qa_system: QASystem, stream: bool = True):
             
             # Pergunta normal
             print("\nAssistente:")
-            if stream and qa_system.provider == "ollama":
+            if streaming:
                 qa_system.ask_stream(question)
             else:
                 response = qa_system.ask(question)
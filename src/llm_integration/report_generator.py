@@ -3,16 +3,64 @@ Gerador de Relatórios de Eficiência usando LLM.
 
 Suporta Ollama (local, grátis) e OpenAI (nuvem, pago).
 """
+import asyncio
+import functools
+import importlib.util
 import os
-from typing import Dict, List, Optional
+import shutil
+import string
+from typing import Dict, List, Optional, Union
 from pathlib import Path
 from datetime import datetime
 
+from ._ollama_common import (
+    OLLAMA_KEEP_ALIVE, AsyncClientCache, awrite_stream, cache_path, cache_store,
+    context_size, ollama_client_kwargs, write_chunks
+)
+
+
+# Templates pré-compilados dos blocos por veículo (evita refazer a
+# formatação f-string a cada iteração dos loops de prompt/relatório)
+_VEHICLE_TMPL = string.Template("""
+Veículo $i - $vehicle_name:
+- Entregas: $num_deliveries
+- Distância: $distance_km km
+- Autonomia: $autonomy_km km
+- Carga: $load_kg kg
+- Capacidade: $capacity_kg kg
+- Utilização: $capacity_usage%
+- Pontos: $points
+""")
+
+_FALLBACK_VEHICLE_TMPL = string.Template("""
+### Veículo $i - $vehicle_name
+
+**Métricas:**
+- Entregas: $num_deliveries
+- Distância: $distance_km km ($autonomy_usage% da autonomia)
+- Carga: $load_kg kg ($capacity_usage% da capacidade)
+- Rota: $points
+
+""")
+
+_SYSTEM_PROMPT = (
+    'Você é um analista sênior de logística e otimização. '
+    'Analise dados de rotas otimizadas e gere relatórios '
+    'DETALHADOS, ANALÍTICOS e ACIONÁVEIS. Inclua:\n'
+    '- Análise quantitativa (números, percentuais)\n'
+    '- Insights qualitativos (padrões, problemas)\n'
+    '- Recomendações práticas (melhorias, ajustes)\n'
+    'Use formatação Markdown clara. Seja profissional mas direto.'
+)
+
+# Limite de tokens do relatório (o mesmo max_tokens usado na OpenAI)
+_NUM_PREDICT = 3000
 
 class ReportGenerator:
     """Gera relatórios analíticos de eficiência usando LLM."""
     
-    def __init__(self, provider: str = "ollama", model: str = None, api_key: str = None):
+    def __init__(self, provider: str = "ollama", model: str = None, api_key: str = None,
+                 fallback_only: bool = False, cache_dir: Optional[str] = "outputs/llm_cache"):
         """
         Inicializa o gerador de relatórios.
         
@@ -22,33 +70,51 @@ class ReportGenerator:
                   - Ollama: "llama2"
                   - OpenAI: "gpt-3.5-turbo"
             api_key: API key (apenas para OpenAI)
+            fallback_only: Se True, não usa LLM e gera apenas o relatório básico
+            cache_dir: Pasta do cache de respostas em disco (None desativa)
         """
         self.provider = provider.lower()
+        self._api_key = api_key
+        self._fallback_only = fallback_only
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        
+        # Janela de contexto do Ollama, a mesma das instruções na fase de LLM
+        # (ver context_size); None = padrão do servidor
+        self.num_ctx: Optional[int] = None
         
+        # AsyncClient reaproveitado (keep-alive) dentro do mesmo event loop
+        self._async_clients = AsyncClientCache()
+        
+        # Apenas verifica se o pacote existe; o import real (e a criação do
+        # cliente) fica para o primeiro acesso a `self.client`
         if self.provider == "ollama":
-            try:
-                import ollama
-                self.client = ollama
-                self.model = model or "llama2"
-                print(f"✅ Ollama configurado com modelo: {self.model}")
-            except ImportError:
+            if not fallback_only and importlib.util.find_spec("ollama") is None:
                 raise ImportError(
                     "Ollama não instalado! Execute: pip install ollama\n"
                     "E instale o Ollama: https://ollama.ai/download/windows"
                 )
+            self.model = model or "llama2"
+            print(f"✅ Ollama configurado com modelo: {self.model}")
         
         elif self.provider == "openai":
-            try:
-                from openai import OpenAI
-                self.client = OpenAI(api_key=api_key or os.getenv('OPENAI_API_KEY'))
-                self.model = model or "gpt-3.5-turbo"
-                print(f"✅ OpenAI configurado com modelo: {self.model}")
-            except ImportError:
+            if not fallback_only and importlib.util.find_spec("openai") is None:
                 raise ImportError("OpenAI não instalado! Execute: pip install openai")
+            self.model = model or "gpt-3.5-turbo"
+            print(f"✅ OpenAI configurado com modelo: {self.model}")
         
         else:
             raise ValueError(f"Provider '{provider}' não suportado. Use 'ollama' ou 'openai'")
     
+    @functools.cached_property
+    def client(self):
+        """Cliente do LLM, importado e criado apenas no primeiro uso."""
+        if self.provider == "ollama":
+            import ollama
+            return ollama.Client(**ollama_client_kwargs())
+        
+        from openai import OpenAI
+        return OpenAI(api_key=self._api_key or os.getenv('OPENAI_API_KEY'))
+    
     def generate_report(
         self,
         metrics: Dict,
@@ -70,9 +136,19 @@ class ReportGenerator:
         print(f"\n📊 Gerando relatório com {self.provider.upper()}...")
         print(f"   Rotas analisadas: {len(route_details)}")
         
+        # Modo offline: não toca no cliente do LLM
+        if self._fallback_only:
+            return self._generate_fallback_report(metrics, ga_stats, route_details)
+        
         # Construir prompt
         prompt = self._build_report_prompt(metrics, ga_stats, route_details)
         
+        # Mesmo prompt já respondido antes: reaproveita sem chamar a LLM
+        cached = self._cache_path(prompt)
+        if cached is not None and cached.exists():
+            print(f"   ♻️ Relatório reaproveitado do cache")
+            return cached.read_text(encoding='utf-8')
+        
         # Chamar LLM
         try:
             if self.provider == "ollama":
@@ -80,6 +156,7 @@ class ReportGenerator:
             else:  # openai
                 response = self._call_openai(prompt)
             
+            cache_store(cached, response=response)
             print(f"   ✅ Relatório gerado com sucesso!")
             return response
         
@@ -87,29 +164,153 @@ class ReportGenerator:
             print(f"   ❌ Erro ao gerar relatório: {e}")
             return self._generate_fallback_report(metrics, ga_stats, route_details)
     
+    async def agenerate_report(
+        self,
+        metrics: Dict,
+        ga_stats: Dict,
+        route_details: List[Dict],
+        out_path: Optional[Path] = None
+    ) -> Union[str, Path]:
+        """
+        Versão assíncrona de generate_report().
+        
+        Pode ser agrupada com as instruções dos motoristas num único
+        asyncio.gather, aproveitando o modelo já carregado no servidor.
+        
+        Args:
+            metrics: Métricas gerais (distância, fitness, etc.)
+            ga_stats: Estatísticas do AG (gerações, mutações, etc.)
+            route_details: Detalhes de cada rota
+            out_path: Se informado (ver report_path()), o relatório é gravado
+                     nesse arquivo à medida que os tokens chegam (stream)
+            
+        Returns:
+            Relatório em Markdown/texto, ou o Path do arquivo quando
+            out_path é informado
+        """
+        print(f"\n📊 Gerando relatório com {self.provider.upper()}...")
+        print(f"   Rotas analisadas: {len(route_details)}")
+        
+        if self._fallback_only:
+            report = self._generate_fallback_report(metrics, ga_stats, route_details)
+            if out_path is not None:
+                await asyncio.to_thread(write_chunks, out_path, (report,))
+                return out_path
+            return report
+        
+        prompt = self._build_report_prompt(metrics, ga_stats, route_details)
+        
+        # Mesmo prompt já respondido antes: reaproveita sem chamar a LLM
+        cached = self._cache_path(prompt)
+        if cached is not None and cached.exists():
+            print(f"   ♻️ Relatório reaproveitado do cache")
+            if out_path is None:
+                return cached.read_text(encoding='utf-8')
+            await asyncio.to_thread(shutil.copyfile, cached, out_path)
+            return out_path
+        
+        try:
+            if out_path is not None:
+                if self.provider == "ollama":
+                    await self._awrite_stream_ollama(prompt, out_path)
+                else:  # openai: cliente síncrono em uma thread
+                    response = await asyncio.to_thread(self._call_openai, prompt)
+                    await asyncio.to_thread(write_chunks, out_path, (response,))
+                await asyncio.to_thread(cache_store, cached, out_path=out_path)
+                print(f"   ✅ Relatório gerado com sucesso!")
+                return out_path
+            
+            if self.provider == "ollama":
+                response = await self._acall_ollama(prompt)
+            else:  # openai: cliente síncrono em uma thread
+                response = await asyncio.to_thread(self._call_openai, prompt)
+            
+            cache_store(cached, response=response)
+            print(f"   ✅ Relatório gerado com sucesso!")
+            return response
+        
+        except Exception as e:
+            print(f"   ❌ Erro ao gerar relatório: {e}")
+            report = self._generate_fallback_report(metrics, ga_stats, route_details)
+            if out_path is not None:
+                await asyncio.to_thread(write_chunks, out_path, (report,))
+                return out_path
+            return report
+    
+    def context_size(self, metrics: Dict, ga_stats: Dict, route_details: List[Dict]) -> int:
+        """
+        Janela de contexto (num_ctx) necessária para o relatório.
+        
+        Usada para escolher um único num_ctx para toda a fase de LLM.
+        
+        Args:
+            metrics: Métricas gerais (distância, fitness, etc.)
+            ga_stats: Estatísticas do AG (gerações, mutações, etc.)
+            route_details: Detalhes de cada rota
+            
+        Returns:
+            Tamanho em tokens
+        """
+        prompt = self._build_report_prompt(metrics, ga_stats, route_details)
+        return context_size(_SYSTEM_PROMPT, prompt, _NUM_PREDICT)
+    
+    def _ollama_options(self) -> Dict:
+        """Opções do Ollama (num_ctx da fase e limite de tokens do relatório)."""
+        options = {'num_predict': _NUM_PREDICT}
+        if self.num_ctx is not None:
+            options['num_ctx'] = self.num_ctx
+        return options
+    
+    def _cache_path(self, prompt: str) -> Optional[Path]:
+        """Caminho do relatório em cache para o prompt (None se o cache está desativado)."""
+        return cache_path(self.cache_dir, self.provider, self.model, _SYSTEM_PROMPT,
+                          prompt, "relatorio_{key}.md")
+    
     def _call_ollama(self, prompt: str) -> str:
         """Chama Ollama local."""
         response = self.client.chat(model=self.model, messages=[
             {
                 'role': 'system',
-                'content': (
-                    'Você é um analista sênior de logística e otimização. '
-                    'Analise dados de rotas otimizadas e gere relatórios '
-                    'DETALHADOS, ANALÍTICOS e ACIONÁVEIS. Inclua:\n'
-                    '- Análise quantitativa (números, percentuais)\n'
-                    '- Insights qualitativos (padrões, problemas)\n'
-                    '- Recomendações práticas (melhorias, ajustes)\n'
-                    'Use formatação Markdown clara. Seja profissional mas direto.'
-                )
+                'content': _SYSTEM_PROMPT
             },
             {
                 'role': 'user',
                 'content': prompt
             }
-        ])
+        ], options=self._ollama_options(), keep_alive=OLLAMA_KEEP_ALIVE)
         
         return response['message']['content']
     
+    async def _acall_ollama(self, prompt: str) -> str:
+        """Chama Ollama local sem bloquear (ollama.AsyncClient, sobre httpx)."""
+        response = await self._async_clients.get().chat(model=self.model, messages=[
+            {
+                'role': 'system',
+                'content': _SYSTEM_PROMPT
+            },
+            {
+                'role': 'user',
+                'content': prompt
+            }
+        ], options=self._ollama_options(), keep_alive=OLLAMA_KEEP_ALIVE)
+        
+        return response['message']['content']
+    
+    async def _awrite_stream_ollama(self, prompt: str, out_path: Path) -> None:
+        """Grava a resposta do Ollama em out_path conforme os tokens chegam."""
+        stream = await self._async_clients.get().chat(model=self.model, messages=[
+            {
+                'role': 'system',
+                'content': _SYSTEM_PROMPT
+            },
+            {
+                'role': 'user',
+                'content': prompt
+            }
+        ], options=self._ollama_options(), stream=True, keep_alive=OLLAMA_KEEP_ALIVE)
+        
+        await awrite_stream(stream, out_path)
+    
     def _call_openai(self, prompt: str) -> str:
         """Chama OpenAI API."""
         response = self.client.chat.completions.create(
@@ -117,15 +318,7 @@ class ReportGenerator:
             messages=[
                 {
                     "role": "system",
-                    "content": (
-                        "Você é um analista sênior de logística e otimização. "
-                        "Analise dados de rotas otimizadas e gere relatórios "
-                        "DETALHADOS, ANALÍTICOS e ACIONÁVEIS. Inclua:\n"
-                        "- Análise quantitativa (números, percentuais)\n"
-                        "- Insights qualitativos (padrões, problemas)\n"
-                        "- Recomendações práticas (melhorias, ajustes)\n"
-                        "Use formatação Markdown clara. Seja profissional mas direto."
-                    )
+                    "content": _SYSTEM_PROMPT
                 },
                 {
                     "role": "user",
@@ -133,7 +326,7 @@ class ReportGenerator:
                 }
             ],
             temperature=0.7,
-            max_tokens=3000
+            max_tokens=_NUM_PREDICT
         )
         
         return response.choices[0].message.content
@@ -141,51 +334,35 @@ class ReportGenerator:
     def _build_report_prompt(self, metrics, ga_stats, route_details):
         """Constrói prompt para geração de relatório."""
         
-        prompt = f"""
-Analise os dados de otimização de rotas e gere um relatório completo:
-
-MÉTRICAS GERAIS:
-- Fitness (distância total): {metrics.get('total_distance', 'N/A')} km
-- Veículos utilizados: {len(route_details)} de {metrics.get('total_vehicles', 'N/A')}
-- Entregas atendidas: {metrics.get('total_deliveries', 'N/A')}
-- Violações: {metrics.get('violations', 0)}
-
-ESTATÍSTICAS DO ALGORITMO GENÉTICO:
-- Gerações: {ga_stats.get('current_generation', 'N/A')}
-- Crossovers: {ga_stats.get('total_crossovers', 'N/A')}
-- Mutações: {ga_stats.get('total_mutations', 'N/A')}
-- Tipo de seleção: {ga_stats.get('selection_type', 'N/A')}
-- Tipo de crossover: {ga_stats.get('crossover_type', 'N/A')}
-
-DETALHES POR VEÍCULO:
-"""
-        
-        for i, route in enumerate(route_details, 1):
-            prompt += f"""
-Veículo {i} - {route.get('vehicle_name', f'Veículo {i}')}:
-- Entregas: {route.get('num_deliveries', 0)}
-- Distância: {route.get('distance_km', 0):.1f} km
-- Autonomia: {route.get('autonomy_km', 'N/A')} km
-- Carga: {route.get('load_kg', 0):.1f} kg
-- Capacidade: {route.get('capacity_kg', 'N/A')} kg
-- Utilização: {route.get('capacity_usage_%', 0):.1f}%
-- Pontos: {' → '.join(route.get('points', []))}
-"""
-        
-        prompt += """
-
-GERE UM RELATÓRIO COMPLETO COM:
-1. Resumo executivo (3-4 parágrafos)
-2. Tabela de métricas principais (Markdown)
-3. Análise detalhada por veículo (performance, problemas, pontos de atenção)
-4. Insights e recomendações (mínimo 3)
-5. Análise do algoritmo genético (convergência, qualidade)
-6. Conclusão e próximos passos
-
-Use Markdown. Seja específico e acionável. Identifique problemas e sugira soluções.
-"""
+        # Chaves canônicas (apenas os campos usados no prompt) para o cache
+        metrics_key = (
+            metrics.get('total_distance', 'N/A'),
+            metrics.get('total_vehicles', 'N/A'),
+            metrics.get('total_deliveries', 'N/A'),
+            metrics.get('violations', 0)
+        )
+        ga_key = (
+            ga_stats.get('current_generation', 'N/A'),
+            ga_stats.get('total_crossovers', 'N/A'),
+            ga_stats.get('total_mutations', 'N/A'),
+            ga_stats.get('selection_type', 'N/A'),
+            ga_stats.get('crossover_type', 'N/A')
+        )
+        routes_key = tuple(
+            (
+                route.get('vehicle_name', f'Veículo {i}'),
+                route.get('num_deliveries', 0),
+                route.get('distance_km', 0),
+                route.get('autonomy_km', 'N/A'),
+                route.get('load_kg', 0),
+                route.get('capacity_kg', 'N/A'),
+                route.get('capacity_usage_%', 0),
+                tuple(route.get('points', []))
+            )
+            for i, route in enumerate(route_details, 1)
+        )
         
-        return prompt
+        return _build_report_prompt_cached(metrics_key, ga_key, routes_key)
     
     def _generate_fallback_report(self, metrics, ga_stats, route_details):
         """Gera relatório básico caso o LLM falhe."""
@@ -223,19 +400,21 @@ percorrendo uma distância total de **{metrics.get('total_distance', 'N/A')} km*
 
 """
         
+        parts = []
         for i, route in enumerate(route_details, 1):
             autonomy_usage = (route.get('distance_km', 0) / route.get('autonomy_km', 1) * 100) if route.get('autonomy_km', 0) > 0 else 0
             
-            report += f"""
-### Veículo {i} - {route.get('vehicle_name', f'Veículo {i}')}
-
-**Métricas:**
-- Entregas: {route.get('num_deliveries', 0)}
-- Distância: {route.get('distance_km', 0):.1f} km ({autonomy_usage:.1f}% da autonomia)
-- Carga: {route.get('load_kg', 0):.1f} kg ({route.get('capacity_usage_%', 0):.1f}% da capacidade)
-- Rota: {' → '.join(route.get('points', []))}
-
-"""
+            parts.append(_FALLBACK_VEHICLE_TMPL.substitute(
+                i=i,
+                vehicle_name=route.get('vehicle_name', f'Veículo {i}'),
+                num_deliveries=route.get('num_deliveries', 0),
+                distance_km=f"{route.get('distance_km', 0):.1f}",
+                autonomy_usage=f"{autonomy_usage:.1f}",
+                load_kg=f"{route.get('load_kg', 0):.1f}",
+                capacity_usage=f"{route.get('capacity_usage_%', 0):.1f}",
+                points=' → '.join(route.get('points', []))
+            ))
+        report += ''.join(parts)
         
         report += f"""
 ---
@@ -271,33 +450,147 @@ Sistema VRP-AG v1.0 | Tech Challenge FIAP
         
         return report
     
-    def save_report(self, report: str, prefix: str = "relatorio") -> Path:
+    @staticmethod
+    def report_path(prefix: str = "relatorio") -> Path:
         """
-        Salva relatório em arquivo Markdown.
+        Monta o caminho de saída do relatório (cria o diretório se preciso).
         
         Args:
-            report: String com relatório
             prefix: Prefixo do nome do arquivo
             
         Returns:
-            Path do arquivo salvo
+            Path em outputs/reports, com timestamp
         """
         output_dir = Path("outputs/reports")
         output_dir.mkdir(parents=True, exist_ok=True)
         
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{prefix}_{timestamp}.md"
-        filepath = output_dir / filename
+        return output_dir / f"{prefix}_{timestamp}.md"
+    
+    def save_report(self, report: str, prefix: str = "relatorio") -> Path:
+        """
+        Salva relatório em arquivo Markdown.
+        
+        Args:
+            report: String com relatório
+            prefix: Prefixo do nome do arquivo
+            
+        Returns:
+            Path do arquivo salvo
+        """
+        filepath = self.report_path(prefix)
         
         with open(filepath, 'w', encoding='utf-8') as f:
             f.write(report)
         
+        self.print_saved(filepath)
+
+        return filepath
+
+    @staticmethod
+    def print_saved(filepath: Path) -> None:
+        """Exibe o aviso de relatório salvo."""
         print(f"\n{'='*70}")
         print(f"✅ RELATÓRIO SALVO!")
         print(f"{'='*70}")
         print(f"📁 Local: {filepath.absolute()}")
         print(f"💡 Abra o arquivo para visualizar o relatório completo!")
         print(f"{'='*70}\n")
-        
+
+    def save_report_json(self, data: Dict, prefix: str = "relatorio",
+                         report_file: Optional[Path] = None) -> Path:
+        """
+        Salva dados estruturados do relatório (ex: Route.to_dict()) em JSON.
+
+        Usa orjson quando instalado (serialização em C); caso contrário,
+        usa o módulo json da biblioteca padrão.
+
+        Args:
+            data: Dicionário serializável
+            prefix: Prefixo do nome do arquivo
+            report_file: Relatório (.md) já gerado; o JSON fica ao lado dele,
+                        com o mesmo nome (opcional)
+
+        Returns:
+            Path do arquivo salvo
+        """
+        filepath = (report_file or self.report_path(prefix)).with_suffix('.json')
+
+        try:
+            import orjson
+            payload = orjson.dumps(
+                data,
+                option=orjson.OPT_SERIALIZE_DATACLASS | orjson.OPT_NON_STR_KEYS
+            )
+        except ImportError:
+            import json
+            payload = json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+        with open(filepath, 'wb') as f:
+            f.write(payload)
+
+        print(f"✅ Dados do relatório salvos em: {filepath.absolute()}")
+
         return filepath
 
+
+@functools.lru_cache(maxsize=128)
+def _build_report_prompt_cached(metrics_key: tuple, ga_key: tuple, routes_key: tuple) -> str:
+    """
+    Monta o prompt do relatório a partir das chaves canônicas.
+    
+    Memoizado: checkpoints com as mesmas métricas/estatísticas reutilizam
+    o prompt já montado em vez de refazer a formatação.
+    """
+    total_distance, total_vehicles, total_deliveries, violations = metrics_key
+    generation, crossovers, mutations, selection_type, crossover_type = ga_key
+    
+    prompt = f"""
+Analise os dados de otimização de rotas e gere um relatório completo:
+
+MÉTRICAS GERAIS:
+- Fitness (distância total): {total_distance} km
+- Veículos utilizados: {len(routes_key)} de {total_vehicles}
+- Entregas atendidas: {total_deliveries}
+- Violações: {violations}
+
+ESTATÍSTICAS DO ALGORITMO GENÉTICO:
+- Gerações: {generation}
+- Crossovers: {crossovers}
+- Mutações: {mutations}
+- Tipo de seleção: {selection_type}
+- Tipo de crossover: {crossover_type}
+
+DETALHES POR VEÍCULO:
+"""
+    
+    parts = [prompt]
+    for i, (vehicle_name, num_deliveries, distance_km, autonomy_km,
+            load_kg, capacity_kg, capacity_usage, points) in enumerate(routes_key, 1):
+        parts.append(_VEHICLE_TMPL.substitute(
+            i=i,
+            vehicle_name=vehicle_name,
+            num_deliveries=num_deliveries,
+            distance_km=f"{distance_km:.1f}",
+            autonomy_km=autonomy_km,
+            load_kg=f"{load_kg:.1f}",
+            capacity_kg=capacity_kg,
+            capacity_usage=f"{capacity_usage:.1f}",
+            points=' → '.join(points)
+        ))
+    prompt = ''.join(parts)
+    
+    prompt += """
+
+GERE UM RELATÓRIO COMPLETO COM:
+1. Resumo executivo (3-4 parágrafos)
+2. Tabela de métricas principais (Markdown)
+3. Análise detalhada por veículo (performance, problemas, pontos de atenção)
+4. Insights e recomendações (mínimo 3)
+5. Análise do algoritmo genético (convergência, qualidade)
+6. Conclusão e próximos passos
+
+Use Markdown. Seja específico e acionável. Identifique problemas e sugira soluções.
+"""
+    
+    return prompt
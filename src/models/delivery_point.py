@@ -39,6 +39,14 @@ class Priority(Enum):
         return delays[self]
 
 
+# Campos serializados, na ordem de declaração (usados por to_dict e pickling)
+_FIELDS = (
+    'id', 'name', 'latitude', 'longitude', 'address', 'priority',
+    'weight_kg', 'volume_m3', 'time_window_start', 'time_window_end',
+    'service_time_minutes', 'notes', 'item_description'
+)
+
+
 @dataclass
 class DeliveryPoint:
     """
@@ -104,21 +112,22 @@ class DeliveryPoint:
     
     def to_dict(self) -> dict:
         """Converte o ponto de entrega para dicionário."""
-        return {
-            'id': self.id,
-            'name': self.name,
-            'latitude': self.latitude,
-            'longitude': self.longitude,
-            'address': self.address,
-            'priority': self.priority.value,
-            'weight_kg': self.weight_kg,
-            'volume_m3': self.volume_m3,
-            'time_window_start': self.time_window_start.isoformat() if self.time_window_start else None,
-            'time_window_end': self.time_window_end.isoformat() if self.time_window_end else None,
-            'service_time_minutes': self.service_time_minutes,
-            'notes': self.notes,
-            'item_description': self.item_description
-        }
+        data = {k: getattr(self, k) for k in _FIELDS}
+        data['priority'] = self.priority.value
+        if self.time_window_start:
+            data['time_window_start'] = self.time_window_start.isoformat()
+        if self.time_window_end:
+            data['time_window_end'] = self.time_window_end.isoformat()
+        return data
+    
+    def __getstate__(self) -> tuple:
+        """Estado compacto para pickle (tupla alinhada a _FIELDS)."""
+        return tuple(getattr(self, k) for k in _FIELDS)
+    
+    def __setstate__(self, state: tuple):
+        """Restaura o estado gerado por __getstate__."""
+        for k, v in zip(_FIELDS, state):
+            setattr(self, k, v)
     
     @classmethod
     def from_dict(cls, data: dict) -> 'DeliveryPoint':
@@ -9,6 +9,15 @@ from dataclasses import dataclass, field
 from typing import Optional
 
 
+# Campos serializados (os atributos de estado da otimização ficam de fora)
+_FIELDS = (
+    'id', 'name', 'capacity_kg', 'capacity_volume_m3', 'autonomy_km',
+    'cost_per_km', 'average_speed_kmh', 'driver_name', 'vehicle_type',
+    'is_refrigerated', 'notes'
+)
+_STATE_FIELDS = frozenset(('current_load_kg', 'current_volume_m3', 'current_distance_km'))
+
+
 @dataclass
 class Vehicle:
     """
@@ -155,25 +164,11 @@ class Vehicle:
     
     def to_dict(self) -> dict:
         """Converte o veículo para dicionário."""
-        return {
-            'id': self.id,
-            'name': self.name,
-            'capacity_kg': self.capacity_kg,
-            'capacity_volume_m3': self.capacity_volume_m3,
-            'autonomy_km': self.autonomy_km,
-            'cost_per_km': self.cost_per_km,
-            'average_speed_kmh': self.average_speed_kmh,
-            'driver_name': self.driver_name,
-            'vehicle_type': self.vehicle_type,
-            'is_refrigerated': self.is_refrigerated,
-            'notes': self.notes
-        }
+        return {k: getattr(self, k) for k in _FIELDS}
     
     @classmethod
     def from_dict(cls, data: dict) -> 'Vehicle':
         """Cria um veículo a partir de um dicionário."""
         # Remover campos de estado se existirem
-        state_fields = ['current_load_kg', 'current_volume_m3', 'current_distance_km']
-        clean_data = {k: v for k, v in data.items() if k not in state_fields}
+        clean_data = {k: v for k, v in data.items() if k not in _STATE_FIELDS}
         return cls(**clean_data)
-
@@ -6,9 +6,80 @@ além de criar matrizes de distância com cache.
 """
 
 import math
+from collections import namedtuple
 from typing import List, Tuple, Dict
 import numpy as np
 
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+    
+    def njit(*args, **kwargs):
+        """Fallback: sem numba, as funções rodam em Python puro."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+try:
+    from haversine import haversine_vector, Unit
+    _HAS_FAST_HAVERSINE = True
+except ImportError:
+    _HAS_FAST_HAVERSINE = False
+
+try:
+    import numexpr as ne
+    _HAS_NUMEXPR = True
+except ImportError:
+    _HAS_NUMEXPR = False
+
+# Raio da Terra em km
+EARTH_RADIUS_KM = 6371.0
+
+# Lado do bloco (pontos) usado na construção da matriz em tiles
+_TILE_SIZE = 64
+
+# O cache em disco do numba fica atrelado ao nome do módulo; ao executar este
+# arquivo direto (__main__) ele não conseguiria reaproveitar o cache do pacote
+_NB_CACHE = __name__ != '__main__'
+
+# Matriz de distâncias + mapa coordenada -> índice da matriz
+IndexedMatrix = namedtuple('IndexedMatrix', ['matrix', 'coord_to_idx'])
+
+
+@njit(cache=_NB_CACHE, fastmath=True)
+def _haversine_nb(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Núcleo escalar da Haversine (compilado com numba quando disponível)."""
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    delta_lat = math.radians(lat2 - lat1)
+    delta_lon = math.radians(lon2 - lon1)
+    
+    a = math.sin(delta_lat / 2)**2 + \
+        math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon / 2)**2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+
+
+@njit(cache=_NB_CACHE, fastmath=True)
+def _route_distance_nb(route_lats, route_lons, depot_lat: float, depot_lon: float,
+                       return_to_depot: bool) -> float:
+    """Soma as distâncias Haversine de uma rota (depósito → pontos → depósito)."""
+    n = route_lats.shape[0]
+    if n == 0:
+        return 0.0
+    
+    total = _haversine_nb(depot_lat, depot_lon, route_lats[0], route_lons[0])
+    for i in range(n - 1):
+        total += _haversine_nb(route_lats[i], route_lons[i],
+                               route_lats[i + 1], route_lons[i + 1])
+    
+    if return_to_depot:
+        total += _haversine_nb(route_lats[n - 1], route_lons[n - 1], depot_lat, depot_lon)
+    
+    return total
+
 
 def euclidean_distance(coord1: Tuple[float, float], coord2: Tuple[float, float]) -> float:
     """
@@ -41,28 +112,13 @@ def haversine_distance(coord1: Tuple[float, float], coord2: Tuple[float, float])
     """
     lat1, lon1 = coord1
     lat2, lon2 = coord2
-    
-    # Raio da Terra em km
-    R = 6371.0
-    
-    # Converter para radianos
-    lat1_rad = math.radians(lat1)
-    lat2_rad = math.radians(lat2)
-    delta_lat = math.radians(lat2 - lat1)
-    delta_lon = math.radians(lon2 - lon1)
-    
-    # Fórmula de Haversine
-    a = math.sin(delta_lat / 2)**2 + \
-        math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon / 2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    
-    distance = R * c
-    return distance
+    return _haversine_nb(float(lat1), float(lon1), float(lat2), float(lon2))
 
 
 def create_distance_matrix(coordinates: List[Tuple[float, float]], 
                           depot_coord: Tuple[float, float],
-                          use_haversine: bool = True) -> np.ndarray:
+                          use_haversine: bool = True,
+                          dtype=np.float32) -> np.ndarray:
     """
     Cria matriz de distâncias entre todos os pontos (incluindo depósito).
     
@@ -70,35 +126,257 @@ def create_distance_matrix(coordinates: List[Tuple[float, float]],
         coordinates: Lista de coordenadas dos pontos de entrega
         depot_coord: Coordenada do depósito
         use_haversine: Se True, usa distância Haversine. Se False, usa Euclidiana.
+        dtype: Tipo da matriz. float32 (padrão) tem precisão de sobra para
+               distâncias em km e ocupa metade da memória/cache
     
     Returns:
         Matriz NumPy onde matrix[i][j] é a distância do ponto i ao ponto j
         Índice 0 é sempre o depósito
     """
+    # Com numba, a Haversine usa o kernel compilado paralelo
+    if use_haversine and NUMBA_AVAILABLE:
+        return create_distance_matrix_fast(coordinates, depot_coord, dtype)
+    
     # Adicionar depósito no início
     all_coords = [depot_coord] + list(coordinates)
-    n = len(all_coords)
+    coords = np.asarray(all_coords, dtype=dtype).reshape(-1, 2)
+    
+    if use_haversine and _HAS_FAST_HAVERSINE:
+        # Matriz completa em uma única chamada da biblioteca haversine.
+        # Ela usa o raio médio 6371.0088 km; reescalar mantém os valores
+        # coerentes com haversine_distance
+        matrix = haversine_vector(coords, coords, Unit.KILOMETERS, comb=True)
+        matrix *= EARTH_RADIUS_KM / 6371.0088
+    elif use_haversine:
+        # Haversine vetorizada em blocos BxB: os temporários de sin/cos ficam
+        # do tamanho de um bloco (cabem em cache) em vez de (n, n)
+        R = EARTH_RADIUS_KM
+        coords = np.radians(coords)
+        lat = coords[:, 0]
+        lon = coords[:, 1]
+        cos_lat = np.cos(lat)
+        
+        n = coords.shape[0]
+        B = _TILE_SIZE
+        matrix = np.empty((n, n), dtype=dtype)
+        for i0 in range(0, n, B):
+            i1 = min(i0 + B, n)
+            lat_i = lat[i0:i1, None]
+            lon_i = lon[i0:i1, None]
+            cos_i = cos_lat[i0:i1, None]
+            # Matriz simétrica: só os blocos da diagonal para cima são
+            # calculados; o bloco transposto é espelhado
+            for j0 in range(i0, n, B):
+                j1 = min(j0 + B, n)
+                if _HAS_NUMEXPR:
+                    # Expressões fundidas pelo numexpr (sem temporários por operação)
+                    a = ne.evaluate(
+                        "sin((lat_i - lat_j) * 0.5)**2 + "
+                        "cos_i * cos_j * sin((lon_i - lon_j) * 0.5)**2",
+                        local_dict={
+                            'lat_i': lat_i, 'lat_j': lat[j0:j1],
+                            'lon_i': lon_i, 'lon_j': lon[j0:j1],
+                            'cos_i': cos_i, 'cos_j': cos_lat[j0:j1]
+                        }
+                    )
+                    tile = ne.evaluate("2 * R * arcsin(sqrt(where(a > 1, 1, a)))",
+                                       local_dict={'R': R, 'a': a})
+                else:
+                    a = np.sin((lat_i - lat[j0:j1]) * 0.5)**2 + \
+                        cos_i * cos_lat[j0:j1] * np.sin((lon_i - lon[j0:j1]) * 0.5)**2
+                    tile = 2 * R * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+                matrix[i0:i1, j0:j1] = tile
+                if j0 != i0:
+                    matrix[j0:j1, i0:i1] = tile.T
+    else:
+        diff = coords[:, None, :] - coords[None, :, :]
+        matrix = np.sqrt((diff**2).sum(axis=-1))
+    
+    matrix = matrix.astype(dtype, copy=False)
+    np.fill_diagonal(matrix, 0.0)
+    return matrix
+
+
+@njit(cache=_NB_CACHE, fastmath=True, parallel=True)
+def _haversine_matrix_nb(lats, lons, out):
+    """
+    Preenche out[i, j] com a Haversine entre todos os pares (sem temporários).
     
-    # Escolher função de distância
-    dist_func = haversine_distance if use_haversine else euclidean_distance
+    As linhas são distribuídas entre os núcleos (prange, sem GIL).
+    """
+    n = lats.shape[0]
+    
+    # Trigonometria por ponto calculada uma única vez (e não n vezes por linha)
+    lat_r = np.empty(n)
+    lon_r = np.empty(n)
+    cos_lat = np.empty(n)
+    for k in range(n):
+        lat_r[k] = math.radians(lats[k])
+        lon_r[k] = math.radians(lons[k])
+        cos_lat[k] = math.cos(lat_r[k])
+    
+    # Simetria: calcula só j > i e espelha em out[j, i]
+    for i in prange(n):
+        out[i, i] = 0.0
+        for j in range(i + 1, n):
+            a = math.sin((lat_r[j] - lat_r[i]) * 0.5)**2 + \
+                cos_lat[i] * cos_lat[j] * math.sin((lon_r[j] - lon_r[i]) * 0.5)**2
+            d = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+            out[i, j] = d
+            out[j, i] = d
+
+
+def create_distance_matrix_fast(coordinates: List[Tuple[float, float]],
+                                depot_coord: Tuple[float, float],
+                                dtype=np.float32) -> np.ndarray:
+    """
+    Cria a matriz Haversine com um kernel compilado e paralelo (numba).
     
-    # Criar matriz
-    matrix = np.zeros((n, n))
+    Escreve direto na matriz de saída, sem os arrays intermediários (n, n)
+    da versão NumPy. É o caminho usado por create_distance_matrix quando o
+    numba está disponível; sem numba, cai para a versão NumPy.
     
-    for i in range(n):
-        for j in range(n):
-            if i != j:
-                matrix[i][j] = dist_func(all_coords[i], all_coords[j])
+    Args:
+        coordinates: Lista de coordenadas dos pontos de entrega
+        depot_coord: Coordenada do depósito
+        dtype: Tipo da matriz de saída
     
-    return matrix
+    Returns:
+        Matriz no mesmo formato de create_distance_matrix (depósito no índice 0)
+    """
+    if not NUMBA_AVAILABLE:
+        return create_distance_matrix(coordinates, depot_coord, True, dtype)
+    
+    coords = np.asarray([depot_coord] + list(coordinates), dtype=np.float64).reshape(-1, 2)
+    out = np.empty((coords.shape[0], coords.shape[0]), dtype=dtype)
+    _haversine_matrix_nb(np.ascontiguousarray(coords[:, 0]),
+                         np.ascontiguousarray(coords[:, 1]), out)
+    return out
+
+
+def create_indexed_distance_matrix(coordinates: List[Tuple[float, float]],
+                                   depot_coord: Tuple[float, float],
+                                   use_haversine: bool = True,
+                                   dtype=np.float32) -> IndexedMatrix:
+    """
+    Cria a matriz de distâncias junto com o mapa coordenada -> índice.
+    
+    Com o mapa, rotas em coordenadas são convertidas uma única vez para
+    índices (route_to_indices) e todo o resto usa matrix[i, j] direto.
+    
+    Args:
+        coordinates: Lista de coordenadas dos pontos de entrega
+        depot_coord: Coordenada do depósito
+        use_haversine: Se True, usa distância Haversine. Se False, usa Euclidiana.
+        dtype: Tipo da matriz
+    
+    Returns:
+        IndexedMatrix(matrix, coord_to_idx), com o depósito no índice 0
+    """
+    all_coords = [tuple(depot_coord)] + [tuple(c) for c in coordinates]
+    
+    # setdefault: coordenadas repetidas ficam com o primeiro índice
+    coord_to_idx: Dict[Tuple[float, float], int] = {}
+    for i, coord in enumerate(all_coords):
+        coord_to_idx.setdefault(coord, i)
+    
+    matrix = create_distance_matrix(coordinates, depot_coord, use_haversine, dtype)
+    return IndexedMatrix(matrix, coord_to_idx)
+
+
+def route_to_indices(route_coords: List[Tuple[float, float]],
+                     coord_to_idx: Dict[Tuple[float, float], int]) -> np.ndarray:
+    """
+    Converte uma rota em coordenadas para índices da matriz de distâncias.
+    
+    Args:
+        route_coords: Lista ordenada de coordenadas da rota
+        coord_to_idx: Mapa gerado por create_indexed_distance_matrix
+    
+    Returns:
+        Array int32 com os índices dos pontos
+    """
+    return np.fromiter((coord_to_idx[tuple(c)] for c in route_coords),
+                       dtype=np.int32, count=len(route_coords))
+
+
+class IndexedDistanceMatrix:
+    """
+    Matriz de distâncias pré-calculada e indexada por inteiros.
+    
+    Para um conjunto fixo de pontos (caso do algoritmo genético) substitui o
+    DistanceCache: cada consulta é uma leitura direta no array NumPy, sem
+    ordenar/hashear coordenadas. Índice 0 é o depósito e o ponto de entrega
+    i fica no índice i + 1.
+    """
+    
+    def __init__(self, matrix: np.ndarray,
+                 coord_to_idx: Dict[Tuple[float, float], int] = None):
+        """
+        Inicializa a partir de uma matriz já calculada.
+        
+        Args:
+            matrix: Matriz (n+1, n+1) gerada por create_distance_matrix
+            coord_to_idx: Mapa opcional coordenada -> índice da matriz
+        """
+        self.m = np.ascontiguousarray(matrix)
+        self.coord_to_idx = coord_to_idx or {}
+    
+    @classmethod
+    def from_coordinates(cls, coordinates: List[Tuple[float, float]],
+                         depot_coord: Tuple[float, float],
+                         use_haversine: bool = True) -> 'IndexedDistanceMatrix':
+        """Cria a matriz indexada a partir das coordenadas (depósito no índice 0)."""
+        return cls(*create_indexed_distance_matrix(coordinates, depot_coord, use_haversine))
+    
+    def route_to_indices(self, route_coords: List[Tuple[float, float]]) -> np.ndarray:
+        """Converte uma rota em coordenadas para índices desta matriz."""
+        return route_to_indices(route_coords, self.coord_to_idx)
+    
+    def get(self, i: int, j: int) -> float:
+        """Distância entre os nós i e j (0 = depósito)."""
+        return self.m[i, j]
+    
+    def route_distance(self, route: np.ndarray) -> float:
+        """
+        Soma as distâncias de uma rota já fechada (ex: [0, 3, 5, 0]).
+        
+        Args:
+            route: Array de índices de nós na ordem de visita
+        
+        Returns:
+            Distância total da rota
+        """
+        route = np.asarray(route, dtype=np.int32)
+        return float(self.m[route[:-1], route[1:]].sum())
+    
+    def __len__(self) -> int:
+        """Número de nós (incluindo o depósito)."""
+        return self.m.shape[0]
+
+
+def _quantize_coord(coord: Tuple[float, float]) -> int:
+    """Empacota (lat, lon) quantizados em 1e-7° (~1 cm) em um único int de 64 bits."""
+    lat_q = round(coord[0] * 1e7) & 0xFFFFFFFF
+    lon_q = round(coord[1] * 1e7) & 0xFFFFFFFF
+    return (lat_q << 32) | lon_q
+
+
+def _pair_key(coord1: Tuple[float, float], coord2: Tuple[float, float]) -> int:
+    """Chave inteira independente da ordem do par (A,B) == (B,A)."""
+    a = _quantize_coord(coord1)
+    b = _quantize_coord(coord2)
+    if a > b:
+        a, b = b, a
+    return (a << 64) | b
 
 
 class DistanceCache:
     """
     Cache para armazenar distâncias calculadas e evitar recalcular.
     
-    Útil quando a mesma distância é consultada múltiplas vezes durante
-    a execução do algoritmo genético.
+    Útil para consultas esparsas entre coordenadas arbitrárias. Para um
+    conjunto fixo de pontos prefira IndexedDistanceMatrix.
     """
     
     def __init__(self, use_haversine: bool = True):
@@ -108,7 +386,7 @@ class DistanceCache:
         Args:
             use_haversine: Se True, usa Haversine. Se False, usa Euclidiana.
         """
-        self.cache: Dict[Tuple[Tuple[float, float], Tuple[float, float]], float] = {}
+        self.cache: Dict[int, float] = {}
         self.use_haversine = use_haversine
         self.dist_func = haversine_distance if use_haversine else euclidean_distance
     
@@ -123,13 +401,14 @@ class DistanceCache:
         Returns:
             Distância entre os pontos
         """
-        # Criar chave ordenada (para que (A,B) e (B,A) sejam iguais)
-        key = tuple(sorted([coord1, coord2]))
+        # Chave inteira ordenada (para que (A,B) e (B,A) sejam iguais)
+        key = _pair_key(coord1, coord2)
         
-        if key not in self.cache:
-            self.cache[key] = self.dist_func(coord1, coord2)
+        dist = self.cache.get(key)
+        if dist is None:
+            dist = self.cache[key] = self.dist_func(coord1, coord2)
         
-        return self.cache[key]
+        return dist
     
     def clear_cache(self):
         """Limpa o cache."""
@@ -159,7 +438,14 @@ def calculate_route_distance(route_coords: List[Tuple[float, float]],
     if not route_coords:
         return 0.0
     
-    dist_func = haversine_distance if use_haversine else euclidean_distance
+    if use_haversine:
+        coords = np.asarray(route_coords, dtype=np.float64).reshape(-1, 2)
+        return float(_route_distance_nb(
+            np.ascontiguousarray(coords[:, 0]), np.ascontiguousarray(coords[:, 1]),
+            float(depot_coord[0]), float(depot_coord[1]), return_to_depot
+        ))
+    
+    dist_func = euclidean_distance
     total_distance = 0.0
     
     # Distância do depósito ao primeiro ponto
@@ -176,6 +462,102 @@ def calculate_route_distance(route_coords: List[Tuple[float, float]],
     return total_distance
 
 
+def calculate_route_distance_idx(route_idx: np.ndarray,
+                                 dist_matrix: np.ndarray,
+                                 return_to_depot: bool = True) -> float:
+    """
+    Calcula distância total de uma rota usando índices da matriz de distâncias.
+    
+    Versão vetorizada de calculate_route_distance: todas as arestas são
+    lidas da matriz em um único gather e somadas de uma vez.
+    
+    Args:
+        route_idx: Índices dos pontos na matriz (o depósito é o índice 0)
+        dist_matrix: Matriz gerada por create_distance_matrix
+        return_to_depot: Se True, inclui distância de volta ao depósito
+    
+    Returns:
+        Distância total da rota
+    """
+    route_idx = np.asarray(route_idx, dtype=np.intp)
+    if route_idx.size == 0:
+        return 0.0
+    
+    src = np.concatenate(([0], route_idx))
+    dst = np.concatenate((route_idx, [0])) if return_to_depot else route_idx
+    if not return_to_depot:
+        src = src[:-1]
+    
+    return float(dist_matrix[src, dst].sum())
+
+
+def pack_routes(routes: List[List[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Empacota rotas de tamanho variável em dois arrays planos para route_metrics.
+
+    Args:
+        routes: Lista de rotas (índices dos pontos de entrega)
+
+    Returns:
+        Tupla (route_idx, route_lens): índices concatenados e tamanho de cada rota
+    """
+    route_lens = np.fromiter((len(r) for r in routes), dtype=np.int32, count=len(routes))
+    route_idx = np.fromiter((p for r in routes for p in r), dtype=np.int32,
+                            count=int(route_lens.sum()))
+    return route_idx, route_lens
+
+
+@njit(cache=_NB_CACHE, fastmath=True, parallel=True)
+def route_metrics(coords, weights, route_idx, route_lens, depot):
+    """
+    Calcula distância (Haversine, km) e carga de todas as rotas em uma chamada.
+
+    As rotas chegam empacotadas por pack_routes; cada rota é processada em
+    paralelo (prange) e percorre depósito → pontos → depósito.
+
+    Args:
+        coords: Array (N, 2) com (lat, lon) dos pontos de entrega
+        weights: Array (N,) com o peso de cada ponto
+        route_idx: Índices dos pontos de todas as rotas concatenados (int32)
+        route_lens: Quantidade de pontos de cada rota (int32)
+        depot: Coordenada (lat, lon) do depósito
+
+    Returns:
+        Tupla (distances, loads) com um valor por rota
+    """
+    n_routes = route_lens.shape[0]
+    starts = np.zeros(n_routes, dtype=np.int64)
+    for r in range(1, n_routes):
+        starts[r] = starts[r - 1] + route_lens[r - 1]
+
+    distances = np.zeros(n_routes)
+    loads = np.zeros(n_routes)
+    depot_lat = depot[0]
+    depot_lon = depot[1]
+
+    for r in prange(n_routes):
+        n = route_lens[r]
+        if n == 0:
+            continue
+        s = starts[r]
+
+        prev_lat = depot_lat
+        prev_lon = depot_lon
+        dist = 0.0
+        load = 0.0
+        for k in range(s, s + n):
+            p = route_idx[k]
+            dist += _haversine_nb(prev_lat, prev_lon, coords[p, 0], coords[p, 1])
+            load += weights[p]
+            prev_lat = coords[p, 0]
+            prev_lon = coords[p, 1]
+
+        distances[r] = dist + _haversine_nb(prev_lat, prev_lon, depot_lat, depot_lon)
+        loads[r] = load
+
+    return distances, loads
+
+
 # Exemplo de uso
 if __name__ == '__main__':
     # Coordenadas de exemplo (São Paulo)
@@ -204,6 +586,10 @@ if __name__ == '__main__':
     route_dist = calculate_route_distance([point1, point2], depot, use_haversine=True)
     print(f"\nDistância da rota (depot → p1 → p2 → depot): {route_dist:.2f} km")
     
+    # Mesma rota usando índices da matriz
+    route_dist_idx = calculate_route_distance_idx(np.array([1, 2]), matrix)
+    print(f"Distância da rota (via índices da matriz): {route_dist_idx:.2f} km")
+    
     # Cache
     print("\n" + "-" * 50)
     print("Teste de Cache:")
@@ -4,16 +4,38 @@ Visualizador de Rotas usando Folium (Mapas HTML Interativos).
 Este módulo cria mapas interativos em HTML mostrando as rotas otimizadas
 pelo Algoritmo Genético em um mapa real de São Paulo.
 """
+import copy
+import branca.element
 import folium
+import gzip
+import hashlib
+import json
+import re
+import shutil
+import numpy as np
 from folium import plugins
-from typing import List, Dict, Tuple, Optional
+from functools import lru_cache
+from typing import List, Dict, Tuple
 from pathlib import Path
 from datetime import datetime
+from jinja2 import Environment, PackageLoader
 
+from ..utils.distance_calculator import pack_routes
 
+# Ambiente jinja2 dos templates nomeados do branca: cache sem limite e sem
+# auto_reload (que faz um stat no arquivo a cada get_template). Os templates
+# inline dos elementos do folium já são compilados na importação
+branca.element.ENV = Environment(
+    loader=PackageLoader('branca', 'templates'),
+    cache_size=-1,
+    auto_reload=False
+)
+
+
+@lru_cache(maxsize=None)
 def get_point_label(index: int) -> str:
     """
-    Gera label para ponto de entrega baseado no índice.
+    Gera label para ponto de entrega baseado no índice (memoizado).
     
     0-25: A-Z
     26-51: A1-Z1
@@ -35,23 +57,157 @@ def get_point_label(index: int) -> str:
         return f"{letter}{cycle}"
 
 
+# Templates HTML pré-definidos (preenchidos com format_map para cada ponto)
+_POPUP_TPL = """
+            <div style="font-family: Arial; width: 260px;">
+                <h3 style="margin: 0; color: #333; font-size: 16px;">
+                    {priority_emoji} {name}
+                </h3>
+                <hr style="margin: 5px 0; border: 1px solid #ddd;">
+                
+                <table style="width: 100%; font-size: 13px; border-collapse: collapse;">
+                    <tr>
+                        <td style="padding: 3px 5px; font-weight: bold; width: 40%;">Prioridade:</td>
+                        <td style="padding: 3px 5px;">{priority}</td>
+                    </tr>
+                    <tr style="background-color: #f5f5f5;">
+                        <td style="padding: 3px 5px; font-weight: bold;">Carga:</td>
+                        <td style="padding: 3px 5px;">{weight} kg</td>
+                    </tr>
+                    <tr>
+                        <td style="padding: 3px 5px; font-weight: bold;">Volume:</td>
+                        <td style="padding: 3px 5px;">{volume} m³</td>
+                    </tr>
+                    <tr style="background-color: #f5f5f5;">
+                        <td style="padding: 3px 5px; font-weight: bold;">Tempo Serviço:</td>
+                        <td style="padding: 3px 5px;">{service_time_min} min</td>
+                    </tr>
+                </table>
+                
+                <p style="margin: 8px 0 5px 0; font-size: 12px; color: #666; line-height: 1.4;">
+                    {description}
+                </p>
+                
+                <p style="margin: 5px 0 0 0; font-size: 10px; color: #999;">
+                    Coordenadas: {latitude:.4f}, {longitude:.4f}
+                </p>
+            </div>
+            """
+
+# Estilo das letras dos pontos (tooltips permanentes da camada GeoJSON)
+_LABEL_CSS = """
+<style>
+    .leaflet-tooltip.point-label {
+        background: transparent;
+        border: none;
+        box-shadow: none;
+        padding: 0;
+        font-size: 12px;
+        font-weight: bold;
+        color: white;
+        text-shadow: -1px -1px 0 #000, 1px -1px 0 #000, -1px 1px 0 #000, 1px 1px 0 #000;
+    }
+    .leaflet-tooltip.point-label::before {
+        display: none;
+    }
+</style>
+"""
+
+# Marcador de cada linha [lat, lon, popup, tooltip, cor] do FastMarkerCluster
+_CLUSTER_CALLBACK = """
+function (row) {
+    var marker = L.circleMarker(new L.LatLng(row[0], row[1]), {
+        radius: 9, color: 'black', weight: 2, fillColor: row[4], fillOpacity: 0.9
+    });
+    marker.bindPopup(row[2], {maxWidth: 280});
+    marker.bindTooltip(row[3]);
+    return marker;
+};
+"""
+
+
+# Chamada que injeta os dados (inline) de uma camada GeoJSON no HTML do folium
+_GEOJSON_ADD_RE = re.compile(r'^\s*(geo_json_[0-9a-f]{32})_add\((\{.*\})\);$', re.MULTILINE)
+
+# Carrega o arquivo .data.json.gz e entrega cada camada à sua função _add.
+# Se o servidor já descompactou (Content-Encoding: gzip), lê o JSON direto
+_DATA_LOADER_TPL = """
+<script>
+    fetch({url})
+        .then(function (r) {{ return r.arrayBuffer(); }})
+        .then(function (buf) {{
+            var head = new Uint8Array(buf, 0, 2);
+            if (head[0] === 0x1f && head[1] === 0x8b) {{
+                var stream = new Blob([buf]).stream().pipeThrough(new DecompressionStream('gzip'));
+                return new Response(stream).json();
+            }}
+            return JSON.parse(new TextDecoder().decode(buf));
+        }})
+        .then(function (layers) {{
+            Object.keys(layers).forEach(function (name) {{
+                window[name + '_add'](layers[name]);
+            }});
+        }});
+</script>
+"""
+
+# Versão dos templates deste módulo: entra na chave do cache de HTML e deve
+# ser incrementada sempre que o HTML gerado mudar
+_MAP_CACHE_VERSION = 2
+
+# Quantidade máxima de mapas mantidos em outputs/maps/.cache
+_MAP_CACHE_MAX = 32
+
+# Plugins iguais em todos os mapas: criados uma vez e copiados em create_map
+_FULLSCREEN = plugins.Fullscreen()
+_MINIMAP = plugins.MiniMap()
+
+# Parte fixa da legenda (símbolos e dicas de uso)
+_LEGEND_FOOTER = '''
+            </div>
+            
+            <hr style="margin: 10px 0; border: 1px solid #ddd;">
+            
+            <div style="margin-bottom: 5px;">
+                <h4 style="margin: 5px 0; font-size: 13px; color: #555;">📍 Símbolos:</h4>
+                <p style="margin: 3px 0; font-size: 12px; line-height: 1.6;">
+                    🏠 = Depósito Central<br>
+                    ● = Ponto de Entrega (cor = prioridade)<br>
+                    A,B,C... = Identificação dos pontos<br>
+                    → = Direção da rota (animada)
+                </p>
+            </div>
+            
+            <hr style="margin: 10px 0; border: 1px solid #ddd;">
+            
+            <p style="margin: 5px 0; font-size: 11px; color: #999; text-align: center;">
+                💡 Clique nos marcadores para ver detalhes<br>
+                Use os botões + e - para zoom
+            </p>
+        </div>
+        '''
+
+
 class FoliumVisualizer:
     """Cria mapas interativos HTML das rotas otimizadas."""
     
-    # Cores por prioridade
-    PRIORITY_COLORS = {
+    # Acima deste número de pontos os marcadores são agrupados (cluster)
+    CLUSTER_THRESHOLD = 200
+    
+    # Preenchimento dos círculos por prioridade (mesmas cores da legenda)
+    PRIORITY_FILL_COLORS = {
         'CRITICO': 'red',
         'ALTO': 'orange',
-        'MEDIO': 'lightblue',
+        'MEDIO': '#6495ED',
         'BAIXO': 'green'
     }
     
-    # Ícones por prioridade
-    PRIORITY_ICONS = {
-        'CRITICO': 'exclamation-sign',
-        'ALTO': 'warning-sign',
-        'MEDIO': 'info-sign',
-        'BAIXO': 'ok-sign'
+    # Emojis por prioridade (usados no popup)
+    PRIORITY_EMOJIS = {
+        'CRITICO': '🔴',
+        'ALTO': '🟠',
+        'MEDIO': '🟡',
+        'BAIXO': '🟢'
     }
     
     # Cores por veículo (mesmas do Pygame)
@@ -96,25 +252,30 @@ class FoliumVisualizer:
             Objeto folium.Map pronto para ser salvo
         """
         
-        # Criar mapa base
+        # Criar mapa base (renderer Canvas: círculos e linhas desenhados num
+        # único <canvas> em vez de um nó SVG por elemento)
         mapa = folium.Map(
             location=self.center,
             zoom_start=zoom_start,
-            tiles='OpenStreetMap'
+            tiles='OpenStreetMap',
+            prefer_canvas=True
         )
         
-        # Adicionar controle de tela cheia
-        plugins.Fullscreen().add_to(mapa)
-        
-        # Adicionar mini mapa
-        minimap = plugins.MiniMap()
-        mapa.add_child(minimap)
+        # Adicionar controle de tela cheia e mini mapa (cópias dos plugins
+        # compartilhados, montados uma única vez no carregamento do módulo)
+        mapa.add_child(copy.copy(_FULLSCREEN))
+        mapa.add_child(copy.copy(_MINIMAP))
         
         # Adicionar depósito
         self._add_depot(mapa)
         
+        # Coordenadas (N, 2) montadas uma vez; as rotas são extraídas por índice
+        coords = np.array([[p['latitude'], p['longitude']] for p in delivery_points],
+                          dtype=np.float64).reshape(-1, 2)
+        route_idx, route_lens = pack_routes(routes)
+        
         # Adicionar rotas (antes dos pontos para ficarem embaixo)
-        self._add_routes(mapa, routes, delivery_points, vehicles, show_route_arrows)
+        self._add_routes(mapa, route_idx, route_lens, coords, vehicles, show_route_arrows)
         
         # Adicionar pontos de entrega (por cima das rotas)
         self._add_delivery_points(mapa, delivery_points)
@@ -124,6 +285,36 @@ class FoliumVisualizer:
         
         return mapa
     
+    def _map_cache_key(
+        self,
+        delivery_points: List[Dict],
+        routes: List[List[int]],
+        vehicles: List[Dict],
+        zoom_start: int,
+        show_route_arrows: bool
+    ) -> str:
+        """
+        Calcula o hash (blake2b) das entradas que definem o mapa.
+        
+        Inclui a versão do folium e _MAP_CACHE_VERSION, para que HTML gerado
+        por outra versão da biblioteca ou dos templates deste módulo não seja
+        reaproveitado.
+        
+        Returns:
+            Hash hexadecimal de 32 caracteres
+        """
+        payload = json.dumps({
+            'folium': folium.__version__,
+            'version': _MAP_CACHE_VERSION,
+            'pts': delivery_points,
+            'routes': routes,
+            'veh': vehicles,
+            'zoom': zoom_start,
+            'arr': show_route_arrows,
+            'center': self.center,
+        }, sort_keys=True, default=str)
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+    
     def _add_depot(self, mapa: folium.Map):
         """Adiciona marcador do depósito central."""
         folium.Marker(
@@ -162,116 +353,112 @@ class FoliumVisualizer:
         ).add_to(mapa)
     
     def _add_delivery_points(self, mapa: folium.Map, points: List[Dict]):
-        """Adiciona marcadores dos pontos de entrega."""
+        """
+        Adiciona os pontos de entrega como uma única camada GeoJSON.
+        
+        Um FeatureCollection é renderizado pelo parser nativo do Leaflet, em
+        vez de um marcador (e um fragmento de template) por ponto. Acima de
+        CLUSTER_THRESHOLD pontos usa FastMarkerCluster, que só cria no DOM
+        os marcadores da área visível.
+        """
+        if not points:
+            return
+        
+        features = []
+        label_features = []
         for i, point in enumerate(points):
-            # Determinar cor e ícone por prioridade
             priority = point.get('priority', 'MEDIO')
-            color = self.PRIORITY_COLORS.get(priority, 'blue')
-            icon_type = self.PRIORITY_ICONS.get(priority, 'info-sign')
-            
-            # Emojis de prioridade
-            priority_emoji = {
-                'CRITICO': '🔴',
-                'ALTO': '🟠',
-                'MEDIO': '🟡',
-                'BAIXO': '🟢'
-            }.get(priority, '⚪')
-            
-            # Criar popup com informações detalhadas
-            popup_html = f"""
-            <div style="font-family: Arial; width: 260px;">
-                <h3 style="margin: 0; color: #333; font-size: 16px;">
-                    {priority_emoji} {point.get('name', f'Ponto {i+1}')}
-                </h3>
-                <hr style="margin: 5px 0; border: 1px solid #ddd;">
-                
-                <table style="width: 100%; font-size: 13px; border-collapse: collapse;">
-                    <tr>
-                        <td style="padding: 3px 5px; font-weight: bold; width: 40%;">Prioridade:</td>
-                        <td style="padding: 3px 5px;">{priority}</td>
-                    </tr>
-                    <tr style="background-color: #f5f5f5;">
-                        <td style="padding: 3px 5px; font-weight: bold;">Carga:</td>
-                        <td style="padding: 3px 5px;">{point.get('weight', 'N/A')} kg</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 3px 5px; font-weight: bold;">Volume:</td>
-                        <td style="padding: 3px 5px;">{point.get('volume', 'N/A')} m³</td>
-                    </tr>
-                    <tr style="background-color: #f5f5f5;">
-                        <td style="padding: 3px 5px; font-weight: bold;">Tempo Serviço:</td>
-                        <td style="padding: 3px 5px;">{point.get('service_time_min', 'N/A')} min</td>
-                    </tr>
-                </table>
-                
-                <p style="margin: 8px 0 5px 0; font-size: 12px; color: #666; line-height: 1.4;">
-                    {point.get('description', 'Sem descrição disponível')}
-                </p>
-                
-                <p style="margin: 5px 0 0 0; font-size: 10px; color: #999;">
-                    Coordenadas: {point['latitude']:.4f}, {point['longitude']:.4f}
-                </p>
-            </div>
-            """
-            
-            # Criar tooltip (aparece ao passar o mouse)
+            name = point.get('name', f'Ponto {i+1}')
             label = get_point_label(i)
-            tooltip_text = f"{label} - {point.get('name', f'Ponto {i+1}')} ({priority})"
+            geometry = {'type': 'Point', 'coordinates': [point['longitude'], point['latitude']]}
             
-            # Adicionar marcador
-            folium.Marker(
-                location=[point['latitude'], point['longitude']],
-                popup=folium.Popup(popup_html, max_width=280),
-                tooltip=tooltip_text,
-                icon=folium.Icon(
-                    color=color,
-                    icon=icon_type,
-                    prefix='glyphicon'
-                )
-            ).add_to(mapa)
+            # Popup com informações detalhadas
+            popup_html = _POPUP_TPL.format_map({
+                'priority_emoji': self.PRIORITY_EMOJIS.get(priority, '⚪'),
+                'name': name,
+                'priority': priority,
+                'weight': point.get('weight', 'N/A'),
+                'volume': point.get('volume', 'N/A'),
+                'service_time_min': point.get('service_time_min', 'N/A'),
+                'description': point.get('description', 'Sem descrição disponível'),
+                'latitude': point['latitude'],
+                'longitude': point['longitude']
+            })
             
-            # Adicionar label com letra (A, B, C... A1, B1, ...)
-            folium.Marker(
-                location=[point['latitude'], point['longitude']],
-                icon=folium.DivIcon(
-                    html=f'''
-                    <div style="
-                        font-size: 14px;
-                        font-weight: bold;
-                        color: white;
-                        text-align: center;
-                        text-shadow: -1px -1px 0 #000, 1px -1px 0 #000, -1px 1px 0 #000, 1px 1px 0 #000;
-                        margin-top: -40px;
-                        margin-left: 5px;
-                    ">
-                        {label}
-                    </div>
-                    '''
-                )
-            ).add_to(mapa)
+            features.append({
+                'type': 'Feature',
+                'geometry': geometry,
+                'properties': {
+                    'tooltip': f"{label} - {name} ({priority})",
+                    'popup': popup_html,
+                    'color': self.PRIORITY_FILL_COLORS.get(priority, 'blue'),
+                },
+            })
+            label_features.append({
+                'type': 'Feature',
+                'geometry': geometry,
+                'properties': {'label': label},
+            })
+        
+        if len(points) > self.CLUSTER_THRESHOLD:
+            data = [
+                [f['geometry']['coordinates'][1], f['geometry']['coordinates'][0],
+                 f['properties']['popup'], f['properties']['tooltip'], f['properties']['color']]
+                for f in features
+            ]
+            plugins.FastMarkerCluster(data, callback=_CLUSTER_CALLBACK, name='Pontos de entrega').add_to(mapa)
+            return
+        
+        # Letras (A, B, C... A1, B1, ...) como tooltips permanentes. A camada
+        # entra antes dos círculos para que eles fiquem por cima e recebam
+        # os cliques (os tooltips ficam no painel próprio do Leaflet)
+        folium.GeoJson(
+            {'type': 'FeatureCollection', 'features': label_features},
+            name='Identificação dos pontos',
+            marker=folium.CircleMarker(radius=1, opacity=0, fill_opacity=0),
+            tooltip=folium.GeoJsonTooltip(
+                fields=['label'], labels=False, sticky=False,
+                permanent=True, direction='center', class_name='point-label'
+            ),
+        ).add_to(mapa)
+        
+        # Marcadores: círculo na cor da prioridade, tooltip no hover e popup no clique
+        folium.GeoJson(
+            {'type': 'FeatureCollection', 'features': features},
+            name='Pontos de entrega',
+            marker=folium.CircleMarker(radius=11, weight=2, color='black', fill=True, fill_opacity=0.9),
+            style_function=lambda feature: {'fillColor': feature['properties']['color']},
+            tooltip=folium.GeoJsonTooltip(fields=['tooltip'], labels=False),
+            popup=folium.GeoJsonPopup(fields=['popup'], labels=False, max_width=280),
+        ).add_to(mapa)
+        
+        mapa.get_root().header.add_child(folium.Element(_LABEL_CSS))
     
     def _add_routes(
         self,
         mapa: folium.Map,
-        routes: List[List[int]],
-        points: List[Dict],
+        route_idx: np.ndarray,
+        route_lens: np.ndarray,
+        points_coords: np.ndarray,
         vehicles: List[Dict],
         show_arrows: bool
     ):
-        """Adiciona linhas das rotas no mapa."""
-        for vehicle_idx, route in enumerate(routes):
-            if not route:
+        """Adiciona linhas das rotas no mapa (rotas empacotadas por pack_routes)."""
+        depot = np.asarray(self.depot_location, dtype=np.float64).reshape(1, 2)
+        num_points = len(points_coords)
+        
+        # Início de cada rota no array plano route_idx
+        ends = np.cumsum(route_lens)
+        starts = ends - route_lens
+        
+        for vehicle_idx in range(len(route_lens)):
+            if not route_lens[vehicle_idx]:
                 continue
             
-            # Coordenadas da rota (depósito → pontos → depósito)
-            coords = [self.depot_location]
-            
-            for point_idx in route:
-                if point_idx < len(points):
-                    point = points[point_idx]
-                    coords.append([point['latitude'], point['longitude']])
-            
-            coords.append(self.depot_location)  # Retorna ao depósito
+            # Coordenadas da rota (depósito → pontos → depósito) num único gather
+            route = route_idx[starts[vehicle_idx]:ends[vehicle_idx]]
+            idx = route[route < num_points]
+            coords = np.vstack([depot, points_coords[idx], depot]).tolist()
             
             # Cor do veículo
             color = self.VEHICLE_COLORS[vehicle_idx % len(self.VEHICLE_COLORS)]
@@ -280,8 +467,8 @@ class FoliumVisualizer:
             vehicle_name = vehicles[vehicle_idx].get('name', f'Veículo {vehicle_idx + 1}') if vehicle_idx < len(vehicles) else f'Veículo {vehicle_idx + 1}'
             
             # Informações da rota para popup
-            num_deliveries = len(route)
-            route_letters = ' → '.join([get_point_label(idx) for idx in route])
+            num_deliveries = int(route_lens[vehicle_idx])
+            route_letters = ' → '.join([get_point_label(idx) for idx in route.tolist()])
             
             popup_text = f'''
             <div style="font-family: Arial; width: 200px;">
@@ -317,8 +504,8 @@ class FoliumVisualizer:
     def _add_legend(self, mapa: folium.Map, num_vehicles: int, num_points: int):
         """Adiciona legenda interativa ao mapa."""
         
-        # Construir HTML da legenda
-        legend_html = f'''
+        # Construir HTML da legenda (partes unidas com join ao final)
+        parts = [f'''
         <div style="
             position: fixed; 
             bottom: 50px; 
@@ -351,55 +538,63 @@ class FoliumVisualizer:
             
             <div style="margin-bottom: 12px;">
                 <h4 style="margin: 5px 0; font-size: 13px; color: #555;">🚐 Veículos ({num_vehicles} rotas):</h4>
-        '''
+        ''']
         
         # Adicionar cores dos veículos
         for i in range(num_vehicles):
             color = self.VEHICLE_COLORS[i % len(self.VEHICLE_COLORS)]
-            legend_html += f'''
+            parts.append(f'''
                 <p style="margin: 3px 0; line-height: 1.5;">
                     <span style="display: inline-block; width: 30px; height: 3px; background-color: {color}; vertical-align: middle;"></span>
                     <span style="font-weight: bold; color: {color};"> Veículo {i+1}</span>
                 </p>
-            '''
+            ''')
         
-        legend_html += '''
-            </div>
-            
-            <hr style="margin: 10px 0; border: 1px solid #ddd;">
-            
-            <div style="margin-bottom: 5px;">
-                <h4 style="margin: 5px 0; font-size: 13px; color: #555;">📍 Símbolos:</h4>
-                <p style="margin: 3px 0; font-size: 12px; line-height: 1.6;">
-                    🏠 = Depósito Central<br>
-                    📍 = Ponto de Entrega<br>
-                    A,B,C... = Identificação dos pontos<br>
-                    → = Direção da rota (animada)
-                </p>
-            </div>
-            
-            <hr style="margin: 10px 0; border: 1px solid #ddd;">
-            
-            <p style="margin: 5px 0; font-size: 11px; color: #999; text-align: center;">
-                💡 Clique nos marcadores para ver detalhes<br>
-                Use os botões + e - para zoom
-            </p>
-        </div>
-        '''
+        parts.append(_LEGEND_FOOTER)
         
+        legend_html = ''.join(parts)
         mapa.get_root().html.add_child(folium.Element(legend_html))
     
-    def save_map(self, mapa: folium.Map, filename: str = None) -> Path:
+    def save_map(self, mapa: folium.Map, filename: str = None,
+                 external_data: bool = False) -> Path:
         """
         Salva mapa em arquivo HTML.
         
         Args:
             mapa: Objeto folium.Map
             filename: Nome do arquivo (opcional, gera automaticamente se None)
+            external_data: Se True, os dados das camadas GeoJSON vão para um
+                           arquivo .data.json.gz ao lado do HTML, carregado com
+                           fetch(). Exige servir a pasta por HTTP (navegadores
+                           bloqueiam fetch em file://), por isso é opcional
             
         Returns:
             Path do arquivo salvo
         """
+        # Caminho completo (outputs/maps, nome gerado se não fornecido)
+        filepath = self._map_output_path(filename)
+        
+        # Salvar mapa
+        if external_data:
+            self._save_with_external_data(mapa, filepath)
+        else:
+            mapa.save(str(filepath))
+        
+        self._print_saved(filepath)
+        
+        return filepath
+    
+    @staticmethod
+    def _map_output_path(filename: str = None) -> Path:
+        """
+        Monta o caminho do HTML em outputs/maps (cria o diretório).
+        
+        Args:
+            filename: Nome do arquivo (opcional, gera automaticamente se None)
+            
+        Returns:
+            Path do arquivo HTML
+        """
         # Criar diretório de saída se não existir
         output_dir = Path("outputs/maps")
         output_dir.mkdir(parents=True, exist_ok=True)
@@ -413,20 +608,49 @@ class FoliumVisualizer:
         if not filename.endswith('.html'):
             filename += '.html'
         
-        # Caminho completo
-        filepath = output_dir / filename
-        
-        # Salvar mapa
-        mapa.save(str(filepath))
-        
+        return output_dir / filename
+    
+    @staticmethod
+    def _print_saved(filepath: Path):
+        """Exibe o aviso de mapa salvo."""
         print(f"\n{'='*70}")
         print(f"✅ MAPA HTML GERADO COM SUCESSO!")
         print(f"{'='*70}")
         print(f"📁 Local: {filepath.absolute()}")
         print(f"🌐 Abra no navegador para visualizar o mapa interativo!")
         print(f"{'='*70}\n")
+    
+    @staticmethod
+    def _prune_map_cache(cache_dir: Path):
+        """Mantém no cache apenas os _MAP_CACHE_MAX arquivos mais recentes."""
+        cached = sorted(cache_dir.glob('*.html'), key=lambda f: f.stat().st_mtime, reverse=True)
+        for old in cached[_MAP_CACHE_MAX:]:
+            old.unlink(missing_ok=True)
+    
+    def _save_with_external_data(self, mapa: folium.Map, filepath: Path):
+        """
+        Salva o HTML sem os dados GeoJSON inline e grava-os compactados à parte.
         
-        return filepath
+        Args:
+            mapa: Objeto folium.Map
+            filepath: Caminho do arquivo HTML
+        """
+        html = mapa.get_root().render()
+        data_path = filepath.with_name(filepath.stem + '.data.json.gz')
+        
+        # Cada camada vira uma entrada {nome_da_camada: FeatureCollection}
+        layers = {}
+        def extract(match):
+            layers[match.group(1)] = json.loads(match.group(2))
+            return ''
+        html = _GEOJSON_ADD_RE.sub(extract, html)
+        
+        with gzip.open(data_path, 'wb') as f:
+            f.write(json.dumps(layers, separators=(',', ':')).encode('utf-8'))
+        
+        loader = _DATA_LOADER_TPL.format(url=json.dumps(data_path.name))
+        html = html.replace('</html>', loader + '</html>')
+        filepath.write_text(html, encoding='utf-8')
     
     def create_and_save_map(
         self,
@@ -439,6 +663,10 @@ class FoliumVisualizer:
         """
         Método auxiliar que cria e salva o mapa em uma única chamada.
         
+        Como o objeto folium.Map não sai deste método, o HTML renderizado
+        pode ser reaproveitado: se as mesmas entradas já foram salvas, o
+        arquivo em outputs/maps/.cache é copiado sem montar o mapa.
+        
         Args:
             delivery_points: Lista de pontos de entrega
             routes: Lista de rotas
@@ -449,8 +677,25 @@ class FoliumVisualizer:
         Returns:
             Path do arquivo salvo
         """
+        filepath = self._map_output_path(filename)
+        cache_key = self._map_cache_key(delivery_points, routes, vehicles, zoom_start, True)
+        cache_dir = filepath.parent / ".cache"
+        cached = cache_dir / f"{cache_key}.html"
+        
+        if cached.exists():
+            shutil.copyfile(cached, filepath)
+            cached.touch()
+            self._print_saved(filepath)
+            return filepath
+        
         mapa = self.create_map(delivery_points, routes, vehicles, zoom_start)
-        return self.save_map(mapa, filename)
+        filepath = self.save_map(mapa, filepath.name)
+        
+        cache_dir.mkdir(exist_ok=True)
+        shutil.copyfile(filepath, cached)
+        self._prune_map_cache(cache_dir)
+        
+        return filepath
 
 
 # Função auxiliar para uso rápido
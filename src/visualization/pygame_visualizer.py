@@ -9,42 +9,55 @@ import pygame
 from pygame.locals import *
 import matplotlib
 matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_agg import FigureCanvasAgg
+from functools import lru_cache
 from typing import List, Tuple, Optional, Dict
+from collections import deque
+import atexit
+import queue
 import sys
+import threading
+import numpy as np
 
-# Cores
-WHITE = (255, 255, 255)
-BLACK = (0, 0, 0)
-RED = (255, 0, 0)
-BLUE = (0, 0, 255)
-GREEN = (0, 255, 0)
-ORANGE = (255, 165, 0)
-PURPLE = (128, 0, 128)
-GRAY = (128, 128, 128)
+try:
+    from scipy.spatial import cKDTree
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+# Cores (pygame.Color: já no formato usado pelas funções de desenho)
+WHITE = pygame.Color(255, 255, 255)
+BLACK = pygame.Color(0, 0, 0)
+RED = pygame.Color(255, 0, 0)
+BLUE = pygame.Color(0, 0, 255)
+GREEN = pygame.Color(0, 255, 0)
+ORANGE = pygame.Color(255, 165, 0)
+PURPLE = pygame.Color(128, 0, 128)
+GRAY = pygame.Color(128, 128, 128)
 
 # Cores por prioridade
 PRIORITY_COLORS = {
-    'critico': (255, 0, 0),      # Vermelho
-    'alto': (255, 165, 0),        # Laranja
-    'medio': (255, 255, 0),       # Amarelo
-    'baixo': (0, 255, 0)          # Verde
+    'critico': pygame.Color(255, 0, 0),      # Vermelho
+    'alto': pygame.Color(255, 165, 0),        # Laranja
+    'medio': pygame.Color(255, 255, 0),       # Amarelo
+    'baixo': pygame.Color(0, 255, 0)          # Verde
 }
 
 # Cores por veículo (para diferentes rotas)
 VEHICLE_COLORS = [
-    (0, 0, 255),      # Azul
-    (255, 0, 255),    # Magenta
-    (0, 255, 255),    # Ciano
-    (255, 128, 0),    # Laranja escuro
-    (128, 0, 255),    # Roxo
+    pygame.Color(0, 0, 255),      # Azul
+    pygame.Color(255, 0, 255),    # Magenta
+    pygame.Color(0, 255, 255),    # Ciano
+    pygame.Color(255, 128, 0),    # Laranja escuro
+    pygame.Color(128, 0, 255),    # Roxo
 ]
 
 
+@lru_cache(maxsize=None)
 def get_point_label(index: int) -> str:
     """
-    Gera label para ponto de entrega baseado no índice.
+    Gera label para ponto de entrega baseado no índice (memoizado).
     
     0-25: A-Z
     26-51: A1-Z1
@@ -74,7 +87,24 @@ class PygameVisualizer:
     mostrando as rotas atuais e gráficos de convergência.
     """
     
-    def __init__(self, width: int = 1200, height: int = 600, fps: int = 30):
+    # Limite de textos renderizados mantidos em cache
+    _TEXT_CACHE_MAX = 1024
+    
+    # Eventos tratados por handle_events (MOUSEMOTION é lido à parte)
+    _EVENT_TYPES = [QUIT, VIDEORESIZE, KEYDOWN, MOUSEBUTTONDOWN]
+    
+    # Janela descoberta ou restaurada: o conteúdo precisa ser redesenhado
+    _EXPOSE_TYPES = [VIDEOEXPOSE, WINDOWEXPOSED, WINDOWRESTORED, WINDOWSHOWN]
+    
+    # Texto e cor do indicador da fase de LLM (set_llm_status)
+    _LLM_STATUS_STYLE = {
+        "running": ("LLM: gerando instrucoes e relatorio...", ORANGE),
+        "done": ("LLM: instrucoes e relatorio salvos", GREEN),
+        "error": ("LLM: concluido com erros (ver terminal)", RED),
+    }
+    
+    def __init__(self, width: int = 1200, height: int = 600, fps: int = 30,
+                 plot_redraw_every: int = 10):
         """
         Inicializa o visualizador Pygame.
         
@@ -82,6 +112,7 @@ class PygameVisualizer:
             width: Largura da janela
             height: Altura da janela
             fps: Frames por segundo
+            plot_redraw_every: Redesenhar o gráfico de convergência a cada N atualizações
         """
         pygame.init()
         self.width = width
@@ -94,21 +125,114 @@ class PygameVisualizer:
         pygame.display.set_caption("Otimização de Rotas Médicas - Evolução em Tempo Real")
         self.clock = pygame.time.Clock()
         
+        # Só os eventos tratados entram na fila; o resto é descartado no SDL
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(self._EVENT_TYPES + self._EXPOSE_TYPES + [MOUSEMOTION])
+        
         self.running = True
         self.paused = False
-        
-        # Histórico
-        self.generation_history = []
-        self.fitness_history = []
+        self.llm_status: Optional[str] = None  # "running", "done", "error" ou None
+        
+        # Fontes criadas uma única vez (evita reabrir a fonte a cada frame)
+        self._fonts = {size: pygame.font.Font(None, size) for size in (14, 16, 18, 20, 22, 24, 26)}
+        self._text_cache: Dict[tuple, pygame.Surface] = {}
+        
+        # Histórico: últimos history_maxlen pontos completos; os mais antigos
+        # ficam numa versão amostrada (o custo do plot não cresce com o AG)
+        self.history_maxlen = 2000
+        self.generation_history = deque(maxlen=self.history_maxlen)
+        self.fitness_history = deque(maxlen=self.history_maxlen)
+        self._gen_ds: List[int] = []
+        self._fit_ds: List[float] = []
+        self._history_stride = 1
+        self._history_evicted = 0
+        self._history_count = 0
+        
+        # Último snapshot recebido do AG (set_state) e controle de redesenho
+        self._state: Optional[tuple] = None
+        self._state_lock = threading.Lock()
+        self._needs_redraw = False
+        
+        # Figura do gráfico de convergência (criada uma vez e reaproveitada;
+        # só a thread de plotagem mexe nela)
+        self._conv_fig = None
+        self._conv_ax = None
+        self._conv_line = None
+        self._conv_canvas = None
+        self._conv_size = None
+        self._conv_surf = None
+        self._conv_last_draw = 0
+        
+        # Thread de plotagem: recebe snapshots numa fila de 1 posição e
+        # publica o raster pronto em _conv_ready (buffer duplo)
+        self._conv_queue: queue.Queue = queue.Queue(maxsize=1)
+        self._conv_thread: Optional[threading.Thread] = None
+        self._conv_req_size = None
+        self._conv_ready = None
+        self._conv_ready_used = None
+        self.plot_redraw_every = max(1, plot_redraw_every)
         
         # Filtro de veículos (para visualização seletiva)
         self.selected_vehicle = -1  # -1 = todos, 0+ = veículo específico
         self.vehicle_buttons = []  # Lista de retângulos dos botões
+        self._button_rects: List[pygame.Rect] = []  # Geometria (coordenadas do painel)
+        self._button_layout_key = None
         self.num_vehicles = 0  # Será atualizado dinamicamente
+        
+        # Coordenadas já normalizadas para pixels (reaproveitadas entre frames)
+        self._coord_cache_key = None
+        self._coord_src = None
+        self._points_pixels = None
+        self._depot_pixel = None
+        
+        # Índice espacial dos pontos em pixels (para hover do mouse)
+        self._kdtree = None
+        self._points_arr = None
+        self._hover_idx = None
+        self.hover_radius = 12
+        
+        # Sprites dos marcadores dos pontos de entrega
+        self._point_sprites: List[pygame.Surface] = []
+        self._point_sprites_key = None
+        
+        # Pixels dos pontos + depósito (última linha) para montar as rotas
+        self._pixels_arr: Optional[np.ndarray] = None
+        
+        # Fundo translúcido do painel de detalhes (recriado só no resize)
+        self._details_bg: Optional[pygame.Surface] = None
+        
+        # Cache de painéis da UI já rasterizados
+        self._ui_cache: Dict[tuple, tuple] = {}
+        self._panel_key = None
+        
+        # Regiões da tela alteradas no frame (display.update só nelas)
+        self._dirty_rects: List[pygame.Rect] = []
+        self._map_rect: Optional[pygame.Rect] = None
+        self._full_redraw = True
     
-    def handle_events(self):
-        """Processa eventos do Pygame, incluindo cliques nos botões."""
-        for event in pygame.event.get():
+    def handle_events(self, first_event: Optional[pygame.event.Event] = None):
+        """
+        Processa eventos do Pygame, incluindo cliques nos botões.
+        
+        Args:
+            first_event: Evento já retirado da fila (por event.wait), processado antes dos demais
+        """
+        # Movimentos do mouse chegam em rajadas: só a última posição importa
+        motions = pygame.event.get(MOUSEMOTION)
+        events = pygame.event.get(self._EVENT_TYPES + self._EXPOSE_TYPES)
+        if first_event is not None:
+            if first_event.type == MOUSEMOTION:
+                motions.insert(0, first_event)
+            else:
+                events.insert(0, first_event)
+        
+        if motions:
+            hover_idx = self.find_point_at(motions[-1].pos)
+            if hover_idx != self._hover_idx:
+                self._hover_idx = hover_idx
+                self._needs_redraw = True
+        
+        for event in events:
             if event.type == pygame.QUIT:
                 self.running = False
             elif event.type == pygame.VIDEORESIZE:
@@ -116,14 +240,21 @@ class PygameVisualizer:
                 self.plot_x_offset = self.width // 2
                 self.ui_scale = max(0.7, min(self.width / 1920, self.height / 1080))
                 self.screen = pygame.display.set_mode((self.width, self.height), pygame.RESIZABLE)
+                self._ui_cache.clear()
+                self._full_redraw = True
+                self._needs_redraw = True
+            elif event.type in self._EXPOSE_TYPES:
+                self._full_redraw = True
+                self._needs_redraw = True
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_q:
                     self.running = False
                 elif event.key == pygame.K_SPACE:
                     self.paused = not self.paused
+                    self._needs_redraw = True
                 elif event.key == pygame.K_s:
                     # Salvar screenshot
-                    pygame.image.save(self.screen, f"screenshot_gen_{len(self.generation_history)}.png")
+                    pygame.image.save(self.screen, f"screenshot_gen_{self._history_count}.png")
                     print("Screenshot salvo!")
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 # Detectar clique nos botões de veículos
@@ -137,8 +268,74 @@ class PygameVisualizer:
                         else:
                             self.selected_vehicle = i - 1  # Índice do veículo
                             print(f"Mostrando apenas Veiculo {i}")
+                        self._ui_cache.clear()
+                        self._full_redraw = True
+                        self._needs_redraw = True
                         break
     
+    def _text(self, size: int, text: str, color: Tuple[int, int, int]) -> pygame.Surface:
+        """
+        Renderiza texto com cache (cada combinação é rasterizada uma única vez).
+        
+        Args:
+            size: Tamanho da fonte
+            text: Texto a renderizar
+            color: Cor do texto
+            
+        Returns:
+            Surface do texto (já em formato do display)
+        """
+        key = (size, text, tuple(color))  # pygame.Color não é hashable
+        surf = self._text_cache.get(key)
+        if surf is None:
+            # Textos dinâmicos (métricas) geram chaves novas; limitar o cache
+            if len(self._text_cache) >= self._TEXT_CACHE_MAX:
+                self._text_cache.clear()
+            surf = self._fonts[size].render(text, True, color).convert_alpha()
+            self._text_cache[key] = surf
+        return surf
+    
+    def _build_point_index(self, points_pixels: List[Tuple[int, int]]):
+        """
+        Monta o índice espacial dos pontos em pixels (refeito só quando a
+        normalização muda).
+        
+        Args:
+            points_pixels: Lista de (x, y) dos pontos de entrega
+        """
+        self._hover_idx = None
+        if not points_pixels:
+            self._points_arr = None
+            self._kdtree = None
+            return
+        
+        self._points_arr = np.asarray(points_pixels, dtype=np.float64)
+        self._kdtree = cKDTree(self._points_arr) if SCIPY_AVAILABLE else None
+    
+    def find_point_at(self, pos: Tuple[int, int]) -> Optional[int]:
+        """
+        Encontra o ponto de entrega sob a posição do mouse.
+        
+        Usa cKDTree (O(log n)) quando o scipy está disponível; senão faz a
+        busca vetorizada com NumPy.
+        
+        Args:
+            pos: Posição (x, y) em pixels
+            
+        Returns:
+            Índice do ponto ou None se nenhum estiver dentro de hover_radius
+        """
+        if self._points_arr is None:
+            return None
+        
+        if self._kdtree is not None:
+            dist, idx = self._kdtree.query(pos, distance_upper_bound=self.hover_radius)
+            return int(idx) if np.isfinite(dist) else None
+        
+        dist2 = ((self._points_arr - pos) ** 2).sum(axis=1)
+        idx = int(dist2.argmin())
+        return idx if dist2[idx] <= self.hover_radius ** 2 else None
+    
     def normalize_coordinates(self, 
                              coords: List[Tuple[float, float]], 
                              margin: int = 50) -> List[Tuple[int, int]]:
@@ -152,33 +349,24 @@ class PygameVisualizer:
         Returns:
             Lista de (x, y) em pixels
         """
-        if not coords:
+        if len(coords) == 0:
             return []
         
-        # Encontrar limites
-        lats = [c[0] for c in coords]
-        lons = [c[1] for c in coords]
-        
-        min_lat, max_lat = min(lats), max(lats)
-        min_lon, max_lon = min(lons), max(lons)
+        # Limites e escala vetorizados (colunas: latitude, longitude)
+        arr = np.asarray(coords, dtype=np.float64)
+        mins = arr.min(axis=0)
+        maxs = arr.max(axis=0)
+        ranges = np.where(maxs == mins, 1.0, maxs - mins)
         
         # Calcular escala
         available_width = self.plot_x_offset - 2 * margin
         available_height = self.height - 2 * margin
+        scale = min(available_width / ranges[1], available_height / ranges[0])
         
-        lat_range = max_lat - min_lat if max_lat != min_lat else 1
-        lon_range = max_lon - min_lon if max_lon != min_lon else 1
-        
-        scale_x = available_width / lon_range
-        scale_y = available_height / lat_range
-        scale = min(scale_x, scale_y)
-        
-        # Normalizar
-        normalized = []
-        for lat, lon in coords:
-            x = int((lon - min_lon) * scale + margin)
-            y = int((max_lat - lat) * scale + margin)  # Inverter Y
-            normalized.append((x, y))
+        # Normalizar (Y invertido)
+        xs = ((arr[:, 1] - mins[1]) * scale + margin).astype(np.int32)
+        ys = ((maxs[0] - arr[:, 0]) * scale + margin).astype(np.int32)
+        normalized = list(zip(xs.tolist(), ys.tolist()))
         
         return normalized
     
@@ -194,19 +382,42 @@ class PygameVisualizer:
             priorities: Lista de prioridades correspondentes
             radius: Raio dos círculos
         """
-        font = pygame.font.Font(None, 20)
+        # Sprites (círculo + borda + letra) rasterizados uma vez por conjunto
+        # de prioridades; a cada frame vai tudo numa única chamada blits()
+        key = (tuple(priorities), radius)
+        if self._point_sprites_key != key:
+            self._point_sprites = [self._render_point_sprite(i, priority, radius)
+                                   for i, priority in enumerate(priorities)]
+            self._point_sprites_key = key
+        
+        c = radius + 2  # Centro do sprite
+        sprites = self._point_sprites
+        self.screen.blits([(sprites[i], (x - c, y - c))
+                           for i, (x, y) in enumerate(points[:len(sprites)])], False)
+    
+    def _render_point_sprite(self, index: int, priority: str, radius: int) -> pygame.Surface:
+        """
+        Rasteriza o marcador de um ponto de entrega.
         
-        for i, (point, priority) in enumerate(zip(points, priorities)):
-            color = PRIORITY_COLORS.get(priority, GRAY)
-            pygame.draw.circle(self.screen, color, point, radius)
-            # Borda preta
-            pygame.draw.circle(self.screen, BLACK, point, radius, 2)
+        Args:
+            index: Índice do ponto (define a letra)
+            priority: Prioridade (define a cor)
+            radius: Raio do círculo
             
-            # Desenhar letra (A, B, C, ... A1, B1, ...)
-            label = get_point_label(i)
-            text = font.render(label, True, BLACK)
-            text_rect = text.get_rect(center=point)
-            self.screen.blit(text, text_rect)
+        Returns:
+            Surface com fundo transparente centrada no ponto
+        """
+        c = radius + 2
+        sprite = pygame.Surface((2 * c, 2 * c), SRCALPHA).convert_alpha()
+        color = PRIORITY_COLORS.get(priority, GRAY)
+        pygame.draw.circle(sprite, color, (c, c), radius)
+        # Borda preta
+        pygame.draw.circle(sprite, BLACK, (c, c), radius, 2)
+        
+        # Desenhar letra (A, B, C, ... A1, B1, ...)
+        text = self._text(20, get_point_label(index), BLACK)
+        sprite.blit(text, text.get_rect(center=(c, c)))
+        return sprite
     
     def draw_route(self, 
                    route: List[Tuple[int, int]], 
@@ -226,9 +437,7 @@ class PygameVisualizer:
             return
         
         color = VEHICLE_COLORS[vehicle_index % len(VEHICLE_COLORS)]
-        
-        # Desenhar linha fechada (volta ao depósito)
-        pygame.draw.lines(self.screen, color, True, route, width)
+        self.draw_route_closed(route, color, width)
         
         if draw_arrows:
             # Desenhar setas pequenas indicando direção
@@ -241,6 +450,18 @@ class PygameVisualizer:
                 # Desenhar pequeno círculo
                 pygame.draw.circle(self.screen, color, (mid_x, mid_y), 3)
     
+    def draw_route_closed(self, route: List[Tuple[int, int]], color, width: int):
+        """
+        Desenha a rota como linha fechada (volta ao depósito), sem as opções
+        de draw_route; é o caminho usado a cada frame em update().
+        
+        Args:
+            route: Lista de coordenadas (x, y) em pixels (ao menos 2)
+            color: Cor da linha
+            width: Espessura da linha
+        """
+        pygame.draw.lines(self.screen, color, True, route, width)
+    
     def draw_depot(self, depot: Tuple[int, int], size: int = 12):
         """
         Desenha o depósito (hospital central).
@@ -281,13 +502,75 @@ class PygameVisualizer:
             y_offset: Deslocamento vertical inicial
         """
         self.num_vehicles = num_vehicles
-        self.vehicle_buttons = []
         
-        font_title = pygame.font.Font(None, 26)
-        font_button = pygame.font.Font(None, 22)
-        font_legend = pygame.font.Font(None, 18)
+        # Painel rasterizado uma vez por estado (seleção, nº de veículos, layout)
+        key = (self.selected_vehicle, num_vehicles, self.plot_x_offset, self.height, y_offset)
+        cached = self._ui_cache.get(key)
+        if cached is None:
+            panel = pygame.Surface((self.width - self.plot_x_offset, self.height))
+            panel.fill(WHITE)
+            buttons, bottom = self._draw_filter_panel(panel, num_vehicles, y_offset)
+            panel = panel.subsurface((0, 0, panel.get_width(), min(bottom, self.height))).convert()
+            buttons = [rect.move(self.plot_x_offset, 0) for rect in buttons]
+            cached = self._ui_cache[key] = (panel, buttons, bottom)
+        
+        # Painel mudou de tamanho/estado: o layout abaixo dele se desloca
+        if key != self._panel_key:
+            self._panel_key = key
+            self._full_redraw = True
+        
+        panel, self.vehicle_buttons, bottom = cached
+        self.screen.blit(panel, (self.plot_x_offset, 0))
+        return bottom
+    
+    def _layout_buttons(self, num_vehicles: int, y_offset: int) -> List[pygame.Rect]:
+        """
+        Calcula os retângulos dos botões de filtro ("Todos" + um por veículo),
+        em coordenadas do painel. O resultado é reaproveitado enquanto o número
+        de veículos e a posição não mudam.
+        
+        Args:
+            num_vehicles: Número total de veículos
+            y_offset: Deslocamento vertical inicial do painel
+            
+        Returns:
+            Lista de pygame.Rect dos botões
+        """
+        key = (num_vehicles, y_offset)
+        if self._button_layout_key == key:
+            return self._button_rects
+        
+        x = 20
+        y = y_offset + 40  # Abaixo do título da seção
+        button_width = 150  # Reduzido de 160
+        button_height = 38  # Reduzido de 42
         
-        x = self.plot_x_offset + 20
+        rects = [pygame.Rect(x, y, button_width, button_height)]
+        y += button_height + 8  # Reduzido de 12 para 8
+        for _ in range(num_vehicles):
+            rects.append(pygame.Rect(x, y, button_width, button_height))
+            y += button_height + 6  # Reduzido de 10 para 6
+        
+        self._button_rects = rects
+        self._button_layout_key = key
+        return rects
+    
+    def _draw_filter_panel(self, surface: pygame.Surface, num_vehicles: int, y_offset: int):
+        """
+        Desenha botões de filtro e legenda de prioridades em uma surface do painel.
+        
+        Args:
+            surface: Surface do painel direito (origem em plot_x_offset)
+            num_vehicles: Número total de veículos
+            y_offset: Deslocamento vertical inicial
+            
+        Returns:
+            Tupla (retângulos dos botões em coordenadas do painel, posição Y final)
+        """
+        # Geometria dos botões (recalculada só quando nº de veículos/posição muda)
+        vehicle_buttons = self._layout_buttons(num_vehicles, y_offset)
+        
+        x = 20
         y = y_offset
         
         # ==========================================
@@ -295,18 +578,13 @@ class PygameVisualizer:
         # ==========================================
         
         # Título da seção
-        title = font_title.render("FILTRAR ROTAS:", True, BLACK)
-        self.screen.blit(title, (x, y))
-        y += 40
+        title = self._text(26, "FILTRAR ROTAS:", BLACK)
+        surface.blit(title, (x, y))
         
-        # Botão "TODOS" - COMPACTO
-        button_width = 150  # Reduzido de 160
-        button_height = 38  # Reduzido de 42
         button_radius = 15  # Reduzido de 20
         
         # Botão "Todos os Veículos"
-        button_rect = pygame.Rect(x, y, button_width, button_height)
-        self.vehicle_buttons.append(button_rect)
+        button_rect = vehicle_buttons[0]
         
         # Cor do botão (destacar se selecionado)
         if self.selected_vehicle == -1:
@@ -319,20 +597,17 @@ class PygameVisualizer:
             icon = "[ ]"
         
         # Desenhar botão arredondado
-        self.draw_rounded_rect(self.screen, button_color, button_rect, button_radius, BLACK, 3)
+        self.draw_rounded_rect(surface, button_color, button_rect, button_radius, BLACK, 3)
         
         # Texto do botão com ícone
-        text = font_button.render(f"{icon} TODOS", True, text_color)
+        text = self._text(22, f"{icon} TODOS", text_color)
         text_rect = text.get_rect(center=button_rect.center)
-        self.screen.blit(text, text_rect)
-        
-        y += button_height + 8  # Reduzido de 12 para 8
+        surface.blit(text, text_rect)
         
         # Botões individuais para cada veículo - Arredondados
         
         for i in range(num_vehicles):
-            button_rect = pygame.Rect(x, y, button_width, button_height)
-            self.vehicle_buttons.append(button_rect)
+            button_rect = vehicle_buttons[i + 1]
             
             # Cor do botão
             if self.selected_vehicle == i:
@@ -346,34 +621,35 @@ class PygameVisualizer:
                 icon = "[ ]"
             
             # Desenhar botão arredondado
-            self.draw_rounded_rect(self.screen, button_color, button_rect, button_radius, BLACK, 2)
+            self.draw_rounded_rect(surface, button_color, button_rect, button_radius, BLACK, 2)
             
             # Desenhar preview da linha colorida (se não selecionado)
             if self.selected_vehicle != i:
                 line_color = VEHICLE_COLORS[i % len(VEHICLE_COLORS)]
-                line_start = (x + 12, y + button_height // 2)
-                line_end = (x + 42, y + button_height // 2)
-                pygame.draw.line(self.screen, line_color, line_start, line_end, 5)
-                pygame.draw.circle(self.screen, line_color, line_start, 3)
-                pygame.draw.circle(self.screen, line_color, line_end, 3)
+                line_start = (button_rect.x + 12, button_rect.centery)
+                line_end = (button_rect.x + 42, button_rect.centery)
+                pygame.draw.line(surface, line_color, line_start, line_end, 5)
+                pygame.draw.circle(surface, line_color, line_start, 3)
+                pygame.draw.circle(surface, line_color, line_end, 3)
             
             # Texto do botão
-            text = font_button.render(f"{icon} Veiculo {i + 1}", True, text_color)
+            text = self._text(22, f"{icon} Veiculo {i + 1}", text_color)
             text_rect = text.get_rect(center=(button_rect.centerx + 15, button_rect.centery))
-            self.screen.blit(text, text_rect)
-            
-            y += button_height + 6  # Reduzido de 10 para 6
+            surface.blit(text, text_rect)
+        
+        # Fim da coluna de botões (mesmo espaçamento que havia entre eles)
+        y = vehicle_buttons[-1].bottom + (6 if num_vehicles else 8)
         
         # ==========================================
         # SEÇÃO 2: LEGENDA DE PRIORIDADES (DIREITA AO LADO DOS BOTÕES)
         # ==========================================
         
-        legend_x = x + button_width + 30  # Ao lado dos botões
+        legend_x = x + vehicle_buttons[0].width + 30  # Ao lado dos botões
         legend_y = y_offset + 40
         
         # Título da legenda
-        legend_title = font_title.render("PRIORIDADES:", True, BLACK)
-        self.screen.blit(legend_title, (legend_x, legend_y))
+        legend_title = self._text(26, "PRIORIDADES:", BLACK)
+        surface.blit(legend_title, (legend_x, legend_y))
         legend_y += 40
         
         priority_descriptions = {
@@ -389,13 +665,13 @@ class PygameVisualizer:
         for priority, color in PRIORITY_COLORS.items():
             # Desenhar círculo da cor (mais destaque)
             circle_center = (legend_x + 15, legend_y + item_height // 2)
-            pygame.draw.circle(self.screen, color, circle_center, icon_size)
-            pygame.draw.circle(self.screen, BLACK, circle_center, icon_size, 3)
+            pygame.draw.circle(surface, color, circle_center, icon_size)
+            pygame.draw.circle(surface, BLACK, circle_center, icon_size, 3)
             
             # Nome da prioridade
             priority_name = priority_descriptions[priority]
-            text = font_legend.render(priority_name, True, BLACK)
-            self.screen.blit(text, (legend_x + 40, legend_y + 5))
+            text = self._text(18, priority_name, BLACK)
+            surface.blit(text, (legend_x + 40, legend_y + 5))
             
             # Descrição menor
             if priority == 'critico':
@@ -407,12 +683,12 @@ class PygameVisualizer:
             else:
                 desc = "Max 24h"
             
-            desc_text = font_legend.render(desc, True, GRAY)
-            self.screen.blit(desc_text, (legend_x + 40, legend_y + 23))
+            desc_text = self._text(18, desc, GRAY)
+            surface.blit(desc_text, (legend_x + 40, legend_y + 23))
             
             legend_y += item_height + 2
         
-        return max(y, legend_y) + 20  # Retornar posição Y final
+        return vehicle_buttons, max(y, legend_y) + 20  # Retornar posição Y final
     
     def draw_legend(self, y_offset: int = 10):
         """
@@ -421,17 +697,13 @@ class PygameVisualizer:
         Args:
             y_offset: Deslocamento vertical
         """
-        font_title = pygame.font.Font(None, 24)
-        font_text = pygame.font.Font(None, 20)
-        font_small = pygame.font.Font(None, 16)
-        
         x = self.plot_x_offset + 15
         y = y_offset
         
         # ==========================================
         # SEÇÃO 2: DEPÓSITO (HOSPITAL CENTRAL)
         # ==========================================
-        title = font_title.render("DEPÓSITO:", True, BLACK)
+        title = self._text(24, "DEPÓSITO:", BLACK)
         self.screen.blit(title, (x, y))
         y += 30
         
@@ -440,9 +712,9 @@ class PygameVisualizer:
         pygame.draw.rect(self.screen, BLACK, rect)
         pygame.draw.rect(self.screen, RED, rect, 3)
         
-        text = font_text.render("HOSPITAL CENTRAL", True, BLACK)
+        text = self._text(20, "HOSPITAL CENTRAL", BLACK)
         self.screen.blit(text, (x + 30, y))
-        desc = font_small.render("Ponto de partida e chegada", True, GRAY)
+        desc = self._text(16, "Ponto de partida e chegada", GRAY)
         self.screen.blit(desc, (x + 30, y + 15))
         
         y += 50
@@ -450,7 +722,7 @@ class PygameVisualizer:
         # ==========================================
         # SEÇÃO 3: ROTAS DOS VEÍCULOS (LINHAS)
         # ==========================================
-        title = font_title.render("ROTAS (LINHAS):", True, BLACK)
+        title = self._text(24, "ROTAS (LINHAS):", BLACK)
         self.screen.blit(title, (x, y))
         y += 30
         
@@ -467,7 +739,7 @@ class PygameVisualizer:
             pygame.draw.line(self.screen, color, (x + 5, y + 10), (x + 40, y + 10), 4)
             
             # Nome do veículo
-            text = font_text.render(route_names[i], True, BLACK)
+            text = self._text(20, route_names[i], BLACK)
             self.screen.blit(text, (x + 50, y + 2))
             
             y += 28
@@ -477,7 +749,7 @@ class PygameVisualizer:
         # ==========================================
         # SEÇÃO 4: INFORMAÇÕES ADICIONAIS
         # ==========================================
-        title = font_title.render("COMO LER O MAPA:", True, BLACK)
+        title = self._text(24, "COMO LER O MAPA:", BLACK)
         self.screen.blit(title, (x, y))
         y += 30
         
@@ -491,7 +763,7 @@ class PygameVisualizer:
         ]
         
         for tip in tips:
-            text = font_small.render(tip, True, BLACK)
+            text = self._text(16, tip, BLACK)
             self.screen.blit(text, (x + 5, y))
             y += 22
     
@@ -509,13 +781,11 @@ class PygameVisualizer:
             num_routes: Número de rotas/veículos
             y_offset: Deslocamento vertical
         """
-        font_title = pygame.font.Font(None, 20)  # Reduzido de 24
-        font_text = pygame.font.Font(None, 16)  # Reduzido de 20
         x = self.plot_x_offset + 15
         y = y_offset
         
         # Título da seção
-        title = font_title.render("METRICAS:", True, BLACK)
+        title = self._text(20, "METRICAS:", BLACK)
         self.screen.blit(title, (x, y))
         y += 22  # Reduzido de 35
         
@@ -527,7 +797,7 @@ class PygameVisualizer:
         ]
         
         for metric in metrics:
-            text = font_text.render(metric, True, BLACK)
+            text = self._text(16, metric, BLACK)
             self.screen.blit(text, (x, y))
             y += 18  # Reduzido de 30
         
@@ -536,6 +806,21 @@ class PygameVisualizer:
         # Controles - REMOVIDOS para economizar espaço
         # (usuário já sabe os controles do menu)
     
+    def draw_llm_status(self, y_offset: int):
+        """
+        Desenha o indicador da geração de instruções/relatório pela LLM.
+        
+        Args:
+            y_offset: Posição Y do indicador
+        """
+        label, color = self._LLM_STATUS_STYLE[self.llm_status]
+        text = self._text(16, label, BLACK)
+        rect = text.get_rect(topleft=(self.plot_x_offset + 15, y_offset)).inflate(16, 8)
+        rect.x += 8
+        self.draw_rounded_rect(self.screen, color, rect, radius=6,
+                               border_color=BLACK, border_width=1)
+        self.screen.blit(text, text.get_rect(center=rect.center))
+    
     def draw_ag_statistics(self, ag_stats: Dict, y_offset: int = 625):
         """
         Desenha estatísticas do algoritmo genético (COMPACTO).
@@ -547,13 +832,11 @@ class PygameVisualizer:
         if not ag_stats:
             return
         
-        font_title = pygame.font.Font(None, 20)  # Reduzido de 22
-        font_text = pygame.font.Font(None, 16)  # Reduzido de 18
         x = self.plot_x_offset + 15
         y = y_offset
         
         # Título
-        title = font_title.render("ESTATISTICAS DO AG:", True, BLACK)
+        title = self._text(20, "ESTATISTICAS DO AG:", BLACK)
         self.screen.blit(title, (x, y))
         y += 22  # Reduzido de 25
         
@@ -566,21 +849,21 @@ class PygameVisualizer:
         ]
         
         for stat in stats_text:
-            text = font_text.render(stat, True, BLACK)
+            text = self._text(16, stat, BLACK)
             self.screen.blit(text, (x, y))
             y += 17  # Reduzido de 20
         
         # Tipos de mutação - COMPACTO (mostrar apenas se houver)
         if ag_stats.get('mutation_types') and len(ag_stats['mutation_types']) > 0:
             y += 3  # Reduzido de 5
-            text = font_text.render("Mutacoes:", True, BLACK)
+            text = self._text(16, "Mutacoes:", BLACK)
             self.screen.blit(text, (x, y))
             y += 15  # Reduzido de 18
             
             # Mostrar apenas os 3 tipos mais comuns
             sorted_muts = sorted(ag_stats['mutation_types'].items(), key=lambda x: x[1], reverse=True)[:3]
             for mut_type, count in sorted_muts:
-                text = font_text.render(f"  {mut_type}: {count}", True, GRAY)
+                text = self._text(16, f"  {mut_type}: {count}", GRAY)
                 self.screen.blit(text, (x + 10, y))
                 y += 14  # Reduzido de 16
     
@@ -595,24 +878,22 @@ class PygameVisualizer:
         if not route_details or 'routes' not in route_details:
             return
         
-        font_title = pygame.font.Font(None, 18)
-        font_text = pygame.font.Font(None, 14)
-        
         # Área para detalhes (parte inferior da tela) - COMPACTA
         detail_area_y = self.height - 150  # Reduzido de 200 para 150
         x = 20
         y = detail_area_y + 8
         
-        # Fundo semi-transparente - MENOR
-        detail_bg = pygame.Surface((self.width - 40, 135))  # Reduzido de 180 para 135
-        detail_bg.fill((240, 240, 240))
-        detail_bg.set_alpha(230)
-        self.screen.blit(detail_bg, (20, detail_area_y))
+        # Fundo semi-transparente - MENOR (criado uma vez por tamanho de janela)
+        bg_size = (self.width - 40, 135)  # Reduzido de 180 para 135
+        if self._details_bg is None or self._details_bg.get_size() != bg_size:
+            self._details_bg = pygame.Surface(bg_size, SRCALPHA).convert_alpha()
+            self._details_bg.fill((240, 240, 240, 230))
+        self.screen.blit(self._details_bg, (20, detail_area_y))
         
         # Título
-        title = font_title.render(f"DETALHES DAS ROTAS - Fitness: {route_details.get('fitness', 0):.2f} | "
-                                 f"Distancia: {route_details.get('total_distance_km', 0):.2f} km | "
-                                 f"Veiculos: {route_details.get('num_vehicles', 0)}", True, BLACK)
+        title = self._text(18, f"DETALHES DAS ROTAS - Fitness: {route_details.get('fitness', 0):.2f} | "
+                           f"Distancia: {route_details.get('total_distance_km', 0):.2f} km | "
+                           f"Veiculos: {route_details.get('num_vehicles', 0)}", BLACK)
         self.screen.blit(title, (x + 10, y))
         y += 25
         
@@ -632,7 +913,7 @@ class PygameVisualizer:
             # Linha colorida do veículo - COMPACTA
             pygame.draw.line(self.screen, color, (col_x, col_y + 4), (col_x + 25, col_y + 4), 3)
             
-            text = font_title.render(vehicle_name, True, BLACK)
+            text = self._text(18, vehicle_name, BLACK)
             self.screen.blit(text, (col_x + 30, col_y))
             col_y += 16
             
@@ -645,7 +926,7 @@ class PygameVisualizer:
             ]
             
             for detail in details:
-                text = font_text.render(detail, True, GRAY)
+                text = self._text(14, detail, GRAY)
                 self.screen.blit(text, (col_x, col_y))
                 col_y += 12  # Reduzido de 14 para 12
     
@@ -660,36 +941,175 @@ class PygameVisualizer:
             plot_height = max(200, plot_height)
             plot_width = int(self.width * 0.22)
             plot_width = max(320, plot_width)
-            dpi = 85
-            fig_w = plot_width / dpi
-            fig_h = plot_height / dpi
-
-            # Criar figura matplotlib MENOR
-            fig, ax = plt.subplots(figsize=(fig_w, fig_h), dpi=dpi)
-            ax.plot(self.generation_history, self.fitness_history, 'b-', linewidth=1.5)
-            ax.set_xlabel('Geracao', fontsize=9)
-            ax.set_ylabel('Fitness', fontsize=9)
-            ax.set_title('Convergencia do AG', fontsize=10)
-            ax.tick_params(axis='both', labelsize=8)
-            ax.grid(True, alpha=0.3, linewidth=0.5)
-            plt.tight_layout(pad=0.5)
-            
-            # Converter para surface Pygame
-            canvas = FigureCanvasAgg(fig)
-            canvas.draw()
-            
-            buf = canvas.buffer_rgba()
-            size = canvas.get_width_height()
-            
-            # Criar surface do pygame - POSIÇÃO FIXA NO LADO DIREITO
-            surf = pygame.image.frombuffer(buf, size, "RGBA")
-            self.screen.blit(surf, (self.plot_x_offset + int(10 * self.ui_scale), y_offset))
-            
-            plt.close(fig)
+            
+            # Pedir novo raster só a cada plot_redraw_every atualizações (ou
+            # se o tamanho mudou); a rasterização roda na thread de plotagem
+            num_points = self._history_count
+            size = (plot_width, plot_height)
+            if (self._conv_req_size != size
+                    or num_points - self._conv_last_draw >= self.plot_redraw_every):
+                self._request_convergence_plot(size)
+                self._conv_last_draw = num_points
+            
+            # Copiar o último raster publicado pela thread (se houver novo) para
+            # a surface já alocada no formato do display (realocada só quando o
+            # tamanho muda); RGBX ignora o alfa, então o blit é cópia direta
+            ready = self._conv_ready
+            redrawn = False
+            if ready is not None and ready is not self._conv_ready_used:
+                buf, buf_size = ready
+                if self._conv_surf is None or self._conv_surf.get_size() != buf_size:
+                    self._conv_surf = pygame.Surface(buf_size).convert()
+                self._conv_surf.blit(pygame.image.frombuffer(buf, buf_size, "RGBX"), (0, 0))
+                self._conv_ready_used = ready
+                redrawn = True
+            
+            if self._conv_surf is None:
+                return
+            
+            # POSIÇÃO FIXA NO LADO DIREITO
+            rect = self.screen.blit(self._conv_surf, (self.plot_x_offset + int(10 * self.ui_scale), y_offset))
+            if redrawn:
+                self._dirty_rects.append(rect)
         except Exception as e:
             # Se falhar, apenas não desenhar o gráfico
             pass
     
+    def _record_history(self, generation: int, best_fitness: float):
+        """
+        Registra um ponto no histórico de convergência.
+        
+        O ponto que sai do deque entra no histórico amostrado a cada
+        _history_stride descartes; quando este enche, metade é descartada
+        e o passo dobra.
+        
+        Args:
+            generation: Número da geração
+            best_fitness: Melhor fitness da geração
+        """
+        if len(self.generation_history) == self.history_maxlen:
+            if self._history_evicted % self._history_stride == 0:
+                self._gen_ds.append(self.generation_history[0])
+                self._fit_ds.append(self.fitness_history[0])
+                if len(self._gen_ds) > self.history_maxlen:
+                    del self._gen_ds[1::2]
+                    del self._fit_ds[1::2]
+                    self._history_stride *= 2
+            self._history_evicted += 1
+        
+        self.generation_history.append(generation)
+        self.fitness_history.append(best_fitness)
+        self._history_count += 1
+    
+    def refresh_convergence_plot(self):
+        """
+        Força um novo raster do gráfico com todo o histórico no próximo frame.
+        
+        Útil ao fim do AG, quando as últimas gerações podem não ter completado
+        plot_redraw_every atualizações desde o último pedido.
+        """
+        self._conv_req_size = None
+        self._needs_redraw = True
+    
+    def _request_convergence_plot(self, size: Tuple[int, int]):
+        """
+        Envia um snapshot do histórico para a thread de plotagem.
+        
+        Args:
+            size: (largura, altura) do gráfico em pixels
+        """
+        if self._conv_thread is None:
+            self._conv_thread = threading.Thread(target=self._convergence_worker, daemon=True)
+            self._conv_thread.start()
+            # Sem isso, sair no meio de um canvas.draw() mata a thread dentro
+            # do código C do Agg e o processo aborta
+            atexit.register(self._stop_convergence_worker)
+        
+        # Fila de 1 posição: descarta o pedido antigo ainda não processado
+        try:
+            self._conv_queue.get_nowait()
+        except queue.Empty:
+            pass
+        with self._state_lock:
+            generations = self._gen_ds + list(self.generation_history)
+            fitness = self._fit_ds + list(self.fitness_history)
+        self._conv_queue.put_nowait((generations, fitness, size))
+        self._conv_req_size = size
+    
+    def _stop_convergence_worker(self):
+        """Encerra a thread de plotagem (espera o raster em andamento)."""
+        if self._conv_thread is None:
+            return
+        
+        try:
+            self._conv_queue.get_nowait()
+        except queue.Empty:
+            pass
+        self._conv_queue.put(None)
+        self._conv_thread.join(timeout=2)
+        self._conv_thread = None
+        atexit.unregister(self._stop_convergence_worker)
+    
+    def _convergence_worker(self):
+        """Loop da thread de plotagem (rasteriza o gráfico com o Agg)."""
+        while True:
+            job = self._conv_queue.get()
+            if job is None:
+                break
+            
+            generations, fitness, (plot_width, plot_height) = job
+            try:
+                # Reaproveitar figura/canvas (recriados só se o tamanho mudar)
+                canvas = self._get_convergence_canvas(plot_width, plot_height)
+                self._conv_line.set_data(generations, fitness)
+                self._conv_ax.relim()
+                self._conv_ax.autoscale_view()
+                canvas.draw()
+                
+                # Copiar o buffer do Agg (o próximo draw() o sobrescreve) e
+                # publicar com uma única atribuição
+                self._conv_ready = (bytes(canvas.buffer_rgba()), canvas.get_width_height())
+            except Exception:
+                # Se falhar, apenas mantém o último gráfico
+                pass
+    
+    def _get_convergence_canvas(self, plot_width: int, plot_height: int) -> FigureCanvasAgg:
+        """
+        Retorna o canvas do gráfico de convergência, criando a figura só na
+        primeira chamada ou quando o tamanho do gráfico muda.
+        
+        Args:
+            plot_width: Largura do gráfico em pixels
+            plot_height: Altura do gráfico em pixels
+            
+        Returns:
+            Canvas Agg da figura reaproveitada
+        """
+        if self._conv_canvas is not None and self._conv_size == (plot_width, plot_height):
+            return self._conv_canvas
+        
+        dpi = 85
+        fig_w = plot_width / dpi
+        fig_h = plot_height / dpi
+        
+        # Criar figura matplotlib MENOR (Figure direto, fora do estado
+        # global do pyplot, já que vive na thread de plotagem)
+        fig = Figure(figsize=(fig_w, fig_h), dpi=dpi)
+        ax = fig.add_subplot()
+        self._conv_line, = ax.plot([], [], 'b-', linewidth=1.5)
+        ax.set_xlabel('Geracao', fontsize=9)
+        ax.set_ylabel('Fitness', fontsize=9)
+        ax.set_title('Convergencia do AG', fontsize=10)
+        ax.tick_params(axis='both', labelsize=8)
+        ax.grid(True, alpha=0.3, linewidth=0.5)
+        fig.tight_layout(pad=0.5)
+        
+        self._conv_fig = fig
+        self._conv_ax = ax
+        self._conv_canvas = FigureCanvasAgg(fig)
+        self._conv_size = (plot_width, plot_height)
+        return self._conv_canvas
+    
     def update(self, 
                delivery_points_coords: List[Tuple[float, float]],
                delivery_points_priorities: List[str],
@@ -700,61 +1120,179 @@ class PygameVisualizer:
                ag_stats: Dict = None,
                route_details: Dict = None):
         """
-        Atualiza a visualização com novos dados.
+        Atualiza a visualização com novos dados (set_state + tick).
+        
+        Args:
+            delivery_points_coords: Coordenadas dos pontos de entrega (lat, lon), lista ou array (N, 2)
+            delivery_points_priorities: Prioridades dos pontos
+            routes: Lista de rotas (cada rota é lista de índices de pontos)
+            depot_coord: Coordenada do depósito (lat, lon)
+            generation: Número da geração atual
+            best_fitness: Melhor fitness
+        """
+        self.set_state(delivery_points_coords, delivery_points_priorities, routes,
+                       depot_coord, generation, best_fitness, ag_stats, route_details)
+        return self.tick()
+    
+    def set_state(self, 
+                  delivery_points_coords: List[Tuple[float, float]],
+                  delivery_points_priorities: List[str],
+                  routes: List[List[int]],
+                  depot_coord: Tuple[float, float],
+                  generation: int,
+                  best_fitness: float,
+                  ag_stats: Dict = None,
+                  route_details: Dict = None) -> bool:
+        """
+        Guarda o snapshot mais recente do AG sem desenhar nada.
+        
+        Pode ser chamado de outra thread (a do AG) enquanto a thread
+        principal roda run_event_loop().
         
         Args:
-            delivery_points_coords: Coordenadas dos pontos de entrega (lat, lon)
+            delivery_points_coords: Coordenadas dos pontos de entrega (lat, lon), lista ou array (N, 2)
             delivery_points_priorities: Prioridades dos pontos
             routes: Lista de rotas (cada rota é lista de índices de pontos)
             depot_coord: Coordenada do depósito (lat, lon)
             generation: Número da geração atual
             best_fitness: Melhor fitness
+            ag_stats: Estatísticas do AG (opcional)
+            route_details: Detalhes da melhor solução (opcional)
+            
+        Returns:
+            False se a janela foi fechada
+        """
+        with self._state_lock:
+            # Atualizar histórico (mesmo sem desenhar, para o gráfico ficar completo)
+            self._record_history(generation, best_fitness)
+            self._state = (delivery_points_coords, delivery_points_priorities, routes,
+                           depot_coord, generation, best_fitness, ag_stats, route_details)
+            self._needs_redraw = True
+        return self.running
+    
+    def set_llm_status(self, status: Optional[str]):
+        """
+        Atualiza o indicador da fase de LLM (redesenha no próximo frame).
+        
+        Args:
+            status: "running", "done", "error" ou None (oculta o indicador)
+        """
+        with self._state_lock:
+            if status != self.llm_status:
+                self.llm_status = status
+                self._needs_redraw = True
+    
+    def tick(self) -> bool:
+        """
+        Processa eventos e redesenha a partir do último estado, limitado a fps.
+        
+        Returns:
+            False se a janela foi fechada
         """
-        # Processar eventos
         self.handle_events()
         
         if not self.running:
             return False
         
+        self.redraw_from_state()
+        self.clock.tick(self.fps)
+        return True
+    
+    def run_event_loop(self, stop_event: Optional[threading.Event] = None):
+        """
+        Loop de eventos/redesenho desacoplado do AG: roda na thread principal
+        a fps fixo enquanto o AG, em outra thread, chama set_state().
+        
+        Args:
+            stop_event: Evento opcional para encerrar o loop
+        """
+        while self.running and not (stop_event is not None and stop_event.is_set()):
+            self.tick()
+    
+    def redraw_from_state(self):
+        """Redesenha a tela a partir do último snapshot (se algo mudou)."""
+        # Um raster novo do gráfico também conta como mudança
+        plot_ready = self._conv_ready is not self._conv_ready_used
+        if self._state is None or not (self._needs_redraw or plot_ready):
+            return
+        
+        # Janela minimizada: não desenha nada (nem o matplotlib); redesenha
+        # por completo quando voltar
+        if not pygame.display.get_active():
+            self._full_redraw = True
+            self._needs_redraw = True
+            return
+        
         if self.paused:
-            self.clock.tick(self.fps)
-            return True
+            return
+        
+        (delivery_points_coords, delivery_points_priorities, routes, depot_coord,
+         generation, best_fitness, ag_stats, route_details) = self._state
         
         # Limpar tela
         self.screen.fill(WHITE)
         
-        # Normalizar coordenadas
-        all_coords = delivery_points_coords + [depot_coord]
-        normalized = self.normalize_coordinates(all_coords)
+        # Normalizar coordenadas (só quando pontos, depósito ou layout mudam;
+        # comparar os arrays é bem mais barato que renormalizar a cada frame).
+        # Aceita lista de tuplas ou array numpy (N, 2)
+        layout = (self.plot_x_offset, self.height)
+        if (self._coord_cache_key != (depot_coord, layout)
+                or not np.array_equal(self._coord_src, delivery_points_coords)):
+            coords_arr = np.asarray(delivery_points_coords, dtype=np.float64).reshape(-1, 2)
+            all_coords = np.vstack((coords_arr, depot_coord))
+            normalized = self.normalize_coordinates(all_coords)
+            
+            self._depot_pixel = normalized[-1]
+            self._points_pixels = normalized[:-1]
+            self._coord_src = coords_arr.copy()
+            self._coord_cache_key = (depot_coord, layout)
+            self._build_point_index(self._points_pixels)
+            self._pixels_arr = np.asarray(normalized, dtype=np.int32)
+            
+            # Região do mapa: tudo o que é desenhado fica entre os pontos
+            # (folga para o raio dos marcadores e o destaque do hover)
+            (min_x, min_y), (max_x, max_y) = self._pixels_arr.min(axis=0), self._pixels_arr.max(axis=0)
+            self._map_rect = pygame.Rect(int(min_x), int(min_y),
+                                         int(max_x - min_x) + 1,
+                                         int(max_y - min_y) + 1).inflate(40, 40)
+            self._full_redraw = True
         
-        depot_pixel = normalized[-1]
-        points_pixels = normalized[:-1]
+        depot_pixel = self._depot_pixel
+        points_pixels = self._points_pixels
         
         # Desenhar depósito
         self.draw_depot(depot_pixel)
         
-        # Desenhar rotas (com filtro)
-        for vehicle_idx, route_indices in enumerate(routes):
-            # Aplicar filtro: só desenhar se for o veículo selecionado ou se "todos" estiver selecionado
-            if self.selected_vehicle == -1 or self.selected_vehicle == vehicle_idx:
-                # Construir rota em pixels
-                route_pixels = [depot_pixel]  # Começa no depósito
-                for idx in route_indices:
-                    if 0 <= idx < len(points_pixels):
-                        route_pixels.append(points_pixels[idx])
-                
-                # Espessura da linha: mais grossa se for o veículo selecionado
-                line_width = 4 if self.selected_vehicle == vehicle_idx else 2
-                
-                if len(route_pixels) > 1:
-                    self.draw_route(route_pixels, vehicle_idx, width=line_width)
+        # Desenhar rotas (com filtro): com um veículo selecionado, percorre só a rota dele
+        if self.selected_vehicle == -1:
+            visible_routes = enumerate(routes)
+        elif self.selected_vehicle < len(routes):
+            visible_routes = [(self.selected_vehicle, routes[self.selected_vehicle])]
+        else:
+            visible_routes = []
+        
+        num_points = len(points_pixels)
+        for vehicle_idx, route_indices in visible_routes:
+            # Construir rota em pixels com um único gather no array
+            # (depósito = índice num_points, no início da rota)
+            route_np = np.asarray(route_indices, dtype=np.int32)
+            route_np = route_np[(route_np >= 0) & (route_np < num_points)]
+            route_pixels = self._pixels_arr[np.r_[num_points, route_np]].tolist()
+            
+            # Espessura da linha: mais grossa se for o veículo selecionado
+            line_width = 4 if self.selected_vehicle == vehicle_idx else 2
+            
+            if len(route_pixels) > 1:
+                color = VEHICLE_COLORS[vehicle_idx % len(VEHICLE_COLORS)]
+                self.draw_route_closed(route_pixels, color, line_width)
         
         # Desenhar pontos de entrega (por cima das rotas)
         self.draw_delivery_points(points_pixels, delivery_points_priorities)
         
-        # Atualizar histórico
-        self.generation_history.append(generation)
-        self.fitness_history.append(best_fitness)
+        # Destacar ponto sob o mouse
+        if self._hover_idx is not None and self._hover_idx < len(points_pixels):
+            pygame.draw.circle(self.screen, PURPLE, points_pixels[self._hover_idx], 16, 3)
+        self._dirty_rects.append(self._map_rect)
         
         # ========== LAYOUT ORGANIZADO - SEM SOBREPOSIÇÕES ==========
         
@@ -776,19 +1314,40 @@ class PygameVisualizer:
         # METRICAS GERAIS: abaixo das estatisticas
         metrics_y = stats_y + int(self.height * 0.18)
         self.draw_metrics(generation, best_fitness, len(routes), y_offset=metrics_y)
+        
+        # Indicador da LLM: logo abaixo das métricas
+        if self.llm_status is not None:
+            self.draw_llm_status(metrics_y + 80)
+        
+        # Estatísticas + métricas + indicador (texto muda a cada geração)
+        self._dirty_rects.append(pygame.Rect(self.plot_x_offset, stats_y,
+                                             self.width - self.plot_x_offset,
+                                             metrics_y + 110 - stats_y))
 
         # PARTE INFERIOR: Detalhes das rotas (so quando ha espaco vertical suficiente)
         if route_details and self.height >= 900:
             self.draw_route_details(route_details)
+            self._dirty_rects.append(pygame.Rect(20, self.height - 150, self.width - 40, 135))
         
-        # Atualizar display
-        pygame.display.flip()
-        self.clock.tick(self.fps)
+        # Atualizar display: só as regiões alteradas, a menos que elas
+        # cubram boa parte da tela (aí o flip completo sai mais barato)
+        self._present()
+        self._needs_redraw = False
+    
+    def _present(self):
+        """Envia o frame para o display (flip completo ou dirty rects)."""
+        dirty_area = sum(r.w * r.h for r in self._dirty_rects)
+        if self._full_redraw or dirty_area > 0.5 * self.width * self.height:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self._dirty_rects)
         
-        return True
+        self._dirty_rects.clear()
+        self._full_redraw = False
     
     def close(self):
         """Fecha o visualizador."""
+        self._stop_convergence_worker()
         pygame.quit()
         sys.exit()
     
@@ -4,10 +4,16 @@ Script de Teste para o Visualizador Folium.
 Este script testa a geração de mapas HTML interativos usando os dados
 de exemplo do projeto.
 """
-import json
+import io
 import sys
+from functools import lru_cache, partial
 from pathlib import Path
 
+try:
+    import orjson as _json  # Parser em C, bem mais rápido
+except ImportError:
+    import json as _json
+
 # Adicionar diretório raiz ao path
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
@@ -15,30 +21,46 @@ sys.path.insert(0, str(project_root))
 from src.visualization.folium_visualizer import FoliumVisualizer, generate_route_map, get_point_label
 
 
+@lru_cache(maxsize=32)
+def _load_json(path: str):
+    """Carrega um JSON de dados uma única vez (os testes reaproveitam o resultado)."""
+    return _json.loads(Path(path).read_bytes())
+
+
+def _flush(buf: io.StringIO):
+    """Escreve de uma vez o texto acumulado no buffer e o esvazia."""
+    sys.stdout.write(buf.getvalue())
+    sys.stdout.flush()
+    buf.seek(0)
+    buf.truncate()
+
+
 def test_folium_basic():
     """Teste básico do visualizador Folium."""
     
-    print("="*70)
-    print("TESTE DO VISUALIZADOR FOLIUM")
-    print("="*70)
-    print()
+    # Saída acumulada em memória e escrita em blocos (uma chamada por bloco)
+    buf = io.StringIO()
+    out = partial(print, file=buf)
+    
+    out("="*70)
+    out("TESTE DO VISUALIZADOR FOLIUM")
+    out("="*70)
+    out()
     
     # Carregar dados de exemplo
-    print("📂 Carregando dados de exemplo...")
+    out("📂 Carregando dados de exemplo...")
     
     data_dir = project_root / "data"
     
     # Carregar pontos de entrega
-    with open(data_dir / "sample_delivery_points.json", 'r', encoding='utf-8') as f:
-        all_points = json.load(f)
+    all_points = _load_json(str(data_dir / "sample_delivery_points.json"))
     
     # Carregar veículos
-    with open(data_dir / "sample_vehicles.json", 'r', encoding='utf-8') as f:
-        vehicles = json.load(f)
+    vehicles = _load_json(str(data_dir / "sample_vehicles.json"))
     
-    print(f"   ✓ {len(all_points)} pontos de entrega carregados")
-    print(f"   ✓ {len(vehicles)} veículos carregados")
-    print()
+    out(f"   ✓ {len(all_points)} pontos de entrega carregados")
+    out(f"   ✓ {len(vehicles)} veículos carregados")
+    out()
     
     # Usar apenas primeiros 15 pontos
     delivery_points = all_points[:15]
@@ -53,22 +75,22 @@ def test_folium_basic():
         [6, 11, 13, 14]       # Veículo 3 - Caminhonete 03
     ]
     
-    print("🗺️ Criando mapa interativo...")
-    print(f"   • 3 veículos")
-    print(f"   • 15 pontos de entrega")
-    print(f"   • {sum(len(r) for r in routes)} entregas totais")
-    print()
+    out("🗺️ Criando mapa interativo...")
+    out(f"   • 3 veículos")
+    out(f"   • 15 pontos de entrega")
+    out(f"   • {sum(len(r) for r in routes)} entregas totais")
+    out()
     
     # Exibir detalhes das rotas
-    print("📋 DETALHES DAS ROTAS:")
-    print("-" * 70)
+    out("📋 DETALHES DAS ROTAS:")
+    out("-" * 70)
     for i, route in enumerate(routes, 1):
         vehicle = vehicles[i-1]
         route_letters = ' → '.join([get_point_label(idx) for idx in route])
-        print(f"   Veículo {i} - {vehicle['name']}")
-        print(f"   └─ {len(route)} entregas: Depósito → {route_letters} → Depósito")
-    print("-" * 70)
-    print()
+        out(f"   Veículo {i} - {vehicle['name']}")
+        out(f"   └─ {len(route)} entregas: Depósito → {route_letters} → Depósito")
+    out("-" * 70)
+    out()
     
     # Criar visualizador
     viz = FoliumVisualizer()
@@ -82,29 +104,31 @@ def test_folium_basic():
         show_route_arrows=True
     )
     
-    # Salvar mapa
+    # Salvar mapa (save_map imprime por conta própria)
+    _flush(buf)
     filepath = viz.save_map(mapa, "teste_rotas_exemplo.html")
     
     # Informações finais
-    print("✅ TESTE CONCLUÍDO COM SUCESSO!")
-    print()
-    print("📍 RECURSOS DO MAPA:")
-    print("   • Marcadores coloridos por prioridade")
-    print("   • Linhas coloridas para cada veículo")
-    print("   • Setas animadas mostrando direção")
-    print("   • Popups clicáveis com informações")
-    print("   • Legenda interativa")
-    print("   • Mini mapa de navegação")
-    print("   • Controle de tela cheia")
-    print("   • Zoom e navegação")
-    print()
-    print("🌐 COMO VISUALIZAR:")
-    print(f"   1. Abra o arquivo: {filepath.absolute()}")
-    print("   2. Use qualquer navegador (Chrome, Firefox, Edge, etc.)")
-    print("   3. Clique nos marcadores para ver detalhes")
-    print("   4. Clique nas linhas para ver informações da rota")
-    print()
-    print("="*70)
+    out("✅ TESTE CONCLUÍDO COM SUCESSO!")
+    out()
+    out("📍 RECURSOS DO MAPA:")
+    out("   • Marcadores coloridos por prioridade")
+    out("   • Linhas coloridas para cada veículo")
+    out("   • Setas animadas mostrando direção")
+    out("   • Popups clicáveis com informações")
+    out("   • Legenda interativa")
+    out("   • Mini mapa de navegação")
+    out("   • Controle de tela cheia")
+    out("   • Zoom e navegação")
+    out()
+    out("🌐 COMO VISUALIZAR:")
+    out(f"   1. Abra o arquivo: {filepath.absolute()}")
+    out("   2. Use qualquer navegador (Chrome, Firefox, Edge, etc.)")
+    out("   3. Clique nos marcadores para ver detalhes")
+    out("   4. Clique nas linhas para ver informações da rota")
+    out()
+    out("="*70)
+    _flush(buf)
     
     return filepath
 
@@ -121,11 +145,9 @@ def test_folium_quick():
     # Carregar dados usando project_root
     data_dir = project_root / "data"
     
-    with open(data_dir / "sample_delivery_points.json", 'r', encoding='utf-8') as f:
-        points = json.load(f)[:15]
+    points = _load_json(str(data_dir / "sample_delivery_points.json"))[:15]
     
-    with open(data_dir / "sample_vehicles.json", 'r', encoding='utf-8') as f:
-        vehicles = json.load(f)
+    vehicles = _load_json(str(data_dir / "sample_vehicles.json"))
     
     # Rotas simples
     routes = [
@@ -155,7 +177,8 @@ if __name__ == "__main__":
         # Teste básico
         filepath1 = test_folium_basic()
         
-        # Teste rápido
+        # Teste rápido (no mesmo processo: reaproveita o folium já
+        # importado e os JSON do cache de _load_json)
         filepath2 = test_folium_quick()
         
         print()
@@ -4,7 +4,11 @@ Script de Demonstração do Sistema de Q&A (Perguntas e Respostas).
 Permite fazer perguntas em linguagem natural sobre rotas otimizadas.
 """
 
+import argparse
+import asyncio
+import io
 import sys
+from functools import partial
 from pathlib import Path
 
 # Adicionar src ao path
@@ -14,8 +18,21 @@ sys.path.insert(0, str(project_root))
 from src.llm_integration import QASystem, interactive_qa_session
 
 
-def demo_qa_system():
-    """Demonstração do sistema de Q&A com dados de exemplo."""
+def _flush(buf: io.StringIO):
+    """Escreve de uma vez o texto acumulado no buffer e o esvazia."""
+    sys.stdout.write(buf.getvalue())
+    sys.stdout.flush()
+    buf.seek(0)
+    buf.truncate()
+
+
+def demo_qa_system(interactive: bool = False):
+    """
+    Demonstração do sistema de Q&A com dados de exemplo.
+    
+    Args:
+        interactive: Se True, abre a sessão interativa de perguntas ao final
+    """
     
     print("="*70)
     print(" DEMONSTRAÇÃO: SISTEMA DE PERGUNTAS E RESPOSTAS SOBRE ROTAS")
@@ -107,9 +124,14 @@ def demo_qa_system():
         ga_stats=ga_stats
     )
     
+    # Daqui em diante a saída é acumulada em memória e escrita em blocos;
+    # input() e as mensagens do próprio QASystem ficam fora do buffer
+    buf = io.StringIO()
+    out = partial(print, file=buf)
+    
     # 3. Exemplos de perguntas
-    print("\n3️⃣  Exemplos de perguntas...")
-    print("\n" + "-"*70)
+    out("\n3️⃣  Exemplos de perguntas...")
+    out("\n" + "-"*70)
     
     example_questions = [
         "Qual veículo tem a maior distância a percorrer?",
@@ -118,69 +140,85 @@ def demo_qa_system():
         "Qual é a eficiência geral das rotas?",
     ]
     
-    print("\n📝 Exemplos de perguntas que você pode fazer:")
+    out("\n📝 Exemplos de perguntas que você pode fazer:")
     for i, q in enumerate(example_questions, 1):
-        print(f"   {i}. {q}")
+        out(f"   {i}. {q}")
     
     # 4. Testar algumas perguntas automaticamente
-    print("\n\n4️⃣  Testando perguntas automaticamente...\n")
+    out("\n\n4️⃣  Testando perguntas automaticamente...\n")
+    
+    # As quatro consultas são independentes: disparadas juntas, o tempo
+    # total fica perto da mais lenta em vez da soma de todas
+    async def run_queries():
+        return await asyncio.gather(
+            qa.aask(example_questions[0]),
+            qa.aask(example_questions[2]),
+            qa.asuggest_improvements(),
+            qa.afind_bottlenecks(),
+        )
+    
+    _flush(buf)
+    answer_1, answer_2, suggestions, bottlenecks = asyncio.run(run_queries())
     
     # Pergunta 1
-    print("-"*70)
-    response = qa.ask(example_questions[0])
-    print(f"\n📊 Resposta:\n{response}\n")
+    out("-"*70)
+    out(f"\n📊 Resposta:\n{answer_1}\n")
     
     # Pergunta 2
-    print("-"*70)
-    response = qa.ask(example_questions[2])
-    print(f"\n📊 Resposta:\n{response}\n")
+    out("-"*70)
+    out(f"\n📊 Resposta:\n{answer_2}\n")
     
     # 5. Sugestões de melhoria
-    print("-"*70)
-    print("\n5️⃣  Gerando sugestões de melhoria...\n")
-    suggestions = qa.suggest_improvements()
-    print(f"💡 Sugestões:\n{suggestions}\n")
+    out("-"*70)
+    out("\n5️⃣  Sugestões de melhoria...\n")
+    out(f"💡 Sugestões:\n{suggestions}\n")
     
     # 6. Identificar gargalos
-    print("-"*70)
-    print("\n6️⃣  Identificando gargalos...\n")
-    bottlenecks = qa.find_bottlenecks()
-    print(f"⚠️  Gargalos:\n{bottlenecks}\n")
+    out("-"*70)
+    out("\n6️⃣  Gargalos identificados...\n")
+    out(f"⚠️  Gargalos:\n{bottlenecks}\n")
     
-    print("-"*70)
+    out("-"*70)
     
     # 7. Sessão interativa (opcional)
-    print("\n\n7️⃣  Sessão Interativa (OPCIONAL)")
-    print("\nDeseja iniciar uma sessão interativa de perguntas? (s/n): ", end='')
-    
-    try:
-        choice = input().strip().lower()
-        if choice == 's':
+    # (só com --interactive; sem a flag a demo roda até o fim sem ler stdin)
+    if interactive:
+        out("\n\n7️⃣  Sessão Interativa")
+        _flush(buf)
+        
+        try:
             interactive_qa_session(qa)
-    except (EOFError, KeyboardInterrupt):
-        print("\n\nSessão cancelada.")
+        except (EOFError, KeyboardInterrupt):
+            out("\n\nSessão cancelada.")
     
     # 8. Exportar log
-    print("\n\n8️⃣  Exportando log de perguntas...")
+    out("\n\n8️⃣  Exportando log de perguntas...")
     output_path = project_root / "outputs" / "reports" / "qa_log_demo.md"
     output_path.parent.mkdir(parents=True, exist_ok=True)
+    _flush(buf)
     qa.export_qa_log(str(output_path))
     
-    print("\n" + "="*70)
-    print(" DEMONSTRAÇÃO CONCLUÍDA!")
-    print("="*70)
-    print(f"\n📁 Log salvo em: {output_path}")
-    print("\n💡 Para usar no seu código:")
-    print("   from src.llm_integration import QASystem")
-    print("   qa = QASystem(provider='ollama', model='llama2')")
-    print("   qa.load_context(routes, vehicles, points, metrics)")
-    print("   resposta = qa.ask('Sua pergunta aqui')")
-    print()
+    out("\n" + "="*70)
+    out(" DEMONSTRAÇÃO CONCLUÍDA!")
+    out("="*70)
+    out(f"\n📁 Log salvo em: {output_path}")
+    out("\n💡 Para usar no seu código:")
+    out("   from src.llm_integration import QASystem")
+    out("   qa = QASystem(provider='ollama', model='llama2')")
+    out("   qa.load_context(routes, vehicles, points, metrics)")
+    out("   resposta = qa.ask('Sua pergunta aqui')")
+    out()
+    _flush(buf)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Demonstração do sistema de Q&A sobre rotas")
+    parser.add_argument('--interactive', action='store_true',
+                        help="abre a sessão interativa de perguntas ao final da demo")
+    args = parser.parse_args()
+    
     try:
-        demo_qa_system()
+        demo_qa_system(interactive=args.interactive)
     except KeyboardInterrupt:
         print("\n\n👋 Demonstração interrompida. Até logo!")
     except Exception as e: